@@ -1,22 +1,115 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from route_optimizer import get_routes_data
+from route_optimizer import get_routes_data, stream_routes_data
+from router_service import get_router_service
+from batch import route_batch
+from query_cache import QueryCache, SQLiteCacheStore
+from instrumentation import Metrics, add_hook
+from timetable_updates import TimetableUpdateError
+import io
+import json
 import os
+import time
+import pandas as pd
 
 app = Flask(__name__)
 CORS(app) # Enable CORS for all routes
 
+# Stage timings and counters of every build and query, served at /api/metrics;
+# ROUTE_METRICS=0 leaves the pipeline without hooks, so nothing is recorded
+metrics = Metrics()
+metrics_enabled = os.environ.get('ROUTE_METRICS', '1') != '0'
+if metrics_enabled:
+    add_hook(metrics)
+
+# The router is built once per process and shared by all requests
+# ROUTER_GRAPH_BACKEND=csr trades some query speed for a much smaller graph;
+# ROUTER_SNAPSHOT=<path> memory-maps a prebuilt snapshot shared by all workers;
+# ROUTE_SEAT_TABLE=<csv> reads seat availability from a table (Train No, From, To, Seat Available)
+router_service = get_router_service(graph_backend=os.environ.get('ROUTER_GRAPH_BACKEND', 'dict'),
+                                    snapshot_path=os.environ.get('ROUTER_SNAPSHOT'),
+                                    seat_table=os.environ.get('ROUTE_SEAT_TABLE'))
+router_service.warm_up()
+
+# Final payloads are cached per timetable version; ROUTE_CACHE_DB=<path> adds a
+# SQLite tier that survives restarts and is shared by workers on this host.
+# Its rows outlive version switches and are deleted once older than the TTL
+cache_db = os.environ.get('ROUTE_CACHE_DB')
+cache_ttl = float(os.environ.get('ROUTE_CACHE_TTL', 3600))
+query_cache = QueryCache(max_entries=int(os.environ.get('ROUTE_CACHE_SIZE', 512)),
+                         ttl=cache_ttl,
+                         store=SQLiteCacheStore(cache_db, max_age=cache_ttl) if cache_db else None)
+
+# Result CSV/JSON files are written off the request path unless ROUTE_EXPORT=sync|none
+route_export = os.environ.get('ROUTE_EXPORT', 'background')
+
+# The exact Pareto search (mode=raptor) takes seconds where the heuristic takes a
+# tenth of one (UJN→KOTA on a 3000-train synthetic timetable: 9.7 s vs 0.17 s at
+# 3 transfers), so requests only get the heuristic modes; run raptor with batch.py
+API_MODES = ('heuristic', 'directed')
+
+def _api_mode(mode):
+    if mode not in API_MODES:
+        return f"Mode must be one of {list(API_MODES)}; mode 'raptor' is only available offline (batch.py)."
+    return None
+
+def _non_negative_int(name, value):
+    # Request values arrive as JSON numbers or query strings; anything else is the client's error
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    raise ValueError(f"'{name}' must be a non-negative integer, got {value!r}.")
+
 @app.route('/api/routes', methods=['GET'])
 def get_routes():
     origin = request.args.get('origin')
     destination = request.args.get('destination')
-    max_transfers = request.args.get('max_transfers', type=int, default=3)
+    max_transfers = request.args.get('max_transfers', default=3)
+    # mode=directed prunes the heuristic BFS with lower bounds towards the destination
+    mode = request.args.get('mode', default='heuristic')
+    # date=YYYY-MM-DD only uses trains running on the days they are boarded
+    journey_date = request.args.get('date') or None
+    # n_fast, n_cheap and n_balanced override how many FAST/CHEAP/BALANCED routes are picked
+    quotas = {name: request.args.get(name) for name in ('n_fast', 'n_cheap', 'n_balanced')}
+    # stream=1 answers with NDJSON: metadata, the optimal routes, then
+    # (unless include_all=0) every generated route, built as it is sent
+    stream = request.args.get('stream', default=0)
+    include_all = request.args.get('include_all', default=1)
 
     if not origin or not destination:
         return jsonify({"error": "Origin and destination are required."}), 400
+    try:
+        max_transfers = _non_negative_int('max_transfers', max_transfers)
+        quotas = {name: _non_negative_int(name, value) for name, value in quotas.items() if value not in (None, '')}
+        stream = bool(_non_negative_int('stream', stream))
+        include_all = bool(_non_negative_int('include_all', include_all))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    mode_error = _api_mode(mode)
+    if mode_error:
+        return jsonify({"error": mode_error}), 400
+
+    try:
+        router = router_service.get()
+    except FileNotFoundError:
+        return jsonify({"error": f"Could not find '{router_service.path}'."}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+
+    if stream:
+        records, router = stream_routes_data(origin.upper(), destination.upper(), max_transfers, router=router,
+                                             mode=mode, cache=query_cache, include_all=include_all,
+                                             journey_date=journey_date, quotas=quotas)
+        if isinstance(records, dict):
+            return jsonify(records), 400
+        lines = (json.dumps(record) + '\n' for record in records)
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
 
     # Call the core logic function
-    results, router = get_routes_data(origin.upper(), destination.upper(), max_transfers)
+    results, router = get_routes_data(origin.upper(), destination.upper(), max_transfers, router=router,
+                                      mode=mode, cache=query_cache,
+                                      export=route_export, journey_date=journey_date, quotas=quotas)
 
     if results and "error" in results:
         return jsonify(results), 400
@@ -26,6 +119,118 @@ def get_routes():
     # but we can return the 'results' dictionary which contains the JSON content
     return jsonify(results), 200
 
+@app.route('/api/routes/batch', methods=['POST'])
+def get_routes_batch():
+    # Body: {"pairs": [["PGT", "KOTA"], ...], "max_transfers": 3, "mode": "heuristic"}
+    # Every selected route goes to one .npz under ROUTE_BATCH_DIR; the response summarizes each pair
+    body = request.get_json(silent=True) or {}
+    pairs = body.get('pairs')
+    if not pairs or not all(isinstance(pair, (list, tuple)) and len(pair) == 2 for pair in pairs):
+        return jsonify({"error": "'pairs' must be a list of [origin, destination] pairs."}), 400
+    mode = body.get('mode', 'heuristic')
+    mode_error = _api_mode(mode)
+    if mode_error:
+        return jsonify({"error": mode_error}), 400
+    try:
+        max_transfers = _non_negative_int('max_transfers', body.get('max_transfers', 3))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        router = router_service.get()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+
+    out_dir = os.environ.get('ROUTE_BATCH_DIR', 'batch_results')
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, f"route_board_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.npz")
+    try:
+        # Runs in the request thread: forking a pool from this threaded server is not safe.
+        # Large boards belong to the batch.py CLI, which has its own worker pool
+        results = route_batch(pairs, max_transfers=max_transfers, router=router,
+                              mode=mode, workers=1, out_path=out_path)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "output": out_path,
+        "pairs": [
+            {"origin": origin, "destination": destination, "error": error or None,
+             "total_routes_generated": generated, "pareto_front_size": pareto_size,
+             "optimal_routes_count": len(selected)}
+            for (origin, destination), (error, generated, pareto_size, selected) in results.items()
+        ]
+    }), 200
+
+@app.route('/api/reload', methods=['POST'])
+def reload_timetable():
+    # Rebuilds in the background; requests keep using the current graph until the swap
+    force = request.args.get('force', type=int, default=0)
+    if force:
+        started = router_service.reload()
+    else:
+        started = router_service.reload_if_changed()
+    return jsonify({"reload_started": started, **router_service.status()}), 202
+
+def _train_stops(train_no, body):
+    # Body: {"stops": [{"SEQ": 1, "Station Code": "PGT", "Arrival time": "10:00:00", ...}, ...]},
+    # one record per stop with the Train_details.csv columns
+    stops = body.get('stops') if isinstance(body, dict) else None
+    if not stops or not isinstance(stops, list):
+        raise TimetableUpdateError("'stops' must be a list of stop records.")
+    return pd.DataFrame(stops).assign(**{'Train No': train_no})
+
+def _update_timetable(update):
+    # Updates swap in a new graph; requests already running keep the one they started with
+    try:
+        summary = update()
+    except (TimetableUpdateError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify({"update": summary, **router_service.status()}), 200
+
+@app.route('/api/trains', methods=['POST'])
+def add_train():
+    body = request.get_json(silent=True) or {}
+    train_no = body.get('train_no')
+    if not train_no:
+        return jsonify({"error": "'train_no' is required."}), 400
+    return _update_timetable(lambda: router_service.add_train(train_no, _train_stops(train_no, body)))
+
+@app.route('/api/trains/<train_no>', methods=['PUT'])
+def replace_train(train_no):
+    body = request.get_json(silent=True) or {}
+    return _update_timetable(lambda: router_service.replace_train(train_no, _train_stops(train_no, body)))
+
+@app.route('/api/trains/<train_no>', methods=['DELETE'])
+def remove_train(train_no):
+    return _update_timetable(lambda: router_service.remove_train(train_no))
+
+@app.route('/api/timetable/diff', methods=['POST'])
+def apply_timetable_diff():
+    # Body: a diff CSV (the Train_details.csv columns plus Action: add|replace|remove)
+    diff = request.get_data(as_text=True)
+    if not diff.strip():
+        return jsonify({"error": "The request body must be a diff CSV."}), 400
+    return _update_timetable(lambda: router_service.apply_diff(io.StringIO(diff)))
+
+@app.route('/api/cache', methods=['GET'])
+def cache_stats():
+    return jsonify(query_cache.stats()), 200
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    # reset=1 starts a new measurement window after this snapshot
+    try:
+        reset = bool(_non_negative_int('reset', request.args.get('reset', default=0)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    snapshot = metrics.snapshot()
+    if reset:
+        metrics.reset()
+    return jsonify({"enabled": metrics_enabled, **snapshot}), 200
+
 if __name__ == '__main__':
     # You can set the port here, 5000 is common for Flask APIs
     app.run(debug=True, port=5000)
\ No newline at end of file
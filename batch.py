@@ -0,0 +1,190 @@
+"""
+Many-to-many routing: run the route pipeline for a list of (origin,
+destination) pairs with one router and write every selected route to one
+columnar .npz file.
+
+Pairs are grouped by origin and each origin is one task (see
+ParetoTrainRouter.generate_routes_from). In mode='raptor' one untargeted
+round-based search serves all of the origin's destinations. In the
+heuristic modes every pair gets the routes of a single query, unless
+--shared-bfs trades that for one multi-transfer BFS per origin. Tasks run
+in a process pool forked after the router is built, so every worker reads
+the same graph pages instead of loading its own copy.
+
+    python batch.py pairs.csv --out route_board.npz --workers 8 --mode raptor
+"""
+import argparse
+import multiprocessing
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from route_optimizer import SEARCH_MODES, build_router, prepare_query
+from route_set import RouteSet
+
+# Read-only router the worker processes inherit through fork
+_router = None
+
+ROUTE_OBJECTIVES = ('time', 'cost', 'transfers', 'seat_prob', 'safety_score')
+SEGMENT_FIELDS = ('train_no', 'from', 'to', 'departure', 'arrival', 'distance', 'duration', 'wait_before')
+
+
+def _route_origin(origin, destinations, max_transfers, mode, shared_bfs=False):
+    """Results for every destination of one origin, as plain picklable tuples"""
+    router = _router
+    results = []
+    reachable = []
+    for destination in destinations:
+        error, _ = prepare_query(origin, destination, router, mode)
+        if error:
+            results.append((destination, error['error'], 0, 0, []))
+        else:
+            reachable.append(destination)
+    if not reachable:
+        return origin, results
+
+    for destination, routes in router.generate_routes_from(origin, reachable, max_transfers, mode,
+                                                                 shared_bfs=shared_bfs).items():
+        route_set = RouteSet(routes, router.fare_engine)
+        if not route_set:
+            results.append((destination, "No routes found!", 0, 0, []))
+            continue
+
+        pareto_front = router.pareto_optimize(route_set)
+        optimal_routes, categories = router.select_optimal_routes(pareto_front)
+        selected = [
+            (category,
+             tuple(route_data['objectives'][name] for name in ROUTE_OBJECTIVES),
+             [tuple(segment[field] for field in SEGMENT_FIELDS) for segment in route_data['route']])
+            for route_data, category in zip(optimal_routes, categories)
+        ]
+        results.append((destination, '', len(route_set), len(pareto_front), selected))
+    return origin, results
+
+
+def route_batch(pairs, max_transfers=3, router=None, mode='heuristic', workers=None, out_path=None,
+                shared_bfs=False):
+    """
+    Route every (origin, destination) pair with one router.
+
+    Returns {(origin, destination): (error, routes generated, Pareto front
+    size, selected routes)} in input order; a selected route is (category,
+    objectives tuple, segment tuples). With `out_path` the results are also
+    written with write_batch. `shared_bfs` is passed on to
+    generate_routes_from.
+    """
+    global _router
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+    if router is None:
+        router = build_router()
+
+    pairs = [(str(origin).upper(), str(destination).upper()) for origin, destination in pairs]
+    by_origin = OrderedDict()
+    for origin, destination in pairs:
+        destinations = by_origin.setdefault(origin, [])
+        if destination not in destinations:
+            destinations.append(destination)
+    tasks = [(origin, destinations, max_transfers, mode, shared_bfs) for origin, destinations in by_origin.items()]
+
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(tasks))
+    _router = router
+    try:
+        if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            # Forked workers share the parent's router copy-on-write
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                outcomes = pool.starmap(_route_origin, tasks, chunksize=1)
+        else:
+            outcomes = [_route_origin(*task) for task in tasks]
+    finally:
+        _router = None
+
+    found = {}
+    for origin, results in outcomes:
+        for destination, error, generated, pareto_size, selected in results:
+            found[(origin, destination)] = (error, generated, pareto_size, selected)
+    results = {pair: found[pair] for pair in pairs}
+
+    if out_path:
+        write_batch(results, out_path)
+    return results
+
+
+def write_batch(results, path):
+    """
+    Write route_batch results as one compressed .npz of flat columns:
+    pair_* per pair, route_* per selected route (route_pair indexes pairs)
+    and seg_* per segment (route_segment_offsets slices them per route).
+    """
+    pair_source, pair_destination, pair_error, pair_generated, pair_pareto = [], [], [], [], []
+    route_pair, route_category, route_objectives, route_offsets = [], [], [], [0]
+    segments = []
+
+    for index, ((origin, destination), (error, generated, pareto_size, selected)) in enumerate(results.items()):
+        pair_source.append(origin)
+        pair_destination.append(destination)
+        pair_error.append(error)
+        pair_generated.append(generated)
+        pair_pareto.append(pareto_size)
+        for category, objectives, route_segments in selected:
+            route_pair.append(index)
+            route_category.append(category)
+            route_objectives.append(objectives)
+            segments.extend(route_segments)
+            route_offsets.append(len(segments))
+
+    segment_columns = list(zip(*segments)) if segments else [()] * len(SEGMENT_FIELDS)
+    columns = {
+        'pair_source': np.array(pair_source, dtype=str),
+        'pair_destination': np.array(pair_destination, dtype=str),
+        'pair_error': np.array(pair_error, dtype=str),
+        'pair_generated': np.array(pair_generated, dtype=np.int32),
+        'pair_pareto_size': np.array(pair_pareto, dtype=np.int32),
+        'route_pair': np.array(route_pair, dtype=np.int32),
+        'route_category': np.array(route_category, dtype=str),
+        'route_segment_offsets': np.array(route_offsets, dtype=np.int64)
+    }
+    objective_columns = np.array(route_objectives, dtype=float).reshape(len(route_pair), len(ROUTE_OBJECTIVES))
+    for i, name in enumerate(ROUTE_OBJECTIVES):
+        columns[f'route_{name}'] = objective_columns[:, i]
+    for field, values in zip(SEGMENT_FIELDS, segment_columns):
+        numeric = field in ('distance', 'duration', 'wait_before')
+        columns[f'seg_{field}'] = np.array(values, dtype=float if numeric else str)
+
+    np.savez_compressed(path, **columns)
+    return path
+
+
+def read_batch(path):
+    """Load a write_batch file as a dict of column arrays"""
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('pairs', help="CSV with origin,destination columns")
+    parser.add_argument('--out', default='route_board.npz')
+    parser.add_argument('--csv', default='Train_details.csv', help="timetable")
+    parser.add_argument('--max-transfers', type=int, default=3)
+    parser.add_argument('--mode', choices=SEARCH_MODES, default='heuristic')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--shared-bfs', action='store_true',
+                        help="one multi-transfer BFS per origin; faster, but routes can differ from single queries")
+    args = parser.parse_args()
+
+    pairs_df = pd.read_csv(args.pairs)
+    pairs = list(zip(pairs_df['origin'], pairs_df['destination']))
+    router = build_router(args.csv)
+    results = route_batch(pairs, args.max_transfers, router, args.mode, args.workers, args.out,
+                          args.shared_bfs)
+
+    failed = sum(1 for error, _, _, _ in results.values() if error)
+    print(f"✓ {len(results) - failed}/{len(results)} pairs routed, results in {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Peak memory, segment dicts built and wall time (tracemalloc running) per
+query of the multi-transfer BFS: parent-pointer paths (the router's) against
+copying the segment list into every queue entry (the previous
+implementation), with the route and distance limits raised.
+
+    python benchmarks/bench_bfs_memory.py --csv Train_details.csv --max-routes 100 1000 10000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from route_optimizer import build_router
+
+
+def path_copy_bfs(router, source_id, dest_id, max_transfers, max_routes, max_distance):
+    """Same search with a copied segment list per queue entry"""
+    routes = []
+    level = [(source_id, [], 0, 0, -1, -1)]
+    visited, queued, stop_cache = set(), set(), {}
+    while level and len(routes) < max_routes:
+        states = [(s, bool(p), t, d, a, l) for s, p, t, d, a, l in level]
+        expansions = router._expand_ride_states(dest_id, max_transfers, states, queued, stop_cache, max_distance)
+        next_level = []
+        for (current_id, path, transfers, _, _, _), rides in zip(level, expansions):
+            if len(routes) >= max_routes:
+                break
+            if current_id == dest_id and path:
+                routes.append(path)
+                continue
+            if rides is None or (current_id, transfers) in visited:
+                continue
+            visited.add((current_id, transfers))
+            for next_id, train, board, k, new_dist, new_transfers, wait_minutes, arrival in rides:
+                if next_id != dest_id:
+                    if (next_id, new_transfers) in queued:
+                        continue
+                    queued.add((next_id, new_transfers))
+                segment = router._ride_segment(train, board, k, wait_minutes / 60)
+                next_level.append((next_id, path + [segment], new_transfers, new_dist, arrival, train))
+        level = next_level
+    return routes
+
+
+def measure(router, search, pairs):
+    built = [0]
+    ride_segment = router._ride_segment
+
+    def counting(*args):
+        built[0] += 1
+        return ride_segment(*args)
+
+    router._ride_segment = counting
+    peaks, routes = [], 0
+    start = time.perf_counter()
+    try:
+        for source_id, dest_id in pairs:
+            tracemalloc.start()
+            routes += len(search(source_id, dest_id))
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    finally:
+        del router._ride_segment
+    elapsed = time.perf_counter() - start
+    return max(peaks) / 1e6, built[0] / len(pairs), elapsed / len(pairs), routes / len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default='Train_details.csv')
+    parser.add_argument('--max-routes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--max-distance', type=float, nargs='+', default=[3000, 6000])
+    parser.add_argument('--queries', type=int, default=5)
+    parser.add_argument('--max-transfers', type=int, default=3)
+    args = parser.parse_args()
+
+    router = build_router(args.csv, graph_backend='csr')
+    rng = random.Random(0)
+    stations = sorted(router.station_to_id)
+    pairs = [tuple(router.station_to_id[s] for s in rng.sample(stations, 2)) for _ in range(args.queries)]
+
+    print(f"{'max_routes':>10} {'max_km':>7} {'paths':<12} {'peak MB':>8} {'segments':>9} {'ms/query':>9} {'routes':>7}")
+    for max_distance in args.max_distance:
+        for max_routes in args.max_routes:
+            searches = {
+                'parent ptrs': lambda s, d: router._find_multi_transfer_routes(
+                    s, d, args.max_transfers, max_routes, max_distance=max_distance),
+                'path copies': lambda s, d: path_copy_bfs(
+                    router, s, d, args.max_transfers, max_routes, max_distance)
+            }
+            for name, search in searches.items():
+                peak, segments, seconds, routes = measure(router, search, pairs)
+                print(f"{max_routes:>10} {max_distance:>7.0f} {name:<12} {peak:8.1f} {segments:9.0f} "
+                      f"{seconds * 1000:9.1f} {routes:7.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Multi-transfer BFS latency with and without goal-directed pruning
+(mode='directed') on the long city pairs whose results are checked into the
+repo, with the routes each finds and the size of the Pareto front.
+
+    python benchmarks/bench_goal_directed.py --csv Train_details.csv --min-km 1000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_raptor import ROOT, city_pairs
+from route_optimizer import build_router
+
+
+def shortest_recorded_km(source, destination):
+    """Cheapest route in the pair's checked-in results (₹1/km, so its cost is its km)"""
+    path = os.path.join(ROOT, f'{source}_to_{destination}_pareto_routes.csv')
+    return pd.read_csv(path)['Total Cost (₹)'].min()
+
+
+def run(router, source, destination, max_transfers, mode):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        routes = router.generate_all_routes(source, destination, max_transfers, mode=mode)
+        elapsed = time.perf_counter() - start
+        front = router.pareto_optimize(routes) if routes else []
+    return elapsed, len(routes), len(front)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default='Train_details.csv')
+    parser.add_argument('--min-km', type=float, default=1000, help="only pairs at least this far apart")
+    parser.add_argument('--max-transfers', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        router = build_router(args.csv, graph_backend='csr')
+
+    print(f"{'Pair':<12} {'km':>6} {'Mode':<10} {'ms':>8} {'Routes':>7} {'Front':>6}")
+    for source, destination in city_pairs():
+        km = shortest_recorded_km(source, destination)
+        if km < args.min_km:
+            continue
+        if source not in router.station_to_id or destination not in router.station_to_id:
+            print(f"{source + '-' + destination:<12} skipped: station not in timetable")
+            continue
+        for mode in ('heuristic', 'directed'):
+            runs = [run(router, source, destination, args.max_transfers, mode) for _ in range(args.repeat)]
+            elapsed = min(seconds for seconds, _, _ in runs)
+            _, routes, front = runs[0]
+            print(f"{source + '-' + destination:<12} {km:>6.0f} {mode:<10} {elapsed * 1000:>8.1f} "
+                  f"{routes:>7} {front:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare the vectorized and the row-wise graph builders of ParetoTrainRouter.
+
+    python benchmarks/bench_graph_build.py --csv Train_details.csv --repeat 3
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from route_optimizer import ParetoTrainRouter, load_timetable
+
+
+def build(df, vectorized):
+    # The builders print progress lines; keep them out of the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        router = ParetoTrainRouter(df, vectorized_build=vectorized)
+        elapsed = time.perf_counter() - start
+    return router, elapsed
+
+
+def same_graph(a, b):
+    if a.station_to_id != b.station_to_id or a.train_info != b.train_info:
+        return False
+    stations = set(a.graph) | set(b.graph)
+    return all(a.graph.get(s, []) == b.graph.get(s, []) for s in stations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default='Train_details.csv')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = load_timetable(args.csv)
+    print(f"Timetable: {len(df)} stops, {df['Train No'].nunique()} trains")
+
+    results = {}
+    for name, vectorized in (('row-wise', False), ('vectorized', True)):
+        times = []
+        for _ in range(args.repeat):
+            router, elapsed = build(df, vectorized)
+            times.append(elapsed)
+        results[name] = (router, min(times))
+        print(f"  {name:<11} best of {args.repeat}: {min(times):8.3f}s")
+
+    speedup = results['row-wise'][1] / max(results['vectorized'][1], 1e-9)
+    identical = same_graph(results['row-wise'][0], results['vectorized'][0])
+    print(f"  speedup: {speedup:.1f}x, identical graphs: {identical}")
+
+
+if __name__ == '__main__':
+    main()
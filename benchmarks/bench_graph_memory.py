@@ -0,0 +1,62 @@
+"""
+Report the memory footprint of the dict-based and the CSR graph backends.
+
+    python benchmarks/bench_graph_memory.py --csv Train_details.csv
+"""
+import argparse
+import contextlib
+import gc
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from route_optimizer import ParetoTrainRouter, load_timetable
+
+
+def measure(df, backend):
+    """Net and peak bytes allocated while building a router that is kept alive"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        router = ParetoTrainRouter(df, graph_backend=backend)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return router, current - before, peak - before, elapsed
+
+
+def mib(n):
+    return n / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default='Train_details.csv')
+    args = parser.parse_args()
+
+    df = load_timetable(args.csv)
+    print(f"Timetable: {len(df)} stops, {df['Train No'].nunique()} trains")
+    print(f"  {'backend':<8} {'resident':>12} {'build peak':>12} {'build time':>11}")
+
+    resident = {}
+    for backend in ('dict', 'csr'):
+        router, net, peak, elapsed = measure(df, backend)
+        resident[backend] = net
+        print(f"  {backend:<8} {mib(net):>9.1f} MiB {mib(peak):>9.1f} MiB {elapsed:>10.3f}s")
+        if backend == 'csr':
+            arrays = router.graph.nbytes() + router.train_info.nbytes()
+            print(f"           of which NumPy columns: {mib(arrays):.1f} MiB")
+        del router
+
+    print(f"  CSR graph uses {resident['csr'] / max(resident['dict'], 1):.1%} of the dict graph's memory")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Per-query wall time of serial generate_all_routes against a ParallelExecutor
+with increasing worker counts, checking that the route sets are identical.
+
+    python benchmarks/bench_parallel.py --csv Train_details.csv --workers 2 4 8 16
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parallel_search import ParallelExecutor
+from route_optimizer import build_router
+
+
+def timed_queries(router, pairs, max_transfers, executor=None):
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for source, destination in pairs:
+            results.append(router.generate_all_routes(source, destination, max_transfers, executor=executor))
+        elapsed = time.perf_counter() - start
+    return results, elapsed / len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default='Train_details.csv')
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8, 16])
+    parser.add_argument('--queries', type=int, default=10)
+    parser.add_argument('--max-transfers', type=int, default=3)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        router = build_router(args.csv, graph_backend='csr')
+    rng = random.Random(0)
+    stations = sorted(router.station_to_id)
+    pairs = [tuple(rng.sample(stations, 2)) for _ in range(args.queries)]
+
+    serial, serial_time = timed_queries(router, pairs, args.max_transfers)
+    print(f"  serial      {serial_time * 1000:8.1f} ms/query")
+    for workers in args.workers:
+        with ParallelExecutor(router, workers) as executor:
+            parallel, parallel_time = timed_queries(router, pairs, args.max_transfers, executor)
+        print(f"  {workers:>2} workers  {parallel_time * 1000:8.1f} ms/query  "
+              f"speedup: {serial_time / parallel_time:.2f}x  identical: {parallel == serial}")
+
+
+if __name__ == '__main__':
+    main()
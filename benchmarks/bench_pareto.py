@@ -0,0 +1,81 @@
+"""
+Compare the pairwise Pareto loop with the vectorized front extraction in
+pareto.py on synthetic route objectives.
+
+    python benchmarks/bench_pareto.py --sizes 1000 10000 100000 --reference-limit 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pareto import non_dominated_mask, non_dominated_ranks, objective_matrix
+from route_optimizer import ParetoTrainRouter
+
+
+def synthetic_objectives(n, seed=0):
+    """
+    Objective dicts shaped like calculate_route_objectives output, with its
+    ties, but with time, cost and seats drawn independently so that the
+    objectives conflict and the fronts are not trivially small
+    """
+    rng = np.random.default_rng(seed)
+    transfers = rng.integers(0, 4, n)
+    distance = rng.integers(300, 3000, n).astype(float)
+    time_min = rng.integers(360, 4320, n).astype(float)
+    segments = transfers + 1
+    seat_prob = rng.integers(0, segments + 1) / segments * 100
+    safety = np.maximum(100 - transfers * 5, 50) + 5 * rng.integers(0, 2, n)
+    return [
+        {'time': float(t), 'cost': float(d), 'transfers': int(x), 'seat_prob': float(s),
+         'safety_score': int(min(f, 100)), 'distance': float(d)}
+        for t, d, x, s, f in zip(time_min, distance, transfers, seat_prob, safety)
+    ]
+
+
+def pairwise_front(objectives):
+    """The original O(n²) loop over ParetoTrainRouter._dominates"""
+    keep = []
+    for i, obj_i in enumerate(objectives):
+        keep.append(not any(
+            i != j and ParetoTrainRouter._dominates(None, obj_j, obj_i)
+            for j, obj_j in enumerate(objectives)
+        ))
+    return np.array(keep, dtype=bool)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--reference-limit', type=int, default=10000,
+                        help="skip the pairwise loop above this many routes")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        objectives = synthetic_objectives(n)
+
+        start = time.perf_counter()
+        mask = non_dominated_mask(objective_matrix(objectives))
+        vectorized = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ranks = non_dominated_ranks(objective_matrix(objectives))
+        ranking = time.perf_counter() - start
+
+        line = (f"  n={n:<7} front={int(mask.sum()):<5} vectorized: {vectorized:8.3f}s  "
+                f"ranking ({int(ranks.max()) + 1} fronts): {ranking:8.3f}s")
+        if n <= args.reference_limit:
+            start = time.perf_counter()
+            reference = pairwise_front(objectives)
+            pairwise = time.perf_counter() - start
+            line += (f"  pairwise: {pairwise:8.3f}s  speedup: {pairwise / max(vectorized, 1e-9):.0f}x"
+                     f"  identical: {bool((reference == mask).all())}")
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""
+Time and measure every stage of the routing pipeline on a synthetic
+timetable, write the results as JSON and compare them with an earlier run.
+
+Stages: graph build, generate_all_routes, pareto_optimize,
+select_optimal_routes and save_results, each timed per query (best of
+--repeat) with its peak traced memory from one extra tracemalloc pass.
+The golden city-pair queries are checked against golden_routes.json: a
+digest of each query's full result, so a faster pipeline that returns
+different routes fails the run.
+
+    python benchmarks/bench_pipeline.py --out before.json
+    python benchmarks/bench_pipeline.py --out after.json --baseline before.json
+    python benchmarks/bench_pipeline.py --update-golden     # after an intended change of results
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, ROOT)
+
+from fares import FlatFare
+from route_optimizer import ParetoTrainRouter, build_results, normalize_timetable_times, save_results
+from route_set import RouteSet
+from synthetic_timetable import HUBS, synthetic_timetable
+
+GOLDEN_PATH = os.path.join(BENCH_DIR, 'golden_routes.json')
+# The timetable the golden digests were recorded on
+GOLDEN_TIMETABLE = {'stations': 1000, 'trains': 3000, 'stops': 12, 'seed': 0}
+# The city pairs whose results are checked into the repo
+GOLDEN_PAIRS = [('ADI', 'KOTA'), ('CBE', 'KOTA'), ('HWH', 'NDLS'), ('JP', 'KOTA'), ('LKO', 'PGT'),
+                ('MAS', 'PGT'), ('NDLS', 'KOTA'), ('PGT', 'KOTA'), ('PGT', 'LKO'), ('PGT', 'NDLS'),
+                ('PGT', 'PNBE'), ('PGT', 'SBC'), ('UJN', 'KOTA')]
+STAGES = ('build', 'generate', 'pareto', 'select', 'save')
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build(df):
+    """A router over the raw timetable frame, as build_router makes one from the CSV"""
+    df, _ = normalize_timetable_times(df)
+    return ParetoTrainRouter(df, fare_engine=FlatFare())
+
+
+def run_query(router, source, destination, max_transfers, mode, out_dir):
+    """Seconds per stage and the result payload of one query"""
+    seconds = {}
+    start = time.perf_counter()
+    all_routes = RouteSet(router.generate_all_routes(source, destination, max_transfers, mode),
+                          router.fare_engine)
+    seconds['generate'] = time.perf_counter() - start
+    if not all_routes:
+        return seconds, None
+
+    start = time.perf_counter()
+    pareto_front = router.pareto_optimize(all_routes)
+    seconds['pareto'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    optimal_routes, categories = router.select_optimal_routes(pareto_front)
+    seconds['select'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    save_results(router, optimal_routes, categories, os.path.join(out_dir, 'results.csv'),
+                 os.path.join(out_dir, 'results.json'), all_routes, pareto_front, source, destination)
+    seconds['save'] = time.perf_counter() - start
+    return seconds, build_results(router, optimal_routes, categories, all_routes, pareto_front,
+                                  source, destination)[1]
+
+
+def traced(fn, *args):
+    """fn(*args) and the peak bytes it allocated on top of what was live before"""
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn(*args)
+    return result, tracemalloc.get_traced_memory()[1] - before
+
+
+def query_peaks(router, source, destination, max_transfers, mode, out_dir):
+    """Peak traced bytes per query stage, running the stages as run_query does"""
+    peaks = {}
+    all_routes, peaks['generate'] = traced(
+        lambda: RouteSet(router.generate_all_routes(source, destination, max_transfers, mode),
+                         router.fare_engine))
+    if not all_routes:
+        return peaks
+    pareto_front, peaks['pareto'] = traced(router.pareto_optimize, all_routes)
+    (optimal_routes, categories), peaks['select'] = traced(router.select_optimal_routes, pareto_front)
+    _, peaks['save'] = traced(save_results, router, optimal_routes, categories,
+                              os.path.join(out_dir, 'results.csv'), os.path.join(out_dir, 'results.json'),
+                              all_routes, pareto_front, source, destination)
+    return peaks
+
+
+def digest(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def summarize(samples):
+    """Stage seconds over all queries: total, median and worst query"""
+    return {'total_s': sum(samples), 'median_ms': statistics.median(samples) * 1000,
+            'max_ms': max(samples) * 1000}
+
+
+def benchmark(args, pairs, out_dir):
+    df = synthetic_timetable(args.stations, args.trains, args.stops, args.seed)
+    build_seconds = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        router = build(df)
+        build_seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    _, build_peak = traced(build, df)
+
+    samples = {stage: [] for stage in STAGES[1:]}
+    peaks = {stage: 0 for stage in STAGES[1:]}
+    queries = {}
+    for source, destination in pairs:
+        for mode in args.modes:
+            # Timed runs without tracemalloc, which slows allocation-heavy stages unevenly
+            tracemalloc.stop()
+            runs = [run_query(router, source, destination, args.max_transfers, mode, out_dir)
+                    for _ in range(args.repeat)]
+            tracemalloc.start()
+            best = {stage: min(seconds[stage] for seconds, _ in runs) for stage in runs[0][0]}
+            for stage, seconds in best.items():
+                samples[stage].append(seconds)
+            for stage, peak in query_peaks(router, source, destination, args.max_transfers, mode,
+                                           out_dir).items():
+                peaks[stage] = max(peaks[stage], peak)
+
+            payload = runs[0][1]
+            meta = payload['metadata'] if payload else {}
+            queries[f"{source}-{destination}/{mode}"] = {
+                'routes': meta.get('total_routes_generated', 0),
+                'pareto_front': meta.get('pareto_front_size', 0),
+                'selected': meta.get('optimal_routes_count', 0),
+                'digest': digest(payload) if payload else None,
+                'ms': {stage: seconds * 1000 for stage, seconds in best.items()}
+            }
+    tracemalloc.stop()
+
+    stages = {'build': {'total_s': min(build_seconds), 'median_ms': min(build_seconds) * 1000,
+                        'max_ms': min(build_seconds) * 1000, 'peak_bytes': build_peak}}
+    for stage in STAGES[1:]:
+        if samples[stage]:
+            stages[stage] = {**summarize(samples[stage]), 'peak_bytes': peaks[stage]}
+    return {
+        'commit': git_commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'timetable': {'stations': args.stations, 'trains': args.trains, 'stops': args.stops,
+                      'seed': args.seed, 'rows': len(df), 'graph_stations': len(router.station_to_id)},
+        'max_transfers': args.max_transfers,
+        'repeat': args.repeat,
+        'stages': stages,
+        'queries': queries
+    }
+
+
+def check_golden(result, golden):
+    """Names of the queries whose results differ from the golden digests"""
+    if golden.get('timetable') != {key: result['timetable'][key] for key in GOLDEN_TIMETABLE} or \
+            golden.get('max_transfers') != result['max_transfers']:
+        return None
+    return [name for name, query in result['queries'].items()
+            if name in golden['queries'] and golden['queries'][name] != query['digest']]
+
+
+def stage_totals(result, names):
+    """Seconds per stage: the build, and each query stage summed over the queries `names`"""
+    totals = {'build': result['stages']['build']['total_s']}
+    for name in names:
+        for stage, ms in result['queries'][name]['ms'].items():
+            totals[stage] = totals.get(stage, 0.0) + ms / 1000
+    return totals
+
+
+def compare(result, baseline, threshold):
+    """
+    Print stage timings against the baseline, over the queries both ran;
+    returns the stages slower by more than threshold
+    """
+    if baseline['timetable'] != result['timetable'] or baseline['max_transfers'] != result['max_transfers']:
+        print("⚠ Baseline was run on a different timetable or transfer limit; ratios are not comparable")
+    common = [name for name in result['queries'] if name in baseline['queries']]
+    if len(common) < len(result['queries']):
+        print(f"Comparing the {len(common)} of {len(result['queries'])} queries the baseline also ran")
+    before_totals, current_totals = stage_totals(baseline, common), stage_totals(result, common)
+    print(f"\n{'Stage':<10} {'Baseline s':>11} {'Current s':>10} {'Ratio':>7} {'Peak MiB':>9}")
+    slower = []
+    for stage in STAGES:
+        if stage not in before_totals or stage not in current_totals:
+            continue
+        before, current = before_totals[stage], current_totals[stage]
+        ratio = current / before if before else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            slower.append(stage)
+            flag = '  ✗ slower'
+        elif ratio < 1 - threshold:
+            flag = '  ✓ faster'
+        print(f"{stage:<10} {before:>11.3f} {current:>10.3f} {ratio:>7.2f} "
+              f"{result['stages'][stage]['peak_bytes'] / 2 ** 20:>9.1f}{flag}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stations', type=int, default=GOLDEN_TIMETABLE['stations'])
+    parser.add_argument('--trains', type=int, default=GOLDEN_TIMETABLE['trains'])
+    parser.add_argument('--stops', type=int, default=GOLDEN_TIMETABLE['stops'], help="stops per train")
+    parser.add_argument('--seed', type=int, default=GOLDEN_TIMETABLE['seed'])
+    parser.add_argument('--max-transfers', type=int, default=3)
+    parser.add_argument('--modes', nargs='+', default=['heuristic'], choices=['heuristic', 'directed', 'raptor'])
+    parser.add_argument('--pairs', nargs='+', metavar='SRC-DST', help="queries to run (default: the golden pairs)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', default='bench_pipeline.json', help="where to write the results")
+    parser.add_argument('--baseline', help="results of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="slowdown of a stage's total time counted as a regression")
+    parser.add_argument('--update-golden', action='store_true',
+                        help="record this run's results as the golden ones")
+    args = parser.parse_args()
+
+    pairs = [tuple(pair.split('-', 1)) for pair in args.pairs] if args.pairs else GOLDEN_PAIRS
+    if args.stations < len(HUBS) and not args.pairs:
+        parser.error(f"--stations must be at least {len(HUBS)} to hold the golden pairs")
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        result = benchmark(args, pairs, out_dir)
+
+    with open(args.out, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    print(f"{'Stage':<10} {'Total s':>9} {'Median ms':>10} {'Max ms':>9} {'Peak MiB':>9}")
+    for stage, stats in result['stages'].items():
+        print(f"{stage:<10} {stats['total_s']:>9.3f} {stats['median_ms']:>10.1f} {stats['max_ms']:>9.1f} "
+              f"{stats['peak_bytes'] / 2 ** 20:>9.1f}")
+    print(f"✓ Results for {len(result['queries'])} queries written to {args.out}")
+
+    failed = False
+    golden = None
+    if os.path.exists(GOLDEN_PATH):
+        with open(GOLDEN_PATH) as f:
+            golden = json.load(f)
+
+    if args.update_golden:
+        timetable = {key: result['timetable'][key] for key in GOLDEN_TIMETABLE}
+        # Digests of queries not run this time (e.g. other modes) are kept
+        queries = {}
+        if golden and golden['timetable'] == timetable and golden['max_transfers'] == result['max_transfers']:
+            queries = golden['queries']
+        queries.update({name: query['digest'] for name, query in result['queries'].items()})
+        golden = {'timetable': timetable, 'max_transfers': result['max_transfers'],
+                  'queries': dict(sorted(queries.items()))}
+        with open(GOLDEN_PATH, 'w') as f:
+            json.dump(golden, f, indent=2)
+            f.write('\n')
+        print(f"✓ Golden results updated: {GOLDEN_PATH}")
+    elif golden:
+        mismatched = check_golden(result, golden)
+        if mismatched is None:
+            print("Golden check skipped: not the golden timetable")
+        elif mismatched:
+            failed = True
+            print(f"✗ {len(mismatched)} queries differ from the golden results: {', '.join(mismatched)}")
+        else:
+            print("✓ Golden queries match")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            slower = compare(result, json.load(f), args.threshold)
+        if slower:
+            failed = True
+            print(f"✗ Slower than the baseline: {', '.join(slower)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare the heuristic route generator with the round-based Pareto search
+(mode='raptor') on the city pairs whose results are checked into the repo.
+
+    python benchmarks/bench_raptor.py --csv Train_details.csv --max-transfers 3
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from route_optimizer import build_router
+
+
+def city_pairs():
+    """(source, destination) of every <SRC>_to_<DST>_pareto_routes.csv in the repo root"""
+    pairs = []
+    for path in sorted(glob.glob(os.path.join(ROOT, '*_to_*_pareto_routes.csv'))):
+        source, destination = os.path.basename(path)[:-len('_pareto_routes.csv')].split('_to_')
+        pairs.append((source, destination))
+    return pairs
+
+
+def run(router, source, destination, max_transfers, mode):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        routes = router.generate_all_routes(source, destination, max_transfers, mode=mode)
+        elapsed = time.perf_counter() - start
+        front = router.pareto_optimize(routes) if routes else []
+    objectives = [router.calculate_route_objectives(route) for route in routes]
+    return {
+        'seconds': elapsed,
+        'routes': len(routes),
+        'front': len(front),
+        'cheapest': min((obj['cost'] for obj in objectives), default=None),
+        'fewest_transfers': min((obj['transfers'] for obj in objectives), default=None)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default='Train_details.csv')
+    parser.add_argument('--max-transfers', type=int, default=3)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        router = build_router(args.csv, graph_backend='csr')
+
+    print(f"{'Pair':<12} {'Mode':<10} {'Time':>8} {'Routes':>7} {'Front':>6} {'Cheapest':>9} {'Min xfer':>9}")
+    for source, destination in city_pairs():
+        if source not in router.station_to_id or destination not in router.station_to_id:
+            print(f"{source + '-' + destination:<12} skipped: station not in timetable")
+            continue
+        for mode in ('heuristic', 'raptor'):
+            r = run(router, source, destination, args.max_transfers, mode)
+            cheapest = f"₹{r['cheapest']:.0f}" if r['cheapest'] is not None else '-'
+            fewest = r['fewest_transfers'] if r['fewest_transfers'] is not None else '-'
+            print(f"{source + '-' + destination:<12} {mode:<10} {r['seconds']:7.3f}s {r['routes']:>7} "
+                  f"{r['front']:>6} {cheapest:>9} {fewest:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Connections per arrival at the busiest stations: scanning every departure
+and checking the transfer window (the previous lookup) against the range
+lookup on the departure index, then end-to-end generate_all_routes time.
+
+    python benchmarks/bench_transfer_index.py --csv Train_details.csv --stations 10
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from route_optimizer import build_router
+
+
+def scan_connections(router, station_id, arrival_min, stop_cache):
+    """Postings ranks in the transfer window, by checking every departure"""
+    min_wait, max_wait = router.transfer_window(station_id)
+    trains, positions = router.station_index.postings(station_id)
+    ranks = []
+    for rank, (train, board) in enumerate(zip(trains.tolist(), positions.tolist())):
+        departure = router._train_stop_lists(train, stop_cache)[2][board]
+        if min_wait <= router._wait_minutes(arrival_min, departure) <= max_wait:
+            ranks.append(rank)
+    return ranks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default='Train_details.csv')
+    parser.add_argument('--stations', type=int, default=10, help="busiest stations to probe")
+    parser.add_argument('--arrivals', type=int, default=200, help="arrival minutes probed per station")
+    parser.add_argument('--queries', type=int, default=10)
+    parser.add_argument('--max-transfers', type=int, default=3)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        router = build_router(args.csv, graph_backend='csr')
+    rng = random.Random(0)
+    departures = np.diff(router.departure_index.offsets)
+    busiest = np.argsort(departures)[::-1][:args.stations].tolist()
+    arrivals = [rng.randrange(1440) for _ in range(args.arrivals)]
+
+    print(f"{'station':<8} {'departures':>10} {'in window':>9} {'scan µs':>8} {'index µs':>9}")
+    stop_cache = {}
+    for station_id in busiest:
+        start = time.perf_counter()
+        scanned = [scan_connections(router, station_id, a, stop_cache) for a in arrivals]
+        scan_time = (time.perf_counter() - start) / len(arrivals)
+        start = time.perf_counter()
+        indexed = [router._departures_within(station_id, a).tolist() for a in arrivals]
+        index_time = (time.perf_counter() - start) / len(arrivals)
+        assert scanned == indexed
+        in_window = sum(map(len, indexed)) / len(arrivals)
+        print(f"{router.id_to_station[station_id]:<8} {departures[station_id]:>10} {in_window:>9.0f} "
+              f"{scan_time * 1e6:>8.1f} {index_time * 1e6:>9.1f}")
+
+    stations = sorted(router.station_to_id)
+    pairs = [tuple(rng.sample(stations, 2)) for _ in range(args.queries)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for source, destination in pairs:
+            router.generate_all_routes(source, destination, args.max_transfers)
+        elapsed = time.perf_counter() - start
+    print(f"\ngenerate_all_routes: {elapsed / len(pairs) * 1000:.1f} ms/query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Deterministic synthetic timetables in the Train_details.csv format, so the
+pipeline can be benchmarked offline.
+
+Stations are scattered over a 2000 km square. The first stations take the
+codes of the city pairs checked into the repo and act as hubs: trains start
+and end there far more often than elsewhere. Each train runs between two
+termini and calls at stations near the straight line between them, in
+order, at 40-110 km/h with short dwells, so distances grow along the train
+and some trains run past midnight.
+
+    python benchmarks/synthetic_timetable.py --stations 1000 --trains 3000 --stops 12 --out synthetic.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+HUBS = ('PGT', 'KOTA', 'NDLS', 'HWH', 'LKO', 'PNBE', 'CBE', 'ADI', 'JP', 'MAS', 'SBC', 'UJN')
+AREA_KM = 2000
+# Rail distance over straight-line distance
+DETOUR = 1.2
+# How much more often a hub is a terminus than any other station
+HUB_WEIGHT = 40
+
+
+def _clock(minutes):
+    minutes = int(minutes) % (24 * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}:00"
+
+
+def station_codes(n_stations):
+    hubs = HUBS[:n_stations]
+    return list(hubs) + [f"S{i:04d}" for i in range(len(hubs), n_stations)]
+
+
+def synthetic_timetable(n_stations=1000, n_trains=3000, stops_per_train=12, seed=0):
+    """
+    Timetable frame with the columns of Train_details.csv, the same for the
+    same arguments. Trains get stops_per_train stops where their corridor
+    has that many stations, and never fewer than two.
+    """
+    if n_stations < 2:
+        raise ValueError("A timetable needs at least two stations")
+    rng = np.random.default_rng(seed)
+    codes = station_codes(n_stations)
+    xy = rng.uniform(0, AREA_KM, (n_stations, 2))
+    weights = np.ones(n_stations)
+    weights[:min(len(HUBS), n_stations)] = HUB_WEIGHT
+    weights /= weights.sum()
+
+    rows = []
+    for t in range(n_trains):
+        train_no = str(10000 + t)
+        origin, terminus = rng.choice(n_stations, 2, replace=False, p=weights)
+        line = xy[terminus] - xy[origin]
+        length = np.hypot(*line)
+        # Position along the line (0 at the origin, 1 at the terminus) and distance off it
+        offset = xy - xy[origin]
+        along = offset @ line / length ** 2
+        off = np.abs(line[0] * offset[:, 1] - line[1] * offset[:, 0]) / length
+        inside = np.flatnonzero((along > 0) & (along < 1))
+        inside = inside[(inside != origin) & (inside != terminus)]
+        # The stations nearest the line, then a random subset of twice as many for variety
+        corridor = inside[np.argsort(off[inside], kind='stable')[:2 * max(stops_per_train - 2, 0)]]
+        n_calls = min(max(stops_per_train - 2, 0), len(corridor))
+        calls = rng.choice(corridor, n_calls, replace=False) if n_calls else np.array([], dtype=int)
+        stops = [origin, *calls[np.argsort(along[calls])], terminus]
+
+        clock = int(rng.integers(0, 24 * 60))
+        speed = rng.uniform(40, 110)
+        distance = 0.0
+        for seq, station in enumerate(stops, 1):
+            if seq > 1:
+                leg = DETOUR * np.hypot(*(xy[station] - xy[stops[seq - 2]]))
+                distance += leg
+                clock += max(int(round(leg / speed * 60)), 1)
+            arrival = clock
+            if 1 < seq < len(stops):
+                clock += int(rng.integers(2, 11))
+            rows.append((train_no, f"SYNTHETIC {train_no}", seq, codes[station], f"{codes[station]} JN",
+                         _clock(arrival), _clock(clock), int(round(distance)),
+                         codes[origin], f"{codes[origin]} JN", codes[terminus], f"{codes[terminus]} JN"))
+
+    return pd.DataFrame(rows, columns=['Train No', 'Train Name', 'SEQ', 'Station Code', 'Station Name',
+                                       'Arrival time', 'Departure Time', 'Distance', 'Source Station',
+                                       'Source Station Name', 'Destination Station',
+                                       'Destination Station Name'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stations', type=int, default=1000)
+    parser.add_argument('--trains', type=int, default=3000)
+    parser.add_argument('--stops', type=int, default=12, help="stops per train")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='synthetic_timetable.csv')
+    args = parser.parse_args()
+
+    df = synthetic_timetable(args.stations, args.trains, args.stops, args.seed)
+    df.to_csv(args.out, index=False)
+    print(f"✓ {args.trains} trains over {args.stations} stations ({len(df)} stops) written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
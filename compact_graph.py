@@ -0,0 +1,400 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class EdgeView:
+    """Read-only, dict-like view of one edge of a CompactGraph"""
+    __slots__ = ('_graph', '_i')
+
+    def __init__(self, graph, i):
+        self._graph = graph
+        self._i = i
+
+    def __getitem__(self, key):
+        return self._graph.edge_field(self._i, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return CompactGraph.EDGE_FIELDS
+
+    def to_dict(self):
+        return {key: self[key] for key in CompactGraph.EDGE_FIELDS}
+
+    def __eq__(self, other):
+        if isinstance(other, EdgeView):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __repr__(self):
+        return f"EdgeView({self.to_dict()!r})"
+
+
+class CompactGraph:
+    """
+    CSR (compressed sparse row) adjacency for ParetoTrainRouter.
+
+    Edges leaving station s are rows offsets[s]:offsets[s + 1] of the parallel
+    NumPy columns, kept in the same order as the dict-based graph. Station and
+    train ids and the timetable time strings are interned, so an edge costs a
+    few dozen bytes instead of a 9-key dict. Indexing with a station id gives a
+    list of EdgeView objects, so graph[station_id] works like the dict graph.
+    """
+
+    EDGE_FIELDS = ('to_id', 'train_no', 'departure', 'arrival', 'dep_min', 'arr_min', 'distance',
+                   'duration', 'from_seq', 'to_seq')
+    ARRAY_FIELDS = ('offsets', 'targets', 'train_idx', 'departure_code', 'arrival_code', 'dep_min',
+                    'arr_min', 'distance', 'duration', 'from_seq', 'to_seq')
+
+    def __init__(self, n_stations, from_ids, to_ids, train_idx, train_nos, departure_codes,
+                 arrival_codes, time_labels, dep_min, arr_min, distance, duration, from_seq, to_seq):
+        from_ids = np.asarray(from_ids, dtype=np.int64)
+        order = np.argsort(from_ids, kind='stable')
+
+        self.n_stations = n_stations
+        self.offsets = np.zeros(n_stations + 1, dtype=np.int64)
+        np.cumsum(np.bincount(from_ids, minlength=n_stations), out=self.offsets[1:])
+
+        self.targets = np.asarray(to_ids, dtype=np.int32)[order]
+        self.train_idx = np.asarray(train_idx, dtype=np.int32)[order]
+        self.departure_code = np.asarray(departure_codes, dtype=np.int32)[order]
+        self.arrival_code = np.asarray(arrival_codes, dtype=np.int32)[order]
+        self.dep_min = np.asarray(dep_min, dtype=np.int16)[order]
+        self.arr_min = np.asarray(arr_min, dtype=np.int16)[order]
+        self.distance = np.asarray(distance, dtype=np.float64)[order]
+        self.duration = np.asarray(duration, dtype=np.float64)[order]
+        self.from_seq = np.asarray(from_seq, dtype=np.int32)[order]
+        self.to_seq = np.asarray(to_seq, dtype=np.int32)[order]
+
+        # Interned lookups: train index → train number, time code → label
+        self.train_nos = list(train_nos)
+        self.time_labels = list(time_labels)
+
+    def state(self):
+        """(arrays, metadata) needed to recreate this graph with from_state"""
+        arrays = {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+        return arrays, {'n_stations': self.n_stations, 'train_nos': self.train_nos, 'time_labels': self.time_labels}
+
+    @classmethod
+    def from_state(cls, arrays, meta):
+        """Rebuild a graph around existing (possibly memory-mapped) arrays without copying them"""
+        graph = cls.__new__(cls)
+        for name in cls.ARRAY_FIELDS:
+            setattr(graph, name, arrays[name])
+        graph.n_stations = meta['n_stations']
+        graph.train_nos = list(meta['train_nos'])
+        graph.time_labels = list(meta['time_labels'])
+        return graph
+
+    @classmethod
+    def empty(cls, n_stations):
+        no_edges = np.zeros(0, dtype=np.int64)
+        return cls(n_stations, no_edges, no_edges, no_edges, [], no_edges, no_edges, [],
+                   no_edges, no_edges, no_edges, no_edges, no_edges, no_edges)
+
+    def __len__(self):
+        return self.n_stations
+
+    def __contains__(self, station_id):
+        return 0 <= station_id < self.n_stations
+
+    def __getitem__(self, station_id):
+        if not 0 <= station_id < self.n_stations:
+            return []
+        start, end = self.offsets[station_id], self.offsets[station_id + 1]
+        return [EdgeView(self, i) for i in range(start, end)]
+
+    def get(self, station_id, default=None):
+        return self[station_id] if station_id in self else default
+
+    def keys(self):
+        return range(self.n_stations)
+
+    def values(self):
+        return (self[s] for s in range(self.n_stations))
+
+    def __iter__(self):
+        return iter(range(self.n_stations))
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def _time_label(self, code):
+        return self.time_labels[code] if code >= 0 else float('nan')
+
+    def edge_field(self, i, key):
+        if key == 'to_id':
+            return int(self.targets[i])
+        if key == 'train_no':
+            return self.train_nos[self.train_idx[i]]
+        if key == 'departure':
+            return self._time_label(self.departure_code[i])
+        if key == 'arrival':
+            return self._time_label(self.arrival_code[i])
+        if key == 'dep_min':
+            return int(self.dep_min[i])
+        if key == 'arr_min':
+            return int(self.arr_min[i])
+        if key == 'distance':
+            return float(self.distance[i])
+        if key == 'duration':
+            return float(self.duration[i])
+        if key == 'from_seq':
+            return int(self.from_seq[i])
+        if key == 'to_seq':
+            return int(self.to_seq[i])
+        raise KeyError(key)
+
+    def nbytes(self):
+        """Bytes held by the NumPy columns (interned Python lists excluded)"""
+        return sum(getattr(self, name).nbytes for name in self.ARRAY_FIELDS)
+
+
+class TrainStops:
+    """
+    Columnar stop table: the stops of train t, in running order, are rows
+    train_offsets[t]:train_offsets[t + 1]. Times are kept both as interned
+    label codes (for output) and as minutes since midnight plus the number of
+    midnights crossed since the train's first stop (for arithmetic).
+    """
+
+    ARRAY_FIELDS = ('train_offsets', 'station', 'seq', 'arrival_code', 'departure_code', 'arr_min',
+                    'dep_min', 'arr_day', 'dep_day', 'distance')
+
+    def __init__(self, train_offsets, station, seq, arrival_code, departure_code, time_labels,
+                 arr_min, dep_min, arr_day, dep_day, distance):
+        self.train_offsets = np.asarray(train_offsets, dtype=np.int64)
+        self.station = np.asarray(station, dtype=np.int32)
+        self.seq = np.asarray(seq, dtype=np.int32)
+        self.arrival_code = np.asarray(arrival_code, dtype=np.int32)
+        self.departure_code = np.asarray(departure_code, dtype=np.int32)
+        self.arr_min = np.asarray(arr_min, dtype=np.int16)
+        self.dep_min = np.asarray(dep_min, dtype=np.int16)
+        self.arr_day = np.asarray(arr_day, dtype=np.int16)
+        self.dep_day = np.asarray(dep_day, dtype=np.int16)
+        self.distance = np.asarray(distance, dtype=np.float64)
+        self.time_labels = list(time_labels)
+
+    def state(self):
+        return {name: getattr(self, name) for name in self.ARRAY_FIELDS}, {'time_labels': self.time_labels}
+
+    @classmethod
+    def from_state(cls, arrays, meta):
+        stops = cls.__new__(cls)
+        for name in cls.ARRAY_FIELDS:
+            setattr(stops, name, arrays[name])
+        stops.time_labels = list(meta['time_labels'])
+        return stops
+
+    @classmethod
+    def empty(cls):
+        no_stops = np.zeros(0, dtype=np.int64)
+        return cls([0], *([no_stops] * 4), [], *([no_stops] * 5))
+
+    @property
+    def n_trains(self):
+        return len(self.train_offsets) - 1
+
+    def time_label(self, code):
+        return self.time_labels[code] if code >= 0 else float('nan')
+
+    def row(self, train, pos):
+        """Row of stop `pos` of train index `train`"""
+        return int(self.train_offsets[train]) + pos
+
+    def stop_count(self, train):
+        return int(self.train_offsets[train + 1] - self.train_offsets[train])
+
+    def station_at(self, train, pos):
+        """Station id of stop `pos` of train index `train`"""
+        return int(self.station[self.train_offsets[train] + pos])
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAY_FIELDS)
+
+
+class CompactTrainInfo(Mapping):
+    """
+    Columnar replacement for ParetoTrainRouter.train_info.
+
+    Stops live in a shared TrainStops table; looking up a train number
+    materializes the same {'name', 'source', 'destination', 'stations'}
+    dict the dict-based router keeps, on demand.
+    """
+
+    def __init__(self, train_nos, names, sources, destinations, stops, station_codes):
+        self.train_nos = list(train_nos)
+        self._index = {train_no: i for i, train_no in enumerate(self.train_nos)}
+        self.names = list(names)
+        self.sources = list(sources)
+        self.destinations = list(destinations)
+        self.stops = stops
+        self.station_codes = list(station_codes)
+
+    def state(self):
+        """Metadata needed to recreate this mapping (the arrays belong to `stops`)"""
+        return {}, {
+            'train_nos': self.train_nos,
+            'names': self.names,
+            'sources': self.sources,
+            'destinations': self.destinations,
+            'station_codes': self.station_codes
+        }
+
+    @classmethod
+    def from_state(cls, meta, stops):
+        return cls(meta['train_nos'], meta['names'], meta['sources'], meta['destinations'], stops,
+                   meta['station_codes'])
+
+    def __len__(self):
+        return len(self.train_nos)
+
+    def __iter__(self):
+        return iter(self.train_nos)
+
+    def __contains__(self, train_no):
+        return train_no in self._index
+
+    def __getitem__(self, train_no):
+        t = self._index[train_no]
+        stops = self.stops
+        start, end = stops.train_offsets[t], stops.train_offsets[t + 1]
+        stations = [
+            {
+                'station': self.station_codes[stops.station[i]],
+                'seq': int(stops.seq[i]),
+                'arrival': stops.time_label(stops.arrival_code[i]),
+                'departure': stops.time_label(stops.departure_code[i]),
+                'distance': float(stops.distance[i])
+            }
+            for i in range(start, end)
+        ]
+        return {
+            'name': self.names[t],
+            'source': self.sources[t],
+            'destination': self.destinations[t],
+            'stations': stations
+        }
+
+    def nbytes(self):
+        return self.stops.nbytes()
+
+
+class StationIndex:
+    """
+    Inverted index from station id to the (train index, stop position) pairs
+    that serve it, in CSR layout. Postings of a station are sorted by train
+    index then stop position; stop position is the stop's index within the
+    train's ordered stop list.
+    """
+
+    ARRAY_FIELDS = ('offsets', 'train_idx', 'stop_pos')
+
+    def __init__(self, n_stations, stop_station, train_offsets):
+        """Build from the stop table: stops grouped by train, train t at train_offsets[t]:[t + 1]"""
+        stop_station = np.asarray(stop_station, dtype=np.int64)
+        train_offsets = np.asarray(train_offsets, dtype=np.int64)
+        lengths = np.diff(train_offsets)
+        stop_train = np.repeat(np.arange(len(lengths), dtype=np.int32), lengths)
+        stop_pos = np.arange(len(stop_station)) - np.repeat(train_offsets[:-1], lengths)
+
+        # Stops are already in (train, position) order, so a stable sort by station keeps it
+        order = np.argsort(stop_station, kind='stable')
+        self.n_stations = n_stations
+        self.offsets = np.zeros(n_stations + 1, dtype=np.int64)
+        np.cumsum(np.bincount(stop_station, minlength=n_stations), out=self.offsets[1:])
+        self.train_idx = stop_train[order]
+        self.stop_pos = stop_pos[order].astype(np.int32)
+
+    def state(self):
+        return {name: getattr(self, name) for name in self.ARRAY_FIELDS}, {'n_stations': self.n_stations}
+
+    @classmethod
+    def from_state(cls, arrays, meta):
+        index = cls.__new__(cls)
+        for name in cls.ARRAY_FIELDS:
+            setattr(index, name, arrays[name])
+        index.n_stations = meta['n_stations']
+        return index
+
+    def postings(self, station_id):
+        """(train indices, stop positions) of every stop at `station_id`"""
+        if not 0 <= station_id < self.n_stations:
+            return self.train_idx[:0], self.stop_pos[:0]
+        start, end = self.offsets[station_id], self.offsets[station_id + 1]
+        return self.train_idx[start:end], self.stop_pos[start:end]
+
+    def trains_between(self, from_id, to_id):
+        """
+        (train indices, from positions, to positions) of trains that call at
+        `from_id` and later at `to_id`, using each train's first call at either
+        station, in train index order.
+        """
+        from_trains, from_pos = self.postings(from_id)
+        to_trains, to_pos = self.postings(to_id)
+        common, i, j = np.intersect1d(from_trains, to_trains, return_indices=True)
+        later = to_pos[j] > from_pos[i]
+        return common[later], from_pos[i][later], to_pos[j][later]
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAY_FIELDS)
+
+
+class DepartureIndex:
+    """
+    Departures of every station sorted by clock minute, in CSR layout over
+    the stations of a StationIndex. rank is the departure's position in the
+    station's postings, so a run of departures maps back to (train, stop
+    position). Stops without a known departure time are left out.
+    """
+
+    ARRAY_FIELDS = ('offsets', 'minute', 'rank')
+
+    def __init__(self, station_index, stops):
+        """Build from a StationIndex and the TrainStops its postings point into"""
+        n_stations = station_index.n_stations
+        counts = np.diff(station_index.offsets)
+        station = np.repeat(np.arange(n_stations, dtype=np.int64), counts)
+        rank = np.arange(len(station)) - np.repeat(station_index.offsets[:-1], counts)
+        minute = stops.dep_min[stops.train_offsets[station_index.train_idx] + station_index.stop_pos]
+
+        known = minute >= 0
+        station, rank, minute = station[known], rank[known], minute[known]
+        order = np.lexsort((rank, minute, station))
+        self.n_stations = n_stations
+        self.offsets = np.zeros(n_stations + 1, dtype=np.int64)
+        np.cumsum(np.bincount(station, minlength=n_stations), out=self.offsets[1:])
+        self.minute = minute[order].astype(np.int16)
+        self.rank = rank[order].astype(np.int32)
+
+    def state(self):
+        return {name: getattr(self, name) for name in self.ARRAY_FIELDS}, {'n_stations': self.n_stations}
+
+    @classmethod
+    def from_state(cls, arrays, meta):
+        index = cls.__new__(cls)
+        for name in cls.ARRAY_FIELDS:
+            setattr(index, name, arrays[name])
+        index.n_stations = meta['n_stations']
+        return index
+
+    def departures(self, station_id):
+        """(clock minutes, postings ranks) of the departures at `station_id`, earliest first"""
+        if not 0 <= station_id < self.n_stations:
+            return self.minute[:0], self.rank[:0]
+        start, end = self.offsets[station_id], self.offsets[station_id + 1]
+        return self.minute[start:end], self.rank[start:end]
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAY_FIELDS)
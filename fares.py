@@ -0,0 +1,143 @@
+"""
+Fares for the cost objective.
+
+Every ride is one ticket, priced by its distance. A route's cost is the sum
+of its rides' fares. Engines price one distance with fare() and a whole
+array of ride distances (every segment of every candidate route) with
+fares(); both give the same values.
+
+    FareEngine   distance-slab fare tables per travel class, from price_data.csv
+    FlatFare     a fixed rate per km (₹1/km), used when no fare table is available
+
+price_data.csv is expected to hold one row per slab:
+
+    Class,Distance From,Distance To,Fare
+    SL,1,50,80
+    SL,51,100,110
+    ...
+
+A distance is charged the fare of the last slab starting at or below it;
+distances below the first slab pay its fare and beyond the last slab pay the last.
+"""
+import functools
+import os
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import warning
+
+PRICE_DATA_PATH = 'price_data.csv'
+FARE_COLUMNS = ('Class', 'Distance From', 'Fare')
+# Class priced by default when the table has it
+DEFAULT_CLASS = 'SL'
+
+
+class FareTableError(ValueError):
+    """The fare table is missing, not a CSV, or lacks the fare columns"""
+
+
+class FlatFare:
+    """₹`per_km` for every km, whatever the class"""
+
+    def __init__(self, per_km=1.0):
+        self.per_km = per_km
+        self.classes = ()
+        self.default_class = None
+
+    def fare(self, distance, travel_class=None):
+        return distance * self.per_km
+
+    def fares(self, distances, travel_class=None):
+        return np.asarray(distances, dtype=float) * self.per_km
+
+    def describe(self):
+        return {'engine': 'flat', 'per_km': self.per_km}
+
+
+class FareEngine:
+    """
+    Per-class slab tables as sorted arrays: slab starts (km) and the fare of
+    each slab. A lookup is one binary search; fares() does every distance
+    with one np.searchsorted.
+    """
+
+    def __init__(self, slabs, default_class=None):
+        """slabs: class → (slab start km, fare) pairs, in any order"""
+        if not slabs:
+            raise FareTableError("Fare table has no slabs")
+        self.tables = {}
+        for travel_class, rows in slabs.items():
+            rows = sorted(rows)
+            self.tables[travel_class] = (
+                np.array([start for start, _ in rows], dtype=float),
+                np.array([fare for _, fare in rows], dtype=float)
+            )
+        # Lists for the scalar lookup, which runs inside the search loops
+        self._lists = {c: (starts.tolist(), fares.tolist()) for c, (starts, fares) in self.tables.items()}
+        self.classes = tuple(sorted(self.tables))
+        if default_class is None:
+            default_class = DEFAULT_CLASS if DEFAULT_CLASS in self.tables else self.classes[0]
+        if default_class not in self.tables:
+            raise FareTableError(f"Unknown travel class '{default_class}', expected one of {self.classes}")
+        self.default_class = default_class
+
+    @classmethod
+    def from_csv(cls, path=PRICE_DATA_PATH, default_class=None):
+        try:
+            with open(path, encoding='utf-8') as f:
+                first_line = f.readline()
+        except (OSError, UnicodeDecodeError) as e:
+            raise FareTableError(f"Cannot read fare table '{path}': {e}") from e
+        if first_line.startswith('version https://git-lfs'):
+            raise FareTableError(f"'{path}' is a Git LFS pointer; run `git lfs pull` to fetch the fare table")
+
+        table = pd.read_csv(path)
+        missing = [column for column in FARE_COLUMNS if column not in table.columns]
+        if missing:
+            raise FareTableError(f"Fare table '{path}' lacks columns {missing}")
+        table = table.dropna(subset=list(FARE_COLUMNS))
+        slabs = {}
+        for travel_class, start, fare in zip(table['Class'].astype(str), table['Distance From'], table['Fare']):
+            slabs.setdefault(travel_class, []).append((float(start), float(fare)))
+        return cls(slabs, default_class)
+
+    def _class(self, travel_class):
+        travel_class = travel_class or self.default_class
+        if travel_class not in self.tables:
+            raise ValueError(f"Unknown travel class '{travel_class}', expected one of {self.classes}")
+        return travel_class
+
+    def fare(self, distance, travel_class=None):
+        starts, fares = self._lists[self._class(travel_class)]
+        return fares[max(bisect_right(starts, distance) - 1, 0)]
+
+    def fares(self, distances, travel_class=None):
+        starts, fares = self.tables[self._class(travel_class)]
+        slab = np.searchsorted(starts, np.asarray(distances, dtype=float), side='right') - 1
+        return fares[np.maximum(slab, 0)]
+
+    def describe(self):
+        return {'engine': 'slab', 'classes': list(self.classes), 'default_class': self.default_class}
+
+
+@functools.lru_cache(maxsize=None)
+def _load_fare_engine(path, mtime):
+    try:
+        return FareEngine.from_csv(path)
+    except FareTableError as e:
+        warning(f"⚠ {e}; costs use ₹1/km")
+        return FlatFare()
+
+
+def load_fare_engine(path=PRICE_DATA_PATH):
+    """
+    The FareEngine for the table at `path`, or FlatFare(₹1/km) if it is
+    missing or unusable. Loaded once per file version and shared by routers.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return FlatFare()
+    return _load_fare_engine(os.path.abspath(path), mtime)
@@ -0,0 +1,203 @@
+"""
+Stage timings, counters and progress messages for the routing pipeline,
+delivered to registered hooks instead of printed.
+
+A hook is any callable taking one event dict:
+
+    {'type': 'progress', 'message': '→ Finding direct routes...'}
+    {'type': 'warning', 'message': '⚠ Cannot read running days ...'}
+    {'type': 'query' | 'build', 'seconds': wall time, 'stages': {stage: seconds},
+     'counters': {name: value}, ...details such as source and destination}
+
+Query and build events are emitted once, when the outermost trace() of the
+current thread closes; nested traces (generate_all_routes inside
+get_routes_data) add to it. Stages and counters outside a trace are dropped.
+While no hook is registered nothing is recorded: trace() and stage() hand
+back a shared no-op context and count() returns after one attribute read.
+Warnings are the exception; without hooks they go to the logging module.
+
+    metrics = Metrics()
+    add_hook(metrics)          # aggregate, e.g. for /api/metrics
+    add_hook(print_progress)   # the CLI's progress lines
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+_hooks = []
+_local = threading.local()
+_logger = logging.getLogger('route_optimizer')
+_NO_OP = nullcontext()
+
+
+def add_hook(hook):
+    if hook not in _hooks:
+        _hooks.append(hook)
+
+
+def remove_hook(hook):
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def enabled():
+    return bool(_hooks)
+
+
+def _emit(event):
+    for hook in list(_hooks):
+        hook(event)
+
+
+class _Trace:
+    def __init__(self, kind, details):
+        self.kind = kind
+        self.details = details
+        self.stages = {}
+        self.counters = {}
+        self.depth = 0
+        self.started = time.perf_counter()
+
+    def __enter__(self):
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self.depth -= 1
+        if self.depth == 0:
+            _local.trace = None
+            _emit({'type': self.kind, 'seconds': time.perf_counter() - self.started,
+                   'stages': self.stages, 'counters': self.counters, **self.details})
+
+
+class _Stage:
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        stages = self.trace.stages
+        stages[self.name] = stages.get(self.name, 0.0) + time.perf_counter() - self.started
+
+
+def trace(kind='query', **details):
+    """Context collecting one query's (or build's) stages and counters; joins the active one"""
+    if not _hooks:
+        return _NO_OP
+    active = getattr(_local, 'trace', None)
+    if active is None:
+        active = _local.trace = _Trace(kind, details)
+    else:
+        for key, value in details.items():
+            active.details.setdefault(key, value)
+    return active
+
+
+def stage(name):
+    """Context timing stage `name` of the active trace (times add up if it runs twice)"""
+    active = getattr(_local, 'trace', None)
+    if active is None:
+        return _NO_OP
+    return _Stage(active, name)
+
+
+def count(name, value=1):
+    """Add `value` to counter `name` of the active trace"""
+    active = getattr(_local, 'trace', None)
+    if active is not None:
+        active.counters[name] = active.counters.get(name, 0) + value
+
+
+def peak(name, value):
+    """Keep the largest `value` seen for counter `name` of the active trace"""
+    active = getattr(_local, 'trace', None)
+    if active is not None and value > active.counters.get(name, value - 1):
+        active.counters[name] = value
+
+
+def tracing():
+    """True inside an active trace; lets hot loops skip collecting counters otherwise"""
+    return getattr(_local, 'trace', None) is not None
+
+
+def progress(message):
+    """A progress line for hooks such as print_progress"""
+    if _hooks:
+        _emit({'type': 'progress', 'message': message})
+
+
+def warning(message):
+    """A warning for hooks, or for the 'route_optimizer' logger if there are none"""
+    if _hooks:
+        _emit({'type': 'warning', 'message': message})
+    else:
+        _logger.warning(message)
+
+
+def print_progress(event):
+    """Hook printing progress lines and warnings, as the pipeline used to"""
+    if event['type'] in ('progress', 'warning'):
+        print(event['message'])
+
+
+class Metrics:
+    """
+    Hook aggregating trace events: per kind the count and wall time, per
+    stage the count, total and max seconds, counter totals (maxima for
+    *_peak counters) and the most recent events and warnings.
+    """
+
+    def __init__(self, recent=50):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=recent)
+        self._warnings = deque(maxlen=recent)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.kinds = {}
+            self.stages = {}
+            self.counters = {}
+            self._recent.clear()
+            self._warnings.clear()
+
+    def __call__(self, event):
+        kind = event['type']
+        if kind == 'progress':
+            return
+        if kind == 'warning':
+            with self._lock:
+                self._warnings.append(event['message'])
+            return
+        with self._lock:
+            totals = self.kinds.setdefault(kind, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            totals['count'] += 1
+            totals['seconds'] += event['seconds']
+            totals['max_seconds'] = max(totals['max_seconds'], event['seconds'])
+            for name, seconds in event['stages'].items():
+                stage_totals = self.stages.setdefault(name, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+                stage_totals['count'] += 1
+                stage_totals['seconds'] += seconds
+                stage_totals['max_seconds'] = max(stage_totals['max_seconds'], seconds)
+            for name, value in event['counters'].items():
+                if name.endswith('_peak'):
+                    self.counters[name] = max(self.counters.get(name, value), value)
+                else:
+                    self.counters[name] = self.counters.get(name, 0) + value
+            self._recent.append(event)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'traces': {kind: dict(totals) for kind, totals in self.kinds.items()},
+                'stages': {name: dict(totals) for name, totals in self.stages.items()},
+                'counters': dict(self.counters),
+                'recent': list(self._recent),
+                'warnings': list(self._warnings)
+            }
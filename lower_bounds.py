@@ -0,0 +1,68 @@
+"""
+Goal-directed lower bounds for the multi-transfer BFS (mode='directed').
+
+A backward search from the destination over the stop table gives, for every
+station and number of rides still allowed, a lower bound on the kilometres
+a journey from that station covers before it boards its last train. The
+ride into the destination does not count: the BFS distance budget only
+limits the states it expands. A ride to a station whose distance so far plus
+its bound exceeds the budget (or whose bound is infinite) can never reach
+the destination, so the BFS does not queue it.
+
+The bounds relax the timetable (transfer windows and train repeats are
+ignored), so they never cut a branch that could still reach the destination.
+"""
+import numpy as np
+
+
+class RideDistanceBounds:
+    """
+    The stop table laid out as a trains × stops matrix, so one backward step
+    (the best later stop of the same train, for every stop) is a reversed
+    minimum.accumulate. Build once per router; bounds() runs per destination.
+    """
+
+    def __init__(self, stops, n_stations):
+        offsets = stops.train_offsets
+        lengths = np.diff(offsets)
+        self.n_stations = n_stations
+        self.rows = np.repeat(np.arange(len(lengths)), lengths)
+        self.cols = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+        # One spare column of inf, read as "no later stop" by the last stop of each train
+        self.shape = (len(lengths), int(lengths.max(initial=0)) + 1)
+        self.station = stops.station.astype(np.int64)
+        self.distance = stops.distance
+
+    def _step(self, target):
+        """
+        Per station: min over rides out of it (board at a stop, alight at a
+        later stop of the same train) of ride km + target[alighting station]
+        """
+        later = np.full(self.shape, np.inf)
+        later[self.rows, self.cols] = self.distance + target[self.station]
+        later = np.minimum.accumulate(later[:, ::-1], axis=1)[:, ::-1]
+        best = later[self.rows, self.cols + 1] - self.distance
+        bound = np.full(self.n_stations, np.inf)
+        np.minimum.at(bound, self.station, best)
+        return bound
+
+    def bounds(self, dest_id, max_rides):
+        """
+        (max_rides + 1) × stations array; row r bounds the km from a station
+        to where it boards its last train with at most r rides left, inf
+        where the destination is out of reach. Row 0 is all inf.
+        """
+        bounds = np.full((max_rides + 1, self.n_stations), np.inf)
+        if max_rides < 1 or not 0 <= dest_id < self.n_stations:
+            return bounds
+
+        target = np.full(self.n_stations, np.inf)
+        target[dest_id] = 0
+        # One ride left: the station has to be on a train to the destination
+        bounds[1] = np.where(np.isfinite(self._step(target)), 0, np.inf)
+        for rides in range(2, max_rides + 1):
+            # Reaching the destination ends the journey, so it is never an intermediate stop
+            target = bounds[rides - 1].copy()
+            target[dest_id] = np.inf
+            bounds[rides] = np.minimum(bounds[rides - 1], self._step(target))
+        return bounds
@@ -0,0 +1,139 @@
+"""
+Opt-in multi-process route generation for ParetoTrainRouter.generate_all_routes.
+
+The worker pool is forked once the router is built, so every worker reads
+the same immutable graph pages. Per query, direct routes, single-transfer
+routes (split into slices of first trains out of the source) and each BFS
+level of the multi-transfer search are spread over the workers. Slices are
+concatenated in order and BFS levels merged in queue order, so the routes
+are the same as in serial mode.
+
+    with ParallelExecutor(router, workers=16) as executor:
+        routes = router.generate_all_routes('PGT', 'KOTA', 3, executor=executor)
+"""
+import functools
+import multiprocessing
+import os
+
+# Router the forked workers inherit; set while an executor's pool is alive
+_router = None
+# Per-worker cache of train stop lists; the router never changes, so it is kept across queries
+_stop_cache = {}
+
+
+def _direct_routes(source_id, dest_id, journey_date):
+    return _router._find_direct_routes(source_id, dest_id, journey_date)
+
+
+def _single_transfer_slice(source_id, dest_id, first_trains, first_positions, max_routes, journey_date):
+    return _router._single_transfer_routes_from(source_id, dest_id, first_trains, first_positions, max_routes,
+                                                journey_date)
+
+
+@functools.lru_cache(maxsize=16)
+def _goal_bounds(dest_id, max_transfers):
+    """Goal bounds of a query, computed once per worker instead of sent with every chunk"""
+    return _router.goal_bounds(dest_id, max_transfers)
+
+
+def _expand_slice(dest_id, max_transfers, states, max_distance, directed, journey_date):
+    bounds = _goal_bounds(dest_id, max_transfers) if directed else None
+    return _router._expand_ride_states(dest_id, max_transfers, states, (), _stop_cache, max_distance, bounds,
+                                       journey_date)
+
+
+class _SingleTransferJob:
+    """Concatenates single-transfer slices in order and applies the route cap"""
+
+    def __init__(self, jobs, max_routes):
+        self.jobs = jobs
+        self.max_routes = max_routes
+
+    def get(self):
+        routes = []
+        for job in self.jobs:
+            routes.extend(job.get())
+            if len(routes) >= self.max_routes:
+                break
+        return routes[:self.max_routes]
+
+
+class ParallelExecutor:
+    """
+    A fork-based worker pool bound to one router. Requires the 'fork' start
+    method (Linux/macOS); use as a context manager or call close().
+    """
+
+    def __init__(self, router, workers=None, min_chunk=32):
+        global _router
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("ParallelExecutor needs the 'fork' start method")
+        self.router = router
+        self.workers = workers or os.cpu_count() or 1
+        # Levels smaller than this are expanded in the calling process
+        self.min_chunk = min_chunk
+        _router = router
+        self._pool = multiprocessing.get_context('fork').Pool(self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        global _router
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            _router = None
+
+    def find_direct_routes(self, source_id, dest_id, journey_date=None):
+        return self._pool.apply_async(_direct_routes, (source_id, dest_id, journey_date))
+
+    def find_single_transfer_routes(self, source_id, dest_id, max_routes=100, journey_date=None):
+        trains, positions = self.router.station_index.postings(source_id)
+        trains, positions = trains.tolist(), positions.tolist()
+        jobs = []
+        for start, end in self._slices(trains):
+            jobs.append(self._pool.apply_async(
+                _single_transfer_slice,
+                (source_id, dest_id, trains[start:end], positions[start:end], max_routes, journey_date)
+            ))
+        return _SingleTransferJob(jobs, max_routes)
+
+    def expand_ride_states(self, dest_id, max_transfers, states, queued=(), max_distance=None, bounds=None,
+                           journey_date=None):
+        """
+        _expand_ride_states over the pool. `bounds` must be those of
+        router.goal_bounds(dest_id, max_transfers), as generate_all_routes
+        passes them; workers compute and cache them per destination, so a
+        chunk only carries its states.
+
+        `queued` is not sent either: the states of a BFS level all have the
+        same number of transfers and their rides one more, which no entry
+        queued by earlier levels has, so workers could not drop anything
+        with it. The merge still skips queued rides.
+        """
+        if len(states) < self.min_chunk:
+            return self.router._expand_ride_states(dest_id, max_transfers, states, queued, None, max_distance,
+                                                   bounds, journey_date)
+        size = max(self.min_chunk, -(-len(states) // self.workers))
+        chunks = [(dest_id, max_transfers, states[i:i + size], max_distance, bounds is not None, journey_date)
+                  for i in range(0, len(states), size)]
+        expansions = []
+        for part in self._pool.starmap(_expand_slice, chunks):
+            expansions.extend(part)
+        return expansions
+
+    def _slices(self, trains):
+        """(start, end) ranges over a postings list, about one per worker, never splitting a train"""
+        size = max(1, -(-len(trains) // self.workers))
+        start = 0
+        while start < len(trains):
+            end = min(start + size, len(trains))
+            while end < len(trains) and trains[end] == trains[end - 1]:
+                end += 1
+            yield start, end
+            start = end
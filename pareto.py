@@ -0,0 +1,107 @@
+"""
+Vectorized Pareto filtering over route objective dicts.
+
+Routes become a (routes × objectives) matrix in minimization form: maximized
+objectives are negated. Route A dominates route B when A is no worse in every
+column and strictly better in one, which is the definition
+ParetoTrainRouter._dominates applies pair by pair.
+
+After a lexicographic sort, a route can only be dominated by routes that
+come before it. The sorted routes are therefore checked in blocks against
+the front found so far and against their own block. Each block is one NumPy
+broadcast instead of a Python loop over pairs.
+"""
+import numpy as np
+
+# (objective, +1 minimize / -1 maximize)
+OBJECTIVES = (
+    ('time', 1),
+    ('cost', 1),
+    ('transfers', 1),
+    ('seat_prob', -1),
+    ('safety_score', -1)
+)
+
+BLOCK_SIZE = 256
+
+
+def objective_matrix(objectives):
+    """(n × 5) float matrix in minimization form from calculate_route_objectives dicts"""
+    matrix = np.array([[obj[name] for name, _ in OBJECTIVES] for obj in objectives], dtype=float)
+    if not len(matrix):
+        return matrix.reshape(0, len(OBJECTIVES))
+    return matrix * np.array([sense for _, sense in OBJECTIVES], dtype=float)
+
+
+def _dominated_by(points, candidates):
+    """For each row of `points`, whether any row of `candidates` dominates it"""
+    if not len(candidates):
+        return np.zeros(len(points), dtype=bool)
+    no_worse = (candidates[None, :, :] <= points[:, None, :]).all(axis=2)
+    better = (candidates[None, :, :] < points[:, None, :]).any(axis=2)
+    return (no_worse & better).any(axis=1)
+
+
+def non_dominated_mask(matrix):
+    """Boolean mask of the rows of `matrix` (minimization form) no other row dominates"""
+    matrix = np.asarray(matrix, dtype=float)
+    n = len(matrix)
+    keep = np.zeros(n, dtype=bool)
+    if not n:
+        return keep
+
+    # Lexicographic order: a dominating row always sorts before the row it dominates
+    order = np.lexsort(matrix.T[::-1])
+    ordered = matrix[order]
+    front = ordered[:0]
+
+    for start in range(0, n, BLOCK_SIZE):
+        rows = order[start:start + BLOCK_SIZE]
+        block = ordered[start:start + BLOCK_SIZE]
+        # Checking against the front is enough: whatever dominates a row is
+        # either on the front or dominated by something that is
+        survivors = ~_dominated_by(block, front)
+        rows, block = rows[survivors], block[survivors]
+        survivors = ~_dominated_by(block, block)
+        keep[rows[survivors]] = True
+        front = np.concatenate([front, block[survivors]])
+
+    return keep
+
+
+def non_dominated_ranks(matrix):
+    """
+    Rank of every row in a full non-dominated sort: 0 for the Pareto front,
+    1 for the front of what remains once it is removed, and so on.
+
+    Rows are placed in lexicographic order, so all their dominators are
+    already ranked. If some row of front k dominates a row, so does some row
+    of every earlier front, which lets each row binary-search its front.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    n = len(matrix)
+    ranks = np.zeros(n, dtype=np.int64)
+    # Each front's rows live in a buffer that doubles when full
+    fronts, sizes = [], []
+
+    for row in np.lexsort(matrix.T[::-1]).tolist():
+        point = matrix[row]
+        lo, hi = 0, len(fronts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            front = fronts[mid][:sizes[mid]]
+            no_worse = (front <= point).all(axis=1)
+            if no_worse.any() and (no_worse & (front < point).any(axis=1)).any():
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(fronts):
+            fronts.append(np.empty((4, matrix.shape[1])))
+            sizes.append(0)
+        if sizes[lo] == len(fronts[lo]):
+            fronts[lo] = np.concatenate([fronts[lo], np.empty_like(fronts[lo])])
+        fronts[lo][sizes[lo]] = point
+        sizes[lo] += 1
+        ranks[row] = lo
+
+    return ranks
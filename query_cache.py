@@ -0,0 +1,169 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+    """
+    Thread-safe LRU + TTL cache of final route query payloads.
+
+    Entries belong to a timetable version. The first lookup or store under a
+    new version drops every in-memory entry of the old one, so a reloaded
+    timetable never serves stale routes. The last `max_retired` versions
+    replaced are retired: a request still running on an older router reads
+    and writes only the store under its own version and never switches back.
+
+    An optional second-tier `store` (see SQLiteCacheStore) is read on memory
+    misses and written on every put, so results survive restarts and are
+    shared by workers on the same host. Its rows are keyed by version and
+    left alone on a switch, since other workers may still be on another
+    version; the store expires them by age.
+    """
+
+    def __init__(self, max_entries=512, ttl=3600, store=None, max_retired=16):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self.max_retired = max_retired
+        self.version = None
+        # Retired versions, oldest first; every update or reload adds one, so only the last few are kept
+        self._retired = OrderedDict()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, version=None):
+        """Cached payload for `key` under timetable `version`, or None"""
+        now = time.time()
+        with self._lock:
+            self._switch_version(version)
+            # Memory only holds the current version
+            entry = self._entries.get(key) if version == self.version else None
+            if entry is not None:
+                stored_at, payload = entry
+                if self.ttl is None or now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._entries[key]
+                self.expirations += 1
+
+        payload = self.store.get(version, key, self.ttl) if self.store is not None else None
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.store_hits += 1
+            if version == self.version:
+                self._insert(key, payload, now)
+        return payload
+
+    def put(self, key, payload, version=None):
+        with self._lock:
+            self._switch_version(version)
+            if version == self.version:
+                self._insert(key, payload, time.time())
+        if self.store is not None:
+            self.store.put(version, key, payload)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.store_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'version': self.version,
+                'hits': self.hits,
+                'store_hits': self.store_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.store_hits) / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'store': self.store.path if self.store is not None else None
+            }
+
+    def _switch_version(self, version):
+        # Caller holds the lock; retired versions never become current again
+        if version != self.version and version not in self._retired:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self._retired[self.version] = None
+            while len(self._retired) > self.max_retired:
+                self._retired.popitem(last=False)
+            self.version = version
+
+    def _insert(self, key, payload, stored_at):
+        # Caller holds the lock
+        self._entries[key] = (stored_at, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class SQLiteCacheStore:
+    """
+    Second cache tier in a local SQLite file. Payloads are stored as JSON,
+    keyed by timetable version and query key; SQLite's own locking lets
+    several worker processes share one file.
+
+    Rows of every version are kept, whatever version a worker is on. Rows
+    older than `max_age` seconds (None keeps them) are deleted by put, at
+    most once every `prune_interval` seconds per process.
+    """
+
+    def __init__(self, path, max_age=24 * 3600, prune_interval=60):
+        self.path = path
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+        self._pruned_at = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS route_cache ("
+                " version TEXT, key TEXT, payload TEXT, stored_at REAL,"
+                " PRIMARY KEY (version, key))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS route_cache_age ON route_cache (stored_at)")
+
+    def get(self, version, key, ttl=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, stored_at FROM route_cache WHERE version = ? AND key = ?",
+                (str(version), json.dumps(key))
+            ).fetchone()
+        if row is None or (ttl is not None and time.time() - row[1] > ttl):
+            return None
+        return json.loads(row[0])
+
+    def put(self, version, key, payload):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO route_cache VALUES (?, ?, ?, ?)",
+                (str(version), json.dumps(key), json.dumps(payload), now)
+            )
+            if self.max_age is not None and now - self._pruned_at >= self.prune_interval:
+                self._pruned_at = now
+                self._conn.execute("DELETE FROM route_cache WHERE stored_at < ?", (now - self.max_age,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM route_cache")
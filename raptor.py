@@ -0,0 +1,250 @@
+"""
+Round-based multi-criteria journey search (McRAPTOR-style) over the stop
+table of a ParetoTrainRouter.
+
+Round k finds every non-dominated journey that uses exactly k train rides.
+Each round scans every train touched by a station improved in the previous
+round once, from its earliest such stop. It alights the labels it carries
+at every later stop and boards the labels waiting at marked stops.
+
+A label is (journey minutes, cost, rides) plus the clock time it arrives.
+In an undated search trains run every day and a transfer has to fit the
+station's window, so what a label can still reach depends only on that
+clock time. An earlier arrival is not always better, because it can miss
+a window that a later one makes. Labels therefore only dominate each other when they arrive at
+the same clock time. That keeps the result exact; target pruning against
+the destination's labels keeps it tractable.
+
+A dated search (with a journey date) only boards trains running on the day
+they are boarded, see running_days.py. Labels then carry minutes since the
+journey date's midnight instead of a clock time. Which trains a label can
+board depends on that day too, so labels only dominate each other at the
+same absolute minute. A train boarded on different days is a different run.
+Its riders are kept apart on the route bag.
+"""
+from collections import defaultdict
+
+
+class McRaptor:
+    """
+    One search from a source station. Journey minutes are measured from the
+    departure of the first train, cost is the sum of the rides' fares from the
+    router's fare engine (as in calculate_route_objectives) and each round is
+    one more ride.
+    """
+
+    def __init__(self, router, max_transfers=3, min_transfer_minutes=30, max_transfer_minutes=480,
+                 minutes_per_day=1440, transfer_windows=None, journey_date=None):
+        """
+        transfer_windows: station id → (min, max) transfer minutes overriding the defaults there;
+        journey_date: datetime.date the first train leaves on, or None for an undated search
+        """
+        self.router = router
+        self.max_rounds = max_transfers + 1
+        self.min_transfer = min_transfer_minutes
+        self.max_transfer = max_transfer_minutes
+        self.minutes_per_day = minutes_per_day
+        self.transfer_windows = transfer_windows or {}
+        self.fare = router.fare_engine.fare
+        self.journey_date = journey_date
+        self.weekday = journey_date.weekday() if journey_date is not None else None
+        self._trains = {}
+
+    def _train(self, train):
+        """Per-train lists: station ids, absolute arrival/departure minutes, clock minutes, distances"""
+        cached = self._trains.get(train)
+        if cached is None:
+            stops = self.router.stops
+            start, end = stops.train_offsets[train], stops.train_offsets[train + 1]
+            arr_clock = stops.arr_min[start:end].tolist()
+            dep_clock = stops.dep_min[start:end].tolist()
+            arr_day = stops.arr_day[start:end].tolist()
+            dep_day = stops.dep_day[start:end].tolist()
+            day = self.minutes_per_day
+            cached = self._trains[train] = (
+                stops.station[start:end].tolist(),
+                [d * day + m if m >= 0 else None for d, m in zip(arr_day, arr_clock)],
+                [d * day + m if m >= 0 else None for d, m in zip(dep_day, dep_clock)],
+                arr_clock,
+                dep_clock,
+                stops.distance[start:end].tolist()
+            )
+        return cached
+
+    def run(self, source_id, target_id=None):
+        """
+        Search from `source_id`. With a `target_id`, labels that can no longer
+        beat a journey already found to the target are pruned.
+        """
+        self.source_id = source_id
+        self.target_id = target_id
+
+        # Label columns; label 0 is the source, which can board any train with no wait
+        self.station = [source_id]
+        self.rides = [0]
+        self.minutes = [0]
+        self.cost = [0.0]
+        self.clock = [None]
+        self.parent = [-1]
+        self.train = [-1]
+        self.board = [-1]
+        self.alight = [-1]
+        self.wait = [0]
+        # Days after the journey date each label's train left its first station (0 when undated)
+        self.origin_day = [0]
+        self.dead = set()
+
+        # station → arrival clock (journey minute when dated) → ids of the labels that are not dominated
+        self.bags = defaultdict(dict)
+        self.target_labels = []
+
+        marked = {source_id: [0]}
+        for k in range(1, self.max_rounds + 1):
+            marked = self._round(k, marked)
+            if not marked:
+                break
+        return self
+
+    def _round(self, k, marked):
+        # Scan each train once, from its earliest stop at a marked station
+        first_stop = {}
+        index = self.router.station_index
+        for station_id in marked:
+            trains, positions = index.postings(station_id)
+            for train, pos in zip(trains.tolist(), positions.tolist()):
+                if pos < first_stop.get(train, pos + 1):
+                    first_stop[train] = pos
+
+        improved = defaultdict(list)
+        default_window = (self.min_transfer, self.max_transfer)
+        day = self.minutes_per_day
+        weekday = self.weekday
+        run_mask = self.router.run_masks
+        for train, first in first_stop.items():
+            stations, arr_abs, dep_abs, _, dep_clock, dist = self._train(train)
+            route_bag = []
+
+            for j in range(first, len(stations)):
+                station_id = stations[j]
+
+                # Alight every label riding this train here
+                if route_bag and arr_abs[j] is not None and station_id != self.source_id:
+                    for label, i, minutes, cost, wait, origin in route_bag:
+                        new_label = self._add_label(
+                            station_id, k, minutes + arr_abs[j] - dep_abs[i], cost + self.fare(abs(dist[j] - dist[i])),
+                            label, train, i, j, wait, origin
+                        )
+                        if new_label is not None:
+                            improved[station_id].append(new_label)
+
+                # Board the labels that reached this station in the previous round
+                if station_id in marked and dep_abs[j] is not None:
+                    for label in marked[station_id]:
+                        if label in self.dead or self.train[label] == train:
+                            continue
+                        if label == 0:
+                            wait = 0
+                        else:
+                            wait = (dep_clock[j] - self.clock[label]) % day
+                            min_transfer, max_transfer = self.transfer_windows.get(station_id, default_window)
+                            if not min_transfer <= wait <= max_transfer:
+                                continue
+                        if weekday is None:
+                            origin = 0
+                        else:
+                            # The source boards on the journey date, later labels after their wait
+                            board_day = (self.clock[label] + wait) // day if label else 0
+                            origin = board_day - dep_abs[j] // day
+                            if not (run_mask[train] >> (weekday + origin) % 7) & 1:
+                                continue
+                        self._board(route_bag, label, j, self.minutes[label] + wait, self.cost[label], wait, origin)
+
+        return {station_id: labels for station_id, labels in improved.items()
+                if any(label not in self.dead for label in labels)}
+
+    def _board(self, route_bag, label, pos, minutes, cost, wait, origin=0):
+        # Labels boarding the same run at the same stop ride identically from
+        # here on, so only their (minutes, cost) at boarding matter
+        for entry in route_bag:
+            if entry[1] == pos and entry[5] == origin and entry[2] <= minutes and entry[3] <= cost:
+                return
+        route_bag[:] = [entry for entry in route_bag
+                        if not (entry[1] == pos and entry[5] == origin and entry[2] >= minutes and entry[3] >= cost)]
+        route_bag.append((label, pos, minutes, cost, wait, origin))
+
+    def _add_label(self, station_id, k, minutes, cost, parent, train, board, alight, wait, origin=0):
+        """Insert a label at `station_id` unless it is dominated; returns its id or None"""
+        # Anything no better than a journey already at the target cannot become one
+        for label in self.target_labels:
+            if self.minutes[label] <= minutes and self.cost[label] <= cost:
+                return None
+
+        if self.weekday is None:
+            clock = self._train(train)[3][alight]
+        else:
+            clock = origin * self.minutes_per_day + self._train(train)[1][alight]
+        at_target = station_id == self.target_id
+        bag = self.bags[station_id].setdefault(clock, [])
+        # Earlier rounds never have more rides, so any kept label with no more
+        # minutes and cost dominates; only labels from this round can be beaten
+        for label in bag:
+            if self.minutes[label] <= minutes and self.cost[label] <= cost:
+                return None
+        kept = []
+        for label in bag:
+            if self.rides[label] == k and self.minutes[label] >= minutes and self.cost[label] >= cost:
+                self.dead.add(label)
+            else:
+                kept.append(label)
+
+        new_label = len(self.station)
+        kept.append(new_label)
+        self.bags[station_id][clock] = kept
+        self.station.append(station_id)
+        self.rides.append(k)
+        self.minutes.append(minutes)
+        self.cost.append(cost)
+        self.clock.append(clock)
+        self.parent.append(parent)
+        self.train.append(train)
+        self.board.append(board)
+        self.alight.append(alight)
+        self.wait.append(wait)
+        self.origin_day.append(origin)
+
+        if at_target:
+            self.target_labels = [label for label in self.target_labels if label not in self.dead]
+            self.target_labels.append(new_label)
+        return new_label
+
+    def labels_at(self, station_id):
+        """
+        Labels at `station_id` that are Pareto-optimal on (minutes, cost, rides)
+        regardless of arrival clock, ordered by rides, minutes and cost
+        """
+        labels = [label for bag in self.bags.get(station_id, {}).values() for label in bag]
+        labels.sort(key=lambda label: (self.rides[label], self.minutes[label], self.cost[label]))
+        front = []
+        for label in labels:
+            # Sorted by rides, so only an earlier label can dominate
+            if not any(self.minutes[other] <= self.minutes[label] and self.cost[other] <= self.cost[label]
+                       for other in front):
+                front.append(label)
+        return front
+
+    def rides_of(self, label):
+        """
+        (train, board position, alight position, wait minutes, boarding day)
+        of every ride leading to `label`; the day counts from the journey date
+        """
+        rides = []
+        day = self.minutes_per_day
+        while label > 0:
+            train, board = self.train[label], self.board[label]
+            boarding_day = 0
+            if self.weekday is not None:
+                boarding_day = self.origin_day[label] + self._train(train)[2][board] // day
+            rides.append((train, board, self.alight[label], self.wait[label], boarding_day))
+            label = self.parent[label]
+        rides.reverse()
+        return rides
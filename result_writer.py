@@ -0,0 +1,92 @@
+import os
+import queue
+import tempfile
+import threading
+
+
+def atomic_write(path, write, **open_kwargs):
+    """
+    Call write(file) on a temporary file next to `path`, then rename it over
+    `path`. Readers and concurrent writers of the same path only ever see a
+    complete file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', **open_kwargs) as f:
+            write(f)
+        # mkstemp files are private; keep the mode a plain open() would give
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ResultWriter:
+    """
+    One background thread draining a bounded queue of export jobs.
+
+    submit() never blocks: when the queue is full the job is dropped and
+    counted, so a slow disk cannot hold up the requests that produce exports.
+    """
+
+    def __init__(self, max_pending=32):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_error = None
+
+    def submit(self, job, *args):
+        """Queue job(*args); returns False if the queue was full and the job was dropped"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((job, args))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def flush(self):
+        """Wait until every queued job has run"""
+        self._queue.join()
+
+    def stats(self):
+        return {
+            'pending': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'last_error': str(self.last_error) if self.last_error else None
+        }
+
+    def _run(self):
+        while True:
+            job, args = self._queue.get()
+            try:
+                job(*args)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                self.last_error = e
+            finally:
+                self._queue.task_done()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_result_writer():
+    """Return the process-wide ResultWriter, creating it on first call"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ResultWriter()
+        return _writer
@@ -2,27 +2,304 @@ import pandas as pd
 import numpy as np
 from collections import defaultdict
 import heapq
-from datetime import datetime, timedelta
 import json
+import re
 from collections import deque
 
+
+from compact_graph import CompactGraph, CompactTrainInfo, DepartureIndex, StationIndex, TrainStops
+from fares import load_fare_engine
+from instrumentation import add_hook, count, peak, print_progress, progress, stage, trace, warning
+from lower_bounds import RideDistanceBounds
+from pareto import non_dominated_mask, non_dominated_ranks
+from raptor import McRaptor
+from result_writer import atomic_write, get_result_writer
+from route_set import RouteSet
+from running_days import load_running_days, parse_journey_date, travel_date
+from seat_availability import default_seat_provider
+
 class ParetoTrainRouter:
     """
     Advanced train routing with Pareto-Optimal multi-objective optimization
     Combines O(E log V) Dijkstra with Pareto frontier analysis
     """
     
-    def __init__(self, df):
+    def __init__(self, df, vectorized_build=True, graph_backend='dict', transfer_windows=None, seat_provider=None,
+                 fare_engine=None, running_days=None):
+        """
+        graph_backend='dict' keeps a list of edge dicts per station;
+        graph_backend='csr' stores the same edges in a CompactGraph and
+        train_info in a CompactTrainInfo, trading lookup speed for memory.
+        transfer_windows maps station codes to their own (min, max) transfer
+        minutes; other stations use MIN/MAX_TRANSFER_MINUTES.
+        seat_provider (see seat_availability.py) answers whether a ride has a
+        free seat; default_seat_provider() if not given.
+        fare_engine (see fares.py) prices each ride for the cost objective;
+        the table in price_data.csv if usable, else ₹1/km.
+        running_days (see running_days.py) gives the weekdays each train runs
+        on, for dated queries; the table in train_info.csv if usable, else
+        every train runs daily.
+        """
+        if graph_backend not in ('dict', 'csr'):
+            raise ValueError(f"Unknown graph backend '{graph_backend}'.")
+        if 'Departure Min' not in df.columns:
+            df, report = normalize_timetable_times(df)
+        else:
+            report = df.attrs.get('time_validation')
         self.df = df
+        self.time_validation = report
+        self.graph_backend = graph_backend
+        self.seat_provider = seat_provider if seat_provider is not None else default_seat_provider()
+        self.fare_engine = fare_engine if fare_engine is not None else load_fare_engine()
+        self.running_days = running_days if running_days is not None else load_running_days()
         self.station_to_id = {}
         self.id_to_station = {}
         self.graph = defaultdict(list)
         self.train_info = {}
-        self._build_sparse_graph()
+        self.train_nos = []
+        self.stops = None
+        self.station_index = None
+        with trace('build', graph_backend=graph_backend), stage('graph'):
+            if graph_backend == 'csr':
+                self._build_compact_graph()
+            elif vectorized_build:
+                self._build_sparse_graph()
+            else:
+                self._build_sparse_graph_rowwise()
+            self._index_departures(transfer_windows)
+            self.run_masks = self.running_days.masks_for(self.train_nos)
+            count('graph.stations', len(self.station_to_id))
+    
+    @classmethod
+    def from_compact(cls, graph, train_info, station_index, time_validation=None, transfer_windows=None,
+                     seat_provider=None, fare_engine=None, running_days=None, departure_index=None):
+        """
+        Wrap prebuilt CSR structures (e.g. loaded from a snapshot) in a router.
+        The router has no timetable frame; everything queries need is in
+        `graph`, `train_info` (and its stop table) and `station_index`. The
+        DepartureIndex is built from those unless `departure_index` is given.
+        """
+        router = cls.__new__(cls)
+        router.df = None
+        router.time_validation = time_validation
+        router.graph_backend = 'csr'
+        router.seat_provider = seat_provider if seat_provider is not None else default_seat_provider()
+        router.fare_engine = fare_engine if fare_engine is not None else load_fare_engine()
+        router.running_days = running_days if running_days is not None else load_running_days()
+        router.station_to_id = {code: idx for idx, code in enumerate(train_info.station_codes)}
+        router.id_to_station = dict(enumerate(train_info.station_codes))
+        router.graph = graph
+        router.train_info = train_info
+        router.train_nos = train_info.train_nos
+        router.stops = train_info.stops
+        router.station_index = station_index
+        router._index_departures(transfer_windows, departure_index)
+        router.run_masks = router.running_days.masks_for(router.train_nos)
+        return router
+
+    def _index_departures(self, transfer_windows=None, departure_index=None):
+        """
+        Build the per-station departure index used for transfers (unless a
+        prebuilt one is given) and resolve the per-station transfer windows
+        to station ids.
+        """
+        self.departure_index = (departure_index if departure_index is not None
+                                else DepartureIndex(self.station_index, self.stops))
+        self.ride_bounds = None
+        self.transfer_windows = {}
+        for station, (min_minutes, max_minutes) in (transfer_windows or {}).items():
+            if not 0 <= min_minutes <= max_minutes < MINUTES_PER_DAY:
+                raise ValueError(f"Transfer window for '{station}' must satisfy "
+                                 f"0 <= min <= max < {MINUTES_PER_DAY}, got ({min_minutes}, {max_minutes})")
+            station_id = self.station_to_id.get(station)
+            if station_id is not None:
+                self.transfer_windows[station_id] = (min_minutes, max_minutes)
+
+    def transfer_window(self, station_id):
+        """(min, max) transfer minutes allowed at `station_id`"""
+        return self.transfer_windows.get(station_id, DEFAULT_TRANSFER_WINDOW)
+
+    def _departures_within(self, station_id, arrival_min):
+        """
+        Postings ranks at `station_id` of the departures that fit its transfer
+        window after an arrival at clock minute `arrival_min`, in postings
+        order. Two binary searches on the departure index replace a wait check
+        against every departure.
+        """
+        minutes, ranks = self.departure_index.departures(station_id)
+        if arrival_min < 0:
+            return ranks[:0]
+        ranges = _window_ranges(minutes, arrival_min, *self.transfer_window(station_id))
+        return np.sort(np.concatenate([ranks[start:end] for start, end in ranges]))
+    
+    def _index_stations(self):
+        unique_stations = self.df['Station Code'].unique()
+        for idx, station in enumerate(unique_stations):
+            self.station_to_id[station] = idx
+            self.id_to_station[idx] = station
+        return unique_stations
+    
+    def _build_stop_tables(self, cols):
+        """
+        Build the columnar stop table (self.stops) and the station index.
+        Train indices in both follow self.train_nos.
+        """
+        if cols is None:
+            self.stops = TrainStops.empty()
+            self.station_index = StationIndex(len(self.station_to_id), [], [0])
+            return
+        
+        df = cols['frame']
+        # Intern every time string once; NaN times become code -1
+        time_codes, time_labels = pd.factorize(
+            np.concatenate([df['Arrival time'].to_numpy(dtype=object), df['Departure Time'].to_numpy(dtype=object)])
+        )
+        train_offsets = np.append(cols['train_starts'], len(df))
+        self.train_nos = cols['train_nos'][cols['train_starts']].tolist()
+        self.stops = TrainStops(
+            train_offsets,
+            station=cols['station_ids'],
+            seq=cols['seqs'],
+            arrival_code=time_codes[:len(df)],
+            departure_code=time_codes[len(df):],
+            time_labels=list(time_labels),
+            arr_min=df['Arrival Min'].to_numpy(),
+            dep_min=df['Departure Min'].to_numpy(),
+            arr_day=df['Arrival Day'].to_numpy(),
+            dep_day=df['Departure Day'].to_numpy(),
+            distance=cols['dists']
+        )
+        self.station_index = StationIndex(len(self.station_to_id), cols['station_ids'], train_offsets)
+    
+    def _timetable_columns(self, unique_stations):
+        """
+        Sort the timetable once by (Train No, SEQ) and return its columns
+        plus the row ranges of every train and the rows that start an edge.
+        """
+        # Stable sort: rows sharing a (Train No, SEQ) keep their file order
+        df = self.df.dropna(subset=['Train No']).sort_values(['Train No', 'SEQ'], kind='mergesort')
+        if len(df) == 0:
+            return None
+        
+        train_nos = df['Train No'].to_numpy()
+        dists = df['Distance'].to_numpy().astype(float)
+        
+        # A row starts a new train wherever the train number changes
+        new_train = np.empty(len(df), dtype=bool)
+        new_train[0] = True
+        new_train[1:] = train_nos[1:] != train_nos[:-1]
+        train_starts = np.flatnonzero(new_train)
+        train_ends = np.append(train_starts[1:], len(df))
+        
+        # Consecutive stops of the same train form an edge (row i → row i+1)
+        edge_rows = np.flatnonzero(~new_train[1:])
+        edge_dist = np.abs(dists[edge_rows + 1] - dists[edge_rows])
+        edge_duration = _edge_durations(edge_dist)
+        
+        return {
+            'frame': df,
+            'train_nos': train_nos,
+            'station_ids': pd.Index(unique_stations).get_indexer(df['Station Code'].to_numpy()),
+            'seqs': df['SEQ'].to_numpy().astype(np.int64),
+            'dists': dists,
+            'train_starts': train_starts,
+            'train_ends': train_ends,
+            'edge_rows': edge_rows,
+            'edge_dist': edge_dist,
+            'edge_duration': edge_duration
+        }
     
     def _build_sparse_graph(self):
-        """Build sparse graph with O(n) edges"""
-        print("Building optimized sparse graph...")
+        """
+        Build sparse graph with O(n) edges in bulk.
+        The frame is sorted once by (Train No, SEQ) and every consecutive-stop
+        edge is derived from shifted columns, which yields the same graph as
+        _build_sparse_graph_rowwise without per-row iloc lookups.
+        """
+        progress("Building optimized sparse graph...")
+        
+        unique_stations = self._index_stations()
+        cols = self._timetable_columns(unique_stations)
+        self._build_stop_tables(cols)
+        if cols is None:
+            progress(f"✓ Graph built: {len(self.station_to_id)} stations, 0 edges")
+            return
+        
+        df = cols['frame']
+        train_nos = cols['train_nos']
+        arrivals = df['Arrival time'].tolist()
+        departures = df['Departure Time'].tolist()
+        codes = df['Station Code'].tolist()
+        seqs = cols['seqs'].tolist()
+        stop_info = [
+            {'station': code, 'seq': seq, 'arrival': arr, 'departure': dep, 'distance': dist}
+            for code, seq, arr, dep, dist in zip(codes, seqs, arrivals, departures, cols['dists'].tolist())
+        ]
+        
+        names = df['Train Name'].tolist()
+        sources = df['Source Station'].tolist()
+        destinations = df['Destination Station'].tolist()
+        for start, end in zip(cols['train_starts'].tolist(), cols['train_ends'].tolist()):
+            self.train_info[train_nos[start]] = {
+                'name': names[start],
+                'source': sources[start],
+                'destination': destinations[start],
+                'stations': stop_info[start:end]
+            }
+        
+        arrival_min = df['Arrival Min'].tolist()
+        departure_min = df['Departure Min'].tolist()
+        station_ids = cols['station_ids'].tolist()
+        edge_rows = cols['edge_rows'].tolist()
+        graph = self.graph
+        for i, distance, duration in zip(edge_rows, cols['edge_dist'].tolist(), cols['edge_duration'].tolist()):
+            graph[station_ids[i]].append({
+                'to_id': station_ids[i + 1],
+                'train_no': train_nos[i],
+                'departure': departures[i],
+                'arrival': arrivals[i + 1],
+                'dep_min': departure_min[i],
+                'arr_min': arrival_min[i + 1],
+                'distance': distance,
+                'duration': duration,
+                'from_seq': seqs[i],
+                'to_seq': seqs[i + 1]
+            })
+        
+        progress(f"✓ Graph built: {len(self.station_to_id)} stations, {len(edge_rows)} edges")
+    
+    def _build_compact_graph(self):
+        """Build the same graph as _build_sparse_graph into CSR arrays"""
+        progress("Building compact CSR graph...")
+        
+        unique_stations = self._index_stations()
+        station_codes = list(unique_stations)
+        cols = self._timetable_columns(unique_stations)
+        self._build_stop_tables(cols)
+        if cols is None:
+            self.graph = CompactGraph.empty(len(station_codes))
+            self.train_info = CompactTrainInfo([], [], [], [], self.stops, station_codes)
+            progress(f"✓ Graph built: {len(self.station_to_id)} stations, 0 edges")
+            return
+        
+        df = cols['frame']
+        train_starts = cols['train_starts']
+        train_nos = self.train_nos
+        self.graph = compact_graph_from_stops(len(station_codes), self.stops, train_nos)
+        self.train_info = CompactTrainInfo(
+            train_nos,
+            names=df['Train Name'].to_numpy()[train_starts].tolist(),
+            sources=df['Source Station'].to_numpy()[train_starts].tolist(),
+            destinations=df['Destination Station'].to_numpy()[train_starts].tolist(),
+            stops=self.stops,
+            station_codes=station_codes
+        )
+        
+        progress(f"✓ Graph built: {len(self.station_to_id)} stations, {self.graph.edge_count} edges")
+    
+    def _build_sparse_graph_rowwise(self):
+        """Build sparse graph with O(n) edges, one row at a time (reference builder)"""
+        progress("Building optimized sparse graph...")
         
         unique_stations = self.df['Station Code'].unique()
         for idx, station in enumerate(unique_stations):
@@ -66,11 +343,12 @@ class ParetoTrainRouter:
                     'train_no': train_no,
                     'departure': curr_row['Departure Time'],
                     'arrival': next_row['Arrival time'],
+                    'dep_min': int(curr_row['Departure Min']),
+                    'arr_min': int(next_row['Arrival Min']),
                     'distance': distance,
                     'duration': duration,
                     'from_seq': int(curr_row['SEQ']),
-                    'to_seq': int(next_row['SEQ']),
-                    'seat_available': curr_row['Seat Availability']
+                    'to_seq': int(next_row['SEQ'])
                 }
                 
                 self.graph[from_id].append(edge)
@@ -85,187 +363,666 @@ class ParetoTrainRouter:
                 'distance': float(last_row['Distance'])
             })
         
-        print(f"✓ Graph built: {len(self.station_to_id)} stations, {edge_count} edges")
+        self._build_stop_tables(self._timetable_columns(unique_stations))
+        progress(f"✓ Graph built: {len(self.station_to_id)} stations, {edge_count} edges")
     
     def find_direct_trains(self, source, destination):
-        """Find all direct trains"""
-        direct_trains = []
-        
-        for train_no, info in self.train_info.items():
-            stations = [s['station'] for s in info['stations']]
-            if source in stations and destination in stations:
-                src_idx = stations.index(source)
-                dst_idx = stations.index(destination)
-                if dst_idx > src_idx:
-                    direct_trains.append(train_no)
-        
-        return direct_trains
+        """Find all direct trains by intersecting the two stations' postings"""
+        if source not in self.station_to_id or destination not in self.station_to_id:
+            return []
+        trains, _, _ = self.station_index.trains_between(self.station_to_id[source], self.station_to_id[destination])
+        return [self.train_nos[t] for t in trains.tolist()]
     
-    def generate_all_routes(self, source, destination, max_transfers=3):
+    def generate_all_routes(self, source, destination, max_transfers=3, mode='heuristic', executor=None,
+                            journey_date=None):
         """
         Generate comprehensive route set using multi-strategy search
         Returns: List of all feasible routes (200-300 routes)
+
+        mode='raptor' returns the exact Pareto set from find_pareto_journeys instead.
+        mode='directed' prunes the multi-transfer BFS with lower bounds from a
+        backward search (lower_bounds.py): rides that cannot reach the
+        destination within the transfer and distance budget are not queued,
+        which leaves room under max_routes for ones that can.
+        With a ParallelExecutor the strategies, the first trains out of the
+        source and each BFS level are spread over its worker processes; the
+        routes are the same as in serial mode.
+        With a `journey_date` (date or 'YYYY-MM-DD') the first train leaves
+        the source that day and every ride must be on a train running on the
+        day it is boarded (see running_days.py); segments carry that 'date'.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+        journey_date = parse_journey_date(journey_date)
+        with trace('query', source=source, destination=destination, max_transfers=max_transfers, mode=mode):
+            if mode == 'raptor':
+                return self.find_pareto_journeys(source, destination, max_transfers, journey_date)
+            return self._generate_heuristic_routes(source, destination, max_transfers, mode, executor, journey_date)
+
+    def generate_routes_from(self, source, destinations, max_transfers=3, mode='heuristic', journey_date=None,
+                             shared_bfs=False):
+        """
+        Route sets from `source` to each of `destinations`, as {destination:
+        routes} (used by batch.py). In the heuristic modes the routes are
+        those of generate_all_routes for each pair; the searches share the
+        per-train stop lists. mode='raptor' reads every destination's
+        journeys from one untargeted pareto_search.
+
+        With `shared_bfs` one BFS serves every destination's multi-transfer
+        routes (see _find_multi_transfer_routes_to), pruned in mode='directed'
+        by the smallest lower bound over the destinations. That is much
+        faster for many destinations, but its multi-transfer routes can
+        differ from a single query's.
         """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+        journey_date = parse_journey_date(journey_date)
+        destinations = list(dict.fromkeys(destinations))
+        with trace('query', source=source, destinations=len(destinations), max_transfers=max_transfers, mode=mode):
+            if mode == 'raptor':
+                with stage('generate.raptor'):
+                    search = self.pareto_search(source, max_transfers, journey_date=journey_date)
+                count('raptor.labels', len(search.station) - 1)
+                return {destination: self.journeys_from_search(search, destination) for destination in destinations}
+
+            source_id = self.station_to_id[source]
+            dest_ids = [self.station_to_id[destination] for destination in destinations]
+            routes = {dest_id: [] for dest_id in dest_ids}
+            with stage('generate.direct'):
+                for dest_id in dest_ids:
+                    direct_routes = self._find_direct_routes(source_id, dest_id, journey_date)
+                    routes[dest_id].extend(direct_routes)
+                    count('routes.direct', len(direct_routes))
+            if max_transfers >= 1:
+                with stage('generate.single_transfer'):
+                    for dest_id in dest_ids:
+                        single_transfer = self._find_single_transfer_routes(source_id, dest_id,
+                                                                            journey_date=journey_date)
+                        routes[dest_id].extend(single_transfer)
+                        count('routes.single_transfer', len(single_transfer))
+            if max_transfers >= 2 and shared_bfs:
+                with stage('generate.multi_transfer'):
+                    bounds = None
+                    if mode == 'directed':
+                        if self.ride_bounds is None:
+                            self.ride_bounds = RideDistanceBounds(self.stops, len(self.station_to_id))
+                        bounds = np.minimum.reduce([self.ride_bounds.bounds(dest_id, max_transfers)
+                                                    for dest_id in dest_ids]).tolist()
+                    multi_transfer = self._find_multi_transfer_routes_to(source_id, dest_ids, max_transfers,
+                                                                         bounds=bounds, journey_date=journey_date)
+            elif max_transfers >= 2:
+                stop_cache = {}
+                multi_transfer = {}
+                with stage('generate.multi_transfer'):
+                    for dest_id in dest_ids:
+                        bounds = self.goal_bounds(dest_id, max_transfers) if mode == 'directed' else None
+                        multi_transfer[dest_id] = self._find_multi_transfer_routes(
+                            source_id, dest_id, max_transfers, bounds=bounds, journey_date=journey_date,
+                            stop_cache=stop_cache
+                        )
+            if max_transfers >= 2:
+                for dest_id in dest_ids:
+                    routes[dest_id].extend(multi_transfer[dest_id])
+                    count('routes.multi_transfer', len(multi_transfer[dest_id]))
+            return {destination: self._deduplicate_routes(routes[dest_id])
+                    for destination, dest_id in zip(destinations, dest_ids)}
+
+    def _generate_heuristic_routes(self, source, destination, max_transfers, mode, executor, journey_date=None):
         source_id = self.station_to_id[source]
         dest_id = self.station_to_id[destination]
         
         all_routes = []
         
-        print("\n🔍 Phase 1: Generating comprehensive route set...")
+        progress("\n🔍 Phase 1: Generating comprehensive route set...")
+        
+        if executor is not None:
+            # Workers hold the router the pool was forked from; an updated copy has other train indices
+            if executor.router is not self:
+                raise ValueError("The executor's workers serve a different router; create one for this router")
+            # Direct and single-transfer searches run in the pool while this
+            # process drives the BFS, whose levels are expanded in the pool too
+            direct_job = executor.find_direct_routes(source_id, dest_id, journey_date)
+            single_job = (executor.find_single_transfer_routes(source_id, dest_id, journey_date=journey_date)
+                          if max_transfers >= 1 else None)
+            expand = executor.expand_ride_states
+        else:
+            expand = None
         
         # Strategy 1: Direct routes (0 transfers)
-        print("  → Finding direct routes...")
-        direct_routes = self._find_direct_routes(source_id, dest_id)
+        progress("  → Finding direct routes...")
+        with stage('generate.direct'):
+            if executor is not None:
+                direct_routes = direct_job.get()
+            else:
+                direct_routes = self._find_direct_routes(source_id, dest_id, journey_date)
         all_routes.extend(direct_routes)
-        print(f"    Found {len(direct_routes)} direct routes")
+        count('routes.direct', len(direct_routes))
+        progress(f"    Found {len(direct_routes)} direct routes")
         
         # Strategy 2: Single-transfer routes (1 transfer)
         if max_transfers >= 1:
-            print("  → Finding single-transfer routes...")
-            single_transfer = self._find_single_transfer_routes(source_id, dest_id)
+            progress("  → Finding single-transfer routes...")
+            with stage('generate.single_transfer'):
+                if executor is not None:
+                    single_transfer = single_job.get()
+                else:
+                    single_transfer = self._find_single_transfer_routes(source_id, dest_id,
+                                                                        journey_date=journey_date)
             all_routes.extend(single_transfer)
-            print(f"    Found {len(single_transfer)} single-transfer routes")
+            count('routes.single_transfer', len(single_transfer))
+            progress(f"    Found {len(single_transfer)} single-transfer routes")
         
         # Strategy 3: Multi-transfer routes (2-3 transfers)
         if max_transfers >= 2:
-            print("  → Finding multi-transfer routes...")
-            multi_transfer = self._find_multi_transfer_routes(source_id, dest_id, max_transfers)
+            progress("  → Finding multi-transfer routes...")
+            with stage('generate.multi_transfer'):
+                bounds = self.goal_bounds(dest_id, max_transfers) if mode == 'directed' else None
+                multi_transfer = self._find_multi_transfer_routes(source_id, dest_id, max_transfers, expand=expand,
+                                                                  bounds=bounds, journey_date=journey_date)
             all_routes.extend(multi_transfer)
-            print(f"    Found {len(multi_transfer)} multi-transfer routes")
+            count('routes.multi_transfer', len(multi_transfer))
+            progress(f"    Found {len(multi_transfer)} multi-transfer routes")
         
-        print(f"\n✓ Total routes generated: {len(all_routes)}")
+        progress(f"\n✓ Total routes generated: {len(all_routes)}")
         return self._deduplicate_routes(all_routes)
     
-    def _find_direct_routes(self, source_id, dest_id):
-        """Find all direct train routes"""
-        routes = []
-        
-        for edge in self.graph[source_id]:
-            if edge['to_id'] == dest_id:
-                path = [{
-                    'train_no': edge['train_no'],
-                    'from': self.id_to_station[source_id],
-                    'to': self.id_to_station[dest_id],
-                    'departure': edge['departure'],
-                    'arrival': edge['arrival'],
-                    'distance': edge['distance'],
-                    'duration': edge['duration'],
-                    'wait_before': 0,
-                    'seat_available': edge['seat_available']
-                }]
-                routes.append(path)
-        
-        return routes
+    def goal_bounds(self, dest_id, max_transfers):
+        """
+        Per remaining-ride count, the lower bound on km from each station to
+        its last boarding point towards `dest_id`, as lists for the BFS
+        """
+        if self.ride_bounds is None:
+            self.ride_bounds = RideDistanceBounds(self.stops, len(self.station_to_id))
+        return self.ride_bounds.bounds(dest_id, max_transfers).tolist()
+
+    def find_pareto_journeys(self, source, destination, max_transfers=3, journey_date=None):
+        """
+        Exact Pareto set of journeys on (journey time, cost, transfers) with at
+        most `max_transfers` transfers, using the round-based search in raptor.py.
+        Journey time runs from the first departure to the final arrival by the
+        timetable, and every transfer respects the station's transfer window
+        (30 min - 8 h unless configured). With a `journey_date` only journeys
+        starting that day on running trains count, as in generate_all_routes.
+        """
+        journey_date = parse_journey_date(journey_date)
+        with trace('query', source=source, destination=destination, max_transfers=max_transfers, mode='raptor'):
+            progress("\n🔍 Phase 1: Round-based Pareto search...")
+            with stage('generate.raptor'):
+                search = self.pareto_search(source, max_transfers, destination, journey_date)
+                routes = self.journeys_from_search(search, destination)
+            count('raptor.labels', len(search.station) - 1)
+            progress(f"\n✓ Pareto journeys found: {len(routes)} ({len(search.station) - 1} labels)")
+            return routes
+
+    def pareto_search(self, source, max_transfers=3, destination=None, journey_date=None):
+        """
+        Run the round-based search from `source`. Without a destination it
+        is not pruned, and its journeys to every station can be read with
+        journeys_from_search.
+        """
+        journey_date = parse_journey_date(journey_date)
+        search = McRaptor(self, max_transfers, MIN_TRANSFER_MINUTES, MAX_TRANSFER_MINUTES, MINUTES_PER_DAY,
+                          self.transfer_windows, journey_date)
+        target_id = self.station_to_id[destination] if destination is not None else None
+        return search.run(self.station_to_id[source], target_id)
+
+    def journeys_from_search(self, search, destination):
+        """Pareto-optimal journeys to `destination` found by a pareto_search, as routes"""
+        return [
+            [self._ride_segment(train, board, alight, wait / 60, search.journey_date, day)
+             for train, board, alight, wait, day in search.rides_of(label)]
+            for label in search.labels_at(self.station_to_id[destination])
+        ]
     
-    def _find_single_transfer_routes(self, source_id, dest_id, max_routes=100):
-        """Find routes with exactly 1 transfer via major junctions"""
+    def _ride_segment(self, train, from_pos, to_pos, wait_before=0, journey_date=None, day=0):
+        """
+        Route segment for riding train index `train` from stop from_pos to
+        stop to_pos; in dated queries boarded `day` days after `journey_date`
+        """
+        stops = self.stops
+        board = stops.row(train, from_pos)
+        alight = stops.row(train, to_pos)
+        distance = abs(float(stops.distance[alight]) - float(stops.distance[board]))
+        train_no = self.train_nos[train]
+        from_station = self.id_to_station[int(stops.station[board])]
+        to_station = self.id_to_station[int(stops.station[alight])]
+        date = travel_date(journey_date, day) if journey_date is not None else None
+        segment = {
+            'train_no': train_no,
+            'from': from_station,
+            'to': to_station,
+            'departure': stops.time_label(stops.departure_code[board]),
+            'arrival': stops.time_label(stops.arrival_code[alight]),
+            'distance': distance,
+            'duration': self._calculate_duration(distance),
+            'wait_before': wait_before,
+            'seat_available': self.seat_provider.seat_available(train_no, from_station, to_station, date)
+        }
+        if date is not None:
+            segment['date'] = date
+        return segment
+
+    def _train_stop_lists(self, train, cache):
+        """(station ids, arrival minutes, departure minutes, distances) of a train's stops as lists"""
+        lists = cache.get(train)
+        if lists is None:
+            stops = self.stops
+            start, end = stops.train_offsets[train], stops.train_offsets[train + 1]
+            lists = cache[train] = (
+                stops.station[start:end].tolist(),
+                stops.arr_min[start:end].tolist(),
+                stops.dep_min[start:end].tolist(),
+                stops.distance[start:end].tolist()
+            )
+        return lists
+
+    def _train_day_lists(self, train, cache):
+        """(arrival day offsets, departure day offsets) of a train's stops as lists"""
+        key = ('days', train)
+        lists = cache.get(key)
+        if lists is None:
+            stops = self.stops
+            start, end = stops.train_offsets[train], stops.train_offsets[train + 1]
+            lists = cache[key] = (stops.arr_day[start:end].tolist(), stops.dep_day[start:end].tolist())
+        return lists
+
+    def _runs(self, train, weekday, origin_day):
+        """
+        Whether train index `train` leaves its first station `origin_day`
+        days after a journey date falling on `weekday`
+        """
+        return (self.run_masks[train] >> (weekday + origin_day) % 7) & 1
+
+    def _first_calls(self, station_id):
+        """Train index → position of its first call at `station_id`"""
+        first = {}
+        trains, positions = self.station_index.postings(station_id)
+        for train, pos in zip(trains.tolist(), positions.tolist()):
+            first.setdefault(train, pos)
+        return first
+
+    def _find_direct_routes(self, source_id, dest_id, journey_date=None):
+        """Every train calling at the source and later at the destination is one ride"""
+        trains, from_pos, to_pos = self.station_index.trains_between(source_id, dest_id)
+        rides = zip(trains.tolist(), from_pos.tolist(), to_pos.tolist())
+        if journey_date is None:
+            return [[self._ride_segment(train, i, j)] for train, i, j in rides]
+        # Boarded on the journey date, so the train left its first station dep_day days earlier
+        weekday = journey_date.weekday()
+        dep_day = self.stops.dep_day
+        return [
+            [self._ride_segment(train, i, j, 0, journey_date)]
+            for train, i, j in rides
+            if self._runs(train, weekday, -int(dep_day[self.stops.row(train, i)]))
+        ]
+
+    def _find_single_transfer_routes(self, source_id, dest_id, max_routes=100, journey_date=None):
+        """
+        Find routes with exactly 1 transfer: ride a train from the source to
+        any later stop, change there, and ride a second train to the destination.
+        Each pair of trains is reported once, at its first workable junction.
+        """
+        first_trains, first_positions = self.station_index.postings(source_id)
+        return self._single_transfer_routes_from(source_id, dest_id, first_trains.tolist(),
+                                                 first_positions.tolist(), max_routes, journey_date)
+
+    def _single_transfer_routes_from(self, source_id, dest_id, first_trains, first_positions, max_routes=100,
+                                     journey_date=None):
+        """
+        Single-transfer routes whose first ride boards one of `first_trains`
+        at the matching position. Trains never share a (train1, train2) pair,
+        so consecutive slices of the source's postings that do not split a
+        train can be searched separately and concatenated.
+        """
         routes = []
-        visited_junctions = set()
-        
-        # Find intermediate stations (junctions)
-        for edge1 in self.graph[source_id]:
-            junction_id = edge1['to_id']
-            
-            if junction_id in visited_junctions or junction_id == dest_id:
-                continue
-            visited_junctions.add(junction_id)
-            
-            # Find connections from junction to destination
-            for edge2 in self.graph[junction_id]:
-                if edge2['to_id'] == dest_id:
-                    # Check if different trains
-                    if edge1['train_no'] != edge2['train_no']:
-                        wait_time = self._calculate_wait_time(edge1['arrival'], edge2['departure'])
-                        
-                        # Realistic transfer time: 30 min to 8 hours
-                        if 0.5 <= wait_time <= 8:
-                            path = [
-                                {
-                                    'train_no': edge1['train_no'],
-                                    'from': self.id_to_station[source_id],
-                                    'to': self.id_to_station[junction_id],
-                                    'departure': edge1['departure'],
-                                    'arrival': edge1['arrival'],
-                                    'distance': edge1['distance'],
-                                    'duration': edge1['duration'],
-                                    'wait_before': 0,
-                                    'seat_available': edge1['seat_available']
-                                },
-                                {
-                                    'train_no': edge2['train_no'],
-                                    'from': self.id_to_station[junction_id],
-                                    'to': self.id_to_station[dest_id],
-                                    'departure': edge2['departure'],
-                                    'arrival': edge2['arrival'],
-                                    'distance': edge2['distance'],
-                                    'duration': edge2['duration'],
-                                    'wait_before': wait_time,
-                                    'seat_available': edge2['seat_available']
-                                }
-                            ]
-                            routes.append(path)
-                            
-                            if len(routes) >= max_routes:
-                                return routes
-        
+        to_dest = self._first_calls(dest_id)
+        if not to_dest:
+            return routes
+
+        stop_cache = {}
+        onward_cache = {}
+        seen_pairs = set()
+        # Onward trains skipped because they leave outside the transfer window
+        window_pruned = 0
+        # Rides skipped because their train does not run that day
+        not_running = 0
+        weekday = journey_date.weekday() if journey_date is not None else None
+
+        def onward_trains(junction_id):
+            # Trains calling at the junction and later at the destination, in
+            # postings order, plus their departure minutes sorted for window lookups
+            onward = onward_cache.get(junction_id)
+            if onward is None:
+                rides = []
+                trains, positions = self.station_index.postings(junction_id)
+                for train, pos in zip(trains.tolist(), positions.tolist()):
+                    dest_pos = to_dest.get(train)
+                    if dest_pos is not None and dest_pos > pos:
+                        departure = self._train_stop_lists(train, stop_cache)[2][pos]
+                        if departure >= 0:
+                            rides.append((train, pos, dest_pos, departure))
+                by_departure = sorted(range(len(rides)), key=lambda i: rides[i][3])
+                onward = onward_cache[junction_id] = (
+                    rides, np.array([rides[i][3] for i in by_departure], dtype=np.int64), by_departure
+                )
+            return onward
+
+        for train1, board in zip(first_trains, first_positions):
+            stations, arrivals, _, _ = self._train_stop_lists(train1, stop_cache)
+            if weekday is not None:
+                # Boarded on the journey date; arrivals become minutes since its midnight
+                arr_days1, dep_days1 = self._train_day_lists(train1, stop_cache)
+                origin_day1 = -dep_days1[board]
+                if not self._runs(train1, weekday, origin_day1):
+                    not_running += 1
+                    continue
+
+            for k in range(board + 1, len(stations)):
+                junction_id = stations[k]
+                # Past the destination a transfer can only lead back to it
+                if junction_id == dest_id:
+                    break
+                if junction_id == source_id or arrivals[k] < 0:
+                    continue
+
+                rides, departures, by_departure = onward_trains(junction_id)
+                if not rides:
+                    continue
+                # Only the trains leaving within the junction's transfer window
+                connecting = []
+                for start, end in _window_ranges(departures, arrivals[k], *self.transfer_window(junction_id)):
+                    connecting.extend(by_departure[start:end])
+                connecting.sort()
+                window_pruned += len(rides) - len(connecting)
+
+                for i in connecting:
+                    train2, pos, dest_pos, departure = rides[i]
+                    if train2 == train1 or (train1, train2) in seen_pairs:
+                        continue
+                    wait_minutes = self._wait_minutes(arrivals[k], departure)
+                    if weekday is None:
+                        route = [
+                            self._ride_segment(train1, board, k),
+                            self._ride_segment(train2, pos, dest_pos, wait_minutes / 60)
+                        ]
+                    else:
+                        # A wait past midnight boards the next day, so that day's bit decides
+                        arrival = (origin_day1 + arr_days1[k]) * MINUTES_PER_DAY + arrivals[k]
+                        board_day = (arrival + wait_minutes) // MINUTES_PER_DAY
+                        origin_day2 = board_day - self._train_day_lists(train2, stop_cache)[1][pos]
+                        if not self._runs(train2, weekday, origin_day2):
+                            not_running += 1
+                            continue
+                        route = [
+                            self._ride_segment(train1, board, k, 0, journey_date),
+                            self._ride_segment(train2, pos, dest_pos, wait_minutes / 60, journey_date, board_day)
+                        ]
+                    seen_pairs.add((train1, train2))
+                    routes.append(route)
+
+                    if len(routes) >= max_routes:
+                        count('single_transfer.window_pruned', window_pruned)
+                        count('single_transfer.not_running', not_running)
+                        return routes
+
+        count('single_transfer.window_pruned', window_pruned)
+        count('single_transfer.not_running', not_running)
         return routes
-    
-    def _find_multi_transfer_routes(self, source_id, dest_id, max_transfers, max_routes=100):
-        """Find routes with 2-3 transfers using BFS"""
+
+    def _find_multi_transfer_routes(self, source_id, dest_id, max_transfers, max_routes=100, expand=None,
+                                    max_distance=None, bounds=None, journey_date=None, stop_cache=None):
+        """
+        Find routes with 2-3 transfers using BFS over train rides.
+        Each hop boards a train at the current station and rides it to one
+        of its later stops; the last allowed hop only rides to the destination.
+
+        The BFS runs one level at a time. The candidate rides of every state
+        in a level are computed independently by _expand_ride_states, or by
+        `expand` (e.g. a worker pool) if given, and then merged in queue order.
+        That gives the same routes as popping a FIFO queue one state at a time.
+
+        Queue entries hold an index into a table of (parent, ride) nodes
+        instead of a copied segment list; segment dicts are only built for
+        routes that reach the destination.
+
+        With `bounds` (from goal_bounds) rides to stations that cannot reach
+        the destination within the remaining rides and distance are not queued.
+
+        With a `journey_date` arrival minutes count from that date's midnight
+        instead of being clock times, so each ride's boarding day is known.
+
+        A `stop_cache` (see _train_stop_lists) can be shared by searches
+        from the same router.
+        """
         routes = []
-        queue = deque()
-        queue.append((source_id, [], 0, 0))
+        max_distance = MAX_ROUTE_DISTANCE if max_distance is None else max_distance
+        # Node i: (parent node or -1, train, board, alight, wait minutes, boarding day)
+        nodes = []
+        # (station, node, transfers, distance, arrival minute, last train); node -1 is the empty path
+        level = [(source_id, -1, 0, 0, -1, -1)]
         visited = set()
-        
-        while queue and len(routes) < max_routes:
-            current_id, path, transfers, total_dist = queue.popleft()
-            
-            if current_id == dest_id and path:
-                routes.append(path[:])
-                continue
-            
-            if transfers >= max_transfers or total_dist > 3000:
-                continue
-            
-            state = (current_id, transfers)
-            if state in visited:
-                continue
-            visited.add(state)
-            
-            for edge in self.graph[current_id]:
-                next_id = edge['to_id']
-                
-                wait_time = 0
-                is_transfer = False
-                
-                if path:
-                    last_train = path[-1]['train_no']
-                    if last_train != edge['train_no']:
-                        is_transfer = True
-                        wait_time = self._calculate_wait_time(path[-1]['arrival'], edge['departure'])
-                        if wait_time < 0.5 or wait_time > 8:
+        # A later queue entry with the same (station, transfers) as an earlier
+        # one would be skipped by `visited` when popped, so it is never queued
+        queued = set()
+        stop_cache = {} if stop_cache is None else stop_cache
+
+        while level and len(routes) < max_routes:
+            states = [(station, node >= 0, transfers, dist, arrival, last_train)
+                      for station, node, transfers, dist, arrival, last_train in level]
+            if expand is not None:
+                expansions = expand(dest_id, max_transfers, states, queued, max_distance, bounds, journey_date)
+            else:
+                expansions = self._expand_ride_states(dest_id, max_transfers, states, queued, stop_cache,
+                                                      max_distance, bounds, journey_date)
+
+            count('bfs.levels')
+            peak('bfs.queue_peak', len(level))
+            count('bfs.edges_relaxed', sum(len(rides) for rides in expansions if rides))
+
+            next_level = []
+            for (current_id, node, transfers, _, arrival_min, _), rides in zip(level, expansions):
+                if len(routes) >= max_routes:
+                    break
+
+                if current_id == dest_id and node >= 0:
+                    routes.append(self._path_from_node(nodes, node, journey_date))
+                    continue
+
+                # Over the transfer or distance limit
+                if rides is None:
+                    continue
+
+                state = (current_id, transfers)
+                if state in visited:
+                    continue
+                visited.add(state)
+
+                for next_id, train, board, k, new_dist, new_transfers, wait_minutes, arrival in rides:
+                    if next_id != dest_id:
+                        if (next_id, new_transfers) in queued:
                             continue
-                
-                new_segment = {
-                    'train_no': edge['train_no'],
-                    'from': self.id_to_station[current_id],
-                    'to': self.id_to_station[next_id],
-                    'departure': edge['departure'],
-                    'arrival': edge['arrival'],
-                    'distance': edge['distance'],
-                    'duration': edge['duration'],
-                    'wait_before': wait_time,
-                    'seat_available': edge['seat_available']
-                }
-                
-                new_path = path + [new_segment]
-                new_transfers = transfers + (1 if is_transfer else 0)
-                new_dist = total_dist + edge['distance']
-                
-                queue.append((next_id, new_path, new_transfers, new_dist))
-        
+                        queued.add((next_id, new_transfers))
+
+                    # Boarding day of the ride; undated queries keep clock times and day 0
+                    dated = journey_date is not None and node >= 0
+                    day = (arrival_min + wait_minutes) // MINUTES_PER_DAY if dated else 0
+                    nodes.append((node, train, board, k, wait_minutes, day))
+                    next_level.append((next_id, len(nodes) - 1, new_transfers, new_dist, arrival, train))
+
+            level = next_level
+
         return routes
-    
+
+    def _find_multi_transfer_routes_to(self, source_id, dest_ids, max_transfers, max_routes=100, max_distance=None,
+                                       bounds=None, journey_date=None):
+        """
+        Multi-transfer routes from the source to each of `dest_ids` with one
+        BFS, as {destination id: routes}. The BFS is that of
+        _find_multi_transfer_routes, except that a destination does not end
+        a path: it is queued like any other station, so it can lead on to
+        the others. Each destination keeps its first `max_routes` routes, and
+        routes that pass through their own destination earlier are dropped.
+        The BFS stops once every destination has its routes. The routes can
+        therefore differ from a search for one destination, whose BFS never
+        passes through that destination.
+        """
+        routes = {dest_id: [] for dest_id in dest_ids}
+        # Destinations that still take routes
+        open_ids = set(routes)
+        ends = frozenset(routes)
+        max_distance = MAX_ROUTE_DISTANCE if max_distance is None else max_distance
+        nodes = []
+        # Station each node arrives at, to spot routes passing through their destination
+        node_station = []
+        level = [(source_id, -1, 0, 0, -1, -1)]
+        visited = set()
+        queued = set()
+        stop_cache = {}
+
+        while level and open_ids:
+            states = [(station, node >= 0, transfers, dist, arrival, last_train)
+                      for station, node, transfers, dist, arrival, last_train in level]
+            expansions = self._expand_ride_states(ends, max_transfers, states, queued, stop_cache, max_distance,
+                                                  bounds, journey_date)
+
+            count('bfs.levels')
+            peak('bfs.queue_peak', len(level))
+            count('bfs.edges_relaxed', sum(len(rides) for rides in expansions if rides))
+
+            next_level = []
+            for (current_id, node, transfers, _, arrival_min, _), rides in zip(level, expansions):
+                if rides is None:
+                    continue
+                state = (current_id, transfers)
+                if state in visited:
+                    continue
+                visited.add(state)
+
+                for next_id, train, board, k, new_dist, new_transfers, wait_minutes, arrival in rides:
+                    dated = journey_date is not None and node >= 0
+                    day = (arrival_min + wait_minutes) // MINUTES_PER_DAY if dated else 0
+                    nodes.append((node, train, board, k, wait_minutes, day))
+                    node_station.append(next_id)
+
+                    if next_id in open_ids:
+                        parent = node
+                        while parent >= 0 and node_station[parent] != next_id:
+                            parent = nodes[parent][0]
+                        if parent < 0:
+                            found = routes[next_id]
+                            found.append(self._path_from_node(nodes, len(nodes) - 1, journey_date))
+                            if len(found) >= max_routes:
+                                open_ids.discard(next_id)
+
+                    # Rides to a destination skip these checks in _expand_ride_states
+                    if (new_transfers >= max_transfers or new_dist > max_distance
+                            or (next_id, new_transfers) in queued):
+                        continue
+                    queued.add((next_id, new_transfers))
+                    next_level.append((next_id, len(nodes) - 1, new_transfers, new_dist, arrival, train))
+
+            level = next_level
+
+        return routes
+
+    def _path_from_node(self, nodes, node, journey_date=None):
+        """Segment list of the rides leading to BFS `node`"""
+        path = []
+        while node >= 0:
+            parent, train, board, k, wait_minutes, day = nodes[node]
+            path.append(self._ride_segment(train, board, k, wait_minutes / 60, journey_date, day))
+            node = parent
+        path.reverse()
+        return path
+
+    def _expand_ride_states(self, dest_id, max_transfers, states, queued=(), stop_cache=None, max_distance=None,
+                            bounds=None, journey_date=None):
+        """
+        Candidate rides out of each BFS state (station, has path, transfers,
+        distance, arrival minute, last train): a list of (next station, train,
+        board, alight, distance, transfers, wait minutes, arrival minute), or
+        None for states that are not expanded. Rides to a (station, transfers)
+        in `queued` are left out, since the merge would drop them anyway, and
+        so are rides ruled out by the goal `bounds`.
+
+        With a `journey_date` arrival minutes count from its midnight, and
+        rides on trains not running on their boarding day are left out.
+
+        `dest_id` may also be a frozenset of destinations (see
+        _find_multi_transfer_routes_to); rides to any of them are kept like
+        rides to a single destination, but reaching one does not end a path.
+        """
+        max_distance = MAX_ROUTE_DISTANCE if max_distance is None else max_distance
+        stop_cache = {} if stop_cache is None else stop_cache
+        ends = dest_id if isinstance(dest_id, frozenset) else frozenset((dest_id,))
+        # Train index → positions of its first calls at the destinations
+        to_dest = {}
+        for end_id in ends:
+            for train, pos in self._first_calls(end_id).items():
+                to_dest.setdefault(train, []).append(pos)
+        weekday = journey_date.weekday() if journey_date is not None else None
+        run_masks = self.run_masks
+        expansions = []
+        window_pruned = goal_pruned = not_running = 0
+
+        for current_id, has_path, transfers, total_dist, arrival_min, last_train in states:
+            if (current_id == dest_id and has_path) or transfers >= max_transfers or total_dist > max_distance:
+                expansions.append(None)
+                continue
+
+            rides = []
+            trains, positions = self.station_index.postings(current_id)
+            # Clock minute of the arrival; dated states count minutes from the journey date
+            clock = arrival_min % MINUTES_PER_DAY if weekday is not None and arrival_min >= 0 else arrival_min
+            # After a ride only departures inside the transfer window can be boarded
+            if has_path:
+                boardable = self._departures_within(current_id, clock)
+                window_pruned += len(trains) - len(boardable)
+                trains, positions = trains[boardable], positions[boardable]
+            for train, board in zip(trains.tolist(), positions.tolist()):
+                if train == last_train:
+                    continue
+                stations, arrivals, departures, distances = self._train_stop_lists(train, stop_cache)
+
+                wait_minutes = self._wait_minutes(clock, departures[board]) if has_path else 0
+                new_transfers = transfers + (1 if has_path else 0)
+                if weekday is not None:
+                    # Day the train left its first station, from the day it is boarded here
+                    arr_days, dep_days = self._train_day_lists(train, stop_cache)
+                    board_day = (arrival_min + wait_minutes) // MINUTES_PER_DAY if has_path else 0
+                    origin_day = board_day - dep_days[board]
+                    if not (run_masks[train] >> (weekday + origin_day) % 7) & 1:
+                        not_running += 1
+                        continue
+
+                if new_transfers >= max_transfers:
+                    # No further transfer allowed: only the ride to the destination is useful
+                    alight_positions = sorted(pos for pos in to_dest.get(train, ()) if pos > board)
+                else:
+                    alight_positions = range(board + 1, len(stations))
+                # Lower bounds for the stations this ride can alight at
+                bound = bounds[max_transfers - new_transfers] if bounds is not None else None
+
+                for k in alight_positions:
+                    next_id = stations[k]
+                    new_dist = total_dist + abs(distances[k] - distances[board])
+                    if next_id not in ends and (new_dist > max_distance or (next_id, new_transfers) in queued):
+                        continue
+                    if bound is not None and next_id not in ends and new_dist + bound[next_id] > max_distance:
+                        goal_pruned += 1
+                        continue
+                    arrival = arrivals[k]
+                    if weekday is not None and arrival >= 0:
+                        arrival += (origin_day + arr_days[k]) * MINUTES_PER_DAY
+                    rides.append((next_id, train, board, k, new_dist, new_transfers, wait_minutes, arrival))
+
+            expansions.append(rides)
+
+        count('bfs.window_pruned', window_pruned)
+        count('bfs.goal_pruned', goal_pruned)
+        count('bfs.not_running', not_running)
+        return expansions
+
     def calculate_route_objectives(self, path):
         """
         Calculate 5 optimization objectives for a route
@@ -274,9 +1031,9 @@ class ParetoTrainRouter:
         # Objective 1: Total journey time (minimize)
         total_time = sum(seg['duration'] + seg['wait_before'] for seg in path)
         
-        # Objective 2: Total cost (minimize) - ₹1 per km
+        # Objective 2: Total cost (minimize) - one fare per ride, from the fare engine
         total_distance = sum(seg['distance'] for seg in path)
-        total_cost = total_distance * 1.0
+        total_cost = sum(self.fare_engine.fare(seg['distance']) for seg in path)
         
         # Objective 3: Number of transfers (minimize)
         transfers = len(path) - 1
@@ -310,41 +1067,42 @@ class ParetoTrainRouter:
         """
         Apply Pareto optimization to find non-dominated routes
         Returns: Pareto-optimal routes (typically 20-40% of total)
+
+        Pass a RouteSet to reuse (and keep) its evaluated objectives.
         """
-        print("\n🎯 Phase 2: Pareto optimization analysis...")
-        
-        # Calculate objectives for all routes
-        route_objectives = []
-        for route in routes:
-            obj = self.calculate_route_objectives(route)
-            route_objectives.append({
-                'route': route,
-                'objectives': obj
-            })
-        
-        # Find Pareto front
-        pareto_front = []
-        
-        for i, route_i in enumerate(route_objectives):
-            is_dominated = False
-            obj_i = route_i['objectives']
+        with trace('query'):
+            progress("\n🎯 Phase 2: Pareto optimization analysis...")
             
-            for j, route_j in enumerate(route_objectives):
-                if i == j:
-                    continue
-                
-                obj_j = route_j['objectives']
-                
-                # Check if route_j dominates route_i
-                if self._dominates(obj_j, obj_i):
-                    is_dominated = True
-                    break
+            # Calculate objectives for all routes in one batch
+            route_set = RouteSet.of(routes, self.fare_engine)
+            route_objectives = [
+                {'route': route, 'objectives': obj}
+                for route, obj in zip(route_set, route_set.objectives())
+            ]
             
-            if not is_dominated:
-                pareto_front.append(route_i)
-        
-        print(f"✓ Pareto front size: {len(pareto_front)} / {len(routes)} routes")
-        return pareto_front
+            # Find Pareto front: vectorized over the objective matrix, input order kept
+            with stage('pareto'):
+                keep = non_dominated_mask(route_set.matrix())
+                pareto_front = [route for route, kept in zip(route_objectives, keep) if kept]
+            count('routes.generated', len(route_set))
+            count('routes.pareto_front', len(pareto_front))
+            
+            progress(f"✓ Pareto front size: {len(pareto_front)} / {len(routes)} routes")
+            return pareto_front
+    
+    def pareto_fronts(self, routes):
+        """
+        Full non-dominated sort: a list of successive fronts, the first being
+        the Pareto front, each holding {'route', 'objectives'} in input order
+        """
+        route_set = RouteSet.of(routes, self.fare_engine)
+        route_objectives = [{'route': route, 'objectives': obj}
+                            for route, obj in zip(route_set, route_set.objectives())]
+        ranks = non_dominated_ranks(route_set.matrix())
+        fronts = [[] for _ in range(int(ranks.max()) + 1 if len(ranks) else 0)]
+        for route, rank in zip(route_objectives, ranks.tolist()):
+            fronts[rank].append(route)
+        return fronts
     
     def _dominates(self, obj_a, obj_b):
         """
@@ -386,7 +1144,7 @@ class ParetoTrainRouter:
             unique_routes[fingerprint] = route
         return list(unique_routes.values())
 
-    def select_optimal_routes(self, pareto_front):
+    def select_optimal_routes(self, pareto_front, n_fast=None, n_cheap=None, n_balanced=None):
         """
         Select all diverse optimal routes from Pareto front, prioritizing quotas for specific categories.
         
@@ -395,143 +1153,120 @@ class ParetoTrainRouter:
         - CHEAPEST (1 route) 
         - DIRECT (1 route)
         - Plus other diverse Pareto-optimal alternatives
+
+        n_fast, n_cheap and n_balanced are the quotas of FAST #, CHEAP # and
+        BALANCED # routes picked after the best of each category (N_FAST,
+        N_CHEAP and N_BALANCED if not given).
         """
-        print(f"\n🏆 Phase 3: Selecting diverse optimal routes with quotas...")
+        n_fast = N_FAST if n_fast is None else n_fast
+        n_cheap = N_CHEAP if n_cheap is None else n_cheap
+        n_balanced = N_BALANCED if n_balanced is None else n_balanced
+        if min(n_fast, n_cheap, n_balanced) < 0:
+            raise ValueError("Selection quotas must not be negative")
+        with trace('query'), stage('selection'):
+            selected_routes, categories = self._select_optimal_routes(pareto_front, n_fast, n_cheap, n_balanced)
+            count('routes.selected', len(selected_routes))
+            return selected_routes, categories
+
+    def _select_optimal_routes(self, pareto_front, n_fast, n_cheap, n_balanced):
+        """
+        Each physical route (fingerprint) gets the first category assigned to
+        it, in this order: the best route on each objective, the quotas of
+        fast, cheap and balanced routes, then every other route as an optimal
+        alternative. Routes come back in Pareto front order, once per fingerprint.
+
+        Rankings are stable, so ties keep front order. Each quota only needs
+        its top few routes, which _ranked finds without sorting the front.
+        """
+        progress(f"\n🏆 Phase 3: Selecting diverse optimal routes with quotas...")
         
         if len(pareto_front) == 0:
             return [], []
-        
-        # --- Configuration for quotas ---
-        N_FAST = 10
-        N_CHEAP = 5
-        N_BALANCED = 7
-        # --------------------------------
-        
-        # Maps fingerprint to (route_data, category) - ensures unique physical routes
-        final_selections = {} 
-
-        # Sort by different objectives for potential selection
-        sorted_by_time = sorted(pareto_front, key=lambda x: x['objectives']['time'])
-        sorted_by_cost = sorted(pareto_front, key=lambda x: x['objectives']['cost'])
-        sorted_by_transfers = sorted(pareto_front, key=lambda x: x['objectives']['transfers'])
-        sorted_by_seats = sorted(pareto_front, key=lambda x: x['objectives']['seat_prob'], reverse=True)
-        sorted_by_safety = sorted(pareto_front, key=lambda x: x['objectives']['safety_score'], reverse=True)
-        
-        # Helper to add/update route in final_selections based on priority
-        def add_or_update_route(route_data, category, priority):
-            fingerprint = self._get_route_fingerprint(route_data['route'])
-            if fingerprint not in final_selections:
-                final_selections[fingerprint] = {'route_data': route_data, 'category': category, 'priority': priority}
-            else:
-                # If existing category is lower priority, update it
-                if final_selections[fingerprint]['priority'] < priority:
-                    final_selections[fingerprint]['category'] = category
-                    final_selections[fingerprint]['priority'] = priority
 
-        current_priority = 100 # Higher number means higher priority
+        # Fingerprint id of each route, computed once
+        fingerprints = {}
+        route_fp = [fingerprints.setdefault(self._get_route_fingerprint(route_data['route']), len(fingerprints))
+                    for route_data in pareto_front]
+        # Columns: time, cost, transfers, seat_prob, safety_score
+        objectives = np.array([[obj['time'], obj['cost'], obj['transfers'], obj['seat_prob'], obj['safety_score']]
+                               for obj in (route_data['objectives'] for route_data in pareto_front)], dtype=float)
+
+        # Per fingerprint: category, number within it (FAST #n ...) and the route that got it
+        category = [None] * len(fingerprints)
+        number = [0] * len(fingerprints)
+        chosen = [-1] * len(fingerprints)
+        # Routes beyond the first of their fingerprint; each may need skipping while filling a quota
+        duplicates = len(pareto_front) - len(fingerprints)
+        selected = 0
+
+        def select(i, kind, n=0):
+            nonlocal selected
+            fp = route_fp[i]
+            if category[fp] is None:
+                category[fp], number[fp], chosen[fp] = kind, n, i
+                selected += 1
+
+        def fill(ranking, kind, quota, eligible=(None,)):
+            # Routes already selected (or their duplicates) are skipped, so
+            # the top quota + selected + duplicates always fill the quota
+            if quota == 0:
+                return
+            filled = 0
+            for i in _ranked(ranking, quota + selected + duplicates).tolist():
+                if category[route_fp[i]] in eligible:
+                    filled += 1
+                    select(i, kind, filled)
+                    if filled >= quota:
+                        break
 
         # STEP 1: Add the absolute best in each primary category
-        print("  → Adding best routes in each category...")
-        if sorted_by_time: add_or_update_route(sorted_by_time[0], 'FASTEST ⚡', current_priority); current_priority -= 1
-        if sorted_by_cost: add_or_update_route(sorted_by_cost[0], 'CHEAPEST 💰', current_priority); current_priority -= 1
-        if sorted_by_transfers: add_or_update_route(sorted_by_transfers[0], 'MOST DIRECT 🚂', current_priority); current_priority -= 1
-        if sorted_by_seats: add_or_update_route(sorted_by_seats[0], 'BEST SEATS 💺', current_priority); current_priority -= 1
-        if sorted_by_safety: add_or_update_route(sorted_by_safety[0], 'SAFEST 🛡️', current_priority); current_priority -= 1
+        progress("  → Adding best routes in each category...")
+        select(int(np.argmin(objectives[:, 0])), FASTEST)
+        select(int(np.argmin(objectives[:, 1])), CHEAPEST)
+        select(int(np.argmin(objectives[:, 2])), MOST_DIRECT)
+        select(int(np.argmax(objectives[:, 3])), BEST_SEATS)
+        select(int(np.argmax(objectives[:, 4])), SAFEST)
 
         # STEP 2: Fill quotas for specific categories (Fast, Cheap, Balanced)
-        print("  → Filling quotas for specific categories...")
-        # Fast routes
-        fast_count = 0
-        for i, route_data in enumerate(sorted_by_time):
-            fingerprint = self._get_route_fingerprint(route_data['route'])
-            if fingerprint not in final_selections or final_selections[fingerprint]['category'].startswith('OPTIMAL ALTERNATIVE'):
-                add_or_update_route(route_data, f'FAST #{fast_count + 1} ⚡', current_priority); current_priority -= 1
-                fast_count += 1
-            if fast_count >= N_FAST:
-                break
-        
-        # Cheapest routes
-        cheap_count = 0
-        for i, route_data in enumerate(sorted_by_cost):
-            fingerprint = self._get_route_fingerprint(route_data['route'])
-            if fingerprint not in final_selections or final_selections[fingerprint]['category'].startswith('OPTIMAL ALTERNATIVE') or final_selections[fingerprint]['category'].startswith('FAST #'):
-                # Allow a fast route to also be a cheap route if it hasn't received a higher priority tag
-                add_or_update_route(route_data, f'CHEAP #{cheap_count + 1} 💰', current_priority); current_priority -= 1
-                cheap_count += 1
-            if cheap_count >= N_CHEAP:
-                break
+        progress("  → Filling quotas for specific categories...")
+        fill(objectives[:, 0], FAST, n_fast)
+        # A fast route also counts towards the cheap quota, keeping its fast category
+        fill(objectives[:, 1], CHEAP, n_cheap, (None, FAST))
 
-        # Balanced routes
-        balanced_count = 0
-        if pareto_front: # Only calculate balanced score if there are routes
-            times = [r['objectives']['time'] for r in pareto_front]
-            costs = [r['objectives']['cost'] for r in pareto_front]
-            transfers_list = [r['objectives']['transfers'] for r in pareto_front]
-            seats = [r['objectives']['seat_prob'] for r in pareto_front]
-            safety = [r['objectives']['safety_score'] for r in pareto_front]
-            
-            min_time = min(times) if times else 0
-            max_time = max(times) if times else 0
-            min_cost = min(costs) if costs else 0
-            max_cost = max(costs) if costs else 0
-            min_transfers = min(transfers_list) if transfers_list else 0
-            max_transfers = max(transfers_list) if transfers_list else 0
-            min_seats = min(seats) if seats else 0
-            max_seats = max(seats) if seats else 0
-            min_safety = min(safety) if safety else 0
-            max_safety = max(safety) if safety else 0
-
-            time_range = max_time - min_time + 0.001
-            cost_range = max_cost - min_cost + 0.001
-            transfers_range = max_transfers - min_transfers + 0.001
-            seats_range = max_seats - min_seats + 0.001
-            safety_range = max_safety - min_safety + 0.001
-            
-            for route_data in pareto_front: # Calculate balanced score for all Pareto routes
-                obj = route_data['objectives']
-                route_data['balanced_score'] = (
-                    ((max_time - obj['time']) / time_range) * 0.25 +
-                    ((max_cost - obj['cost']) / cost_range) * 0.25 +
-                    ((max_transfers - obj['transfers']) / transfers_range) * 0.20 +
-                    ((obj['seat_prob'] - min_seats) / seats_range) * 0.15 +
-                    ((obj['safety_score'] - min_safety) / safety_range) * 0.15
-                )
-            sorted_balanced = sorted(pareto_front, key=lambda x: x['balanced_score'], reverse=True)
-
-            for i, route_data in enumerate(sorted_balanced):
-                fingerprint = self._get_route_fingerprint(route_data['route'])
-                if fingerprint not in final_selections or final_selections[fingerprint]['category'].startswith('OPTIMAL ALTERNATIVE'):
-                    add_or_update_route(route_data, f'BALANCED #{balanced_count + 1} ⚖️', current_priority); current_priority -= 1
-                    balanced_count += 1
-                if balanced_count >= N_BALANCED:
-                    break
+        # Balanced score: objectives scaled to [0, 1] (best = 1) and weighted
+        low, high = objectives.min(axis=0), objectives.max(axis=0)
+        span = high - low + 0.001
+        balanced_score = (
+            ((high[0] - objectives[:, 0]) / span[0]) * 0.25 +
+            ((high[1] - objectives[:, 1]) / span[1]) * 0.25 +
+            ((high[2] - objectives[:, 2]) / span[2]) * 0.20 +
+            ((objectives[:, 3] - low[3]) / span[3]) * 0.15 +
+            ((objectives[:, 4] - low[4]) / span[4]) * 0.15
+        )
+        for route_data, score in zip(pareto_front, balanced_score.tolist()):
+            route_data['balanced_score'] = score
+        fill(-balanced_score, BALANCED, n_balanced)
         
-        # STEP 3: Add remaining Pareto-optimal routes as "Optimal Alternative"
-        print("  → Adding remaining Pareto-optimal routes as Optimal Alternatives...")
-        for route_data in pareto_front:
-            fingerprint = self._get_route_fingerprint(route_data['route'])
-            if fingerprint not in final_selections: # Only add if not categorized yet
-                final_selections[fingerprint] = {'route_data': route_data, 'category': 'OPTIMAL ALTERNATIVE 🎯', 'priority': 0}
-
-        # Convert dictionary back to lists (maintaining consistent order from original pareto_front)
+        # STEP 3: The remaining Pareto-optimal routes are "Optimal Alternatives",
+        # listed in Pareto front order like the rest
+        progress("  → Adding remaining Pareto-optimal routes as Optimal Alternatives...")
         final_selected_routes = []
         final_categories = []
-        for route_data_original in pareto_front: # Use original order of pareto_front
-            fingerprint = self._get_route_fingerprint(route_data_original['route'])
-            if fingerprint in final_selections:
-                # Ensure we pick the route_data that came from pareto_front (not intermediate sorted list)
-                final_selected_routes.append(final_selections[fingerprint]['route_data'])
-                final_categories.append(final_selections[fingerprint]['category'])
-                del final_selections[fingerprint] # Remove to ensure each is processed once
-
-        # Add any remaining in final_selections that might have been missed (shouldn't happen with above logic)
-        for selection_data in final_selections.values():
-            final_selected_routes.append(selection_data['route_data'])
-            final_categories.append(selection_data['category'])
-
-        print(f"✓ Selected {len(final_selected_routes)} optimal routes for comparison")
-        return final_selected_routes, final_categories        
-        return selected_routes, categories    
+        listed = [False] * len(fingerprints)
+        for i, fp in enumerate(route_fp):
+            if listed[fp]:
+                continue
+            listed[fp] = True
+            if category[fp] is None:
+                final_selected_routes.append(pareto_front[i])
+                final_categories.append(CATEGORY_LABELS[ALTERNATIVE])
+            else:
+                final_selected_routes.append(pareto_front[chosen[fp]])
+                final_categories.append(CATEGORY_LABELS[category[fp]].format(number[fp]))
+
+        progress(f"✓ Selected {len(final_selected_routes)} optimal routes for comparison")
+        return final_selected_routes, final_categories
+
     def _calculate_duration(self, distance):
         """Calculate realistic travel duration"""
         if distance > 1800:
@@ -547,17 +1282,14 @@ class ParetoTrainRouter:
         else:
             return distance / 38
     
-    def _calculate_wait_time(self, arrival_time, departure_time):
-        """Calculate waiting time in hours"""
-        try:
-            fmt = '%H:%M:%S'
-            t1 = datetime.strptime(arrival_time, fmt)
-            t2 = datetime.strptime(departure_time, fmt)
-            if t2 < t1:
-                t2 += timedelta(days=1)
-            return (t2 - t1).total_seconds() / 3600
-        except:
-            return 1.0
+    def _wait_minutes(self, arrival_min, departure_min):
+        """
+        Minutes from an arrival to the next departure at that clock time,
+        wrapping past midnight. -1 when either time is unknown (malformed).
+        """
+        if arrival_min < 0 or departure_min < 0:
+            return -1
+        return (departure_min - arrival_min) % MINUTES_PER_DAY
     
     def format_duration(self, minutes):
         """Format duration as HH:MM"""
@@ -565,19 +1297,228 @@ class ParetoTrainRouter:
         m = int(minutes % 60)
         return f"{h}h {m}m"
 
-def get_routes_data(source, destination, max_transfers):
-    # Load data
-    try:
-        df = pd.read_csv('Train_details.csv')
-        df = df[df['Train No'].astype(str).str.len() == 5].copy()
-        df['Seat Availability'] = np.random.choice([0, 1], size=len(df), p=[0.2, 0.8])
-    except FileNotFoundError:
-        return {"error": "Could not find 'Train_details.csv'."}, None
-    except Exception as e:
-        return {"error": str(e)}, None
+TIMETABLE_PATH = 'Train_details.csv'
+
+# Realistic transfer time: 30 min to 8 hours
+MIN_TRANSFER_MINUTES = 30
+MAX_TRANSFER_MINUTES = 8 * 60
+DEFAULT_TRANSFER_WINDOW = (MIN_TRANSFER_MINUTES, MAX_TRANSFER_MINUTES)
+MINUTES_PER_DAY = 24 * 60
+# Multi-transfer BFS states beyond this many km are not expanded
+MAX_ROUTE_DISTANCE = 3000
+
+# 'heuristic': direct / single-transfer / BFS generation; 'directed': the same with
+# the BFS pruned by lower bounds towards the destination; 'raptor': exact Pareto search
+SEARCH_MODES = ('heuristic', 'directed', 'raptor')
+
+# Result files: 'sync' writes them before returning, 'background' queues them
+# on the result writer thread, 'none' skips them
+EXPORT_MODES = ('none', 'background', 'sync')
+
+# Route selection categories, in the order they are assigned, and their labels
+FASTEST, CHEAPEST, MOST_DIRECT, BEST_SEATS, SAFEST, FAST, CHEAP, BALANCED, ALTERNATIVE = range(9)
+CATEGORY_LABELS = ('FASTEST ⚡', 'CHEAPEST 💰', 'MOST DIRECT 🚂', 'BEST SEATS 💺', 'SAFEST 🛡️',
+                   'FAST #{} ⚡', 'CHEAP #{} 💰', 'BALANCED #{} ⚖️', 'OPTIMAL ALTERNATIVE 🎯')
+# Default quotas of fast, cheap and balanced routes selected after the category bests
+N_FAST = 10
+N_CHEAP = 5
+N_BALANCED = 7
+
+TIME_PATTERN = re.compile(r'^\s*(\d{1,2}):(\d{2})(?::(\d{2}))?\s*$')
+
+
+def _window_ranges(minutes, arrival_min, min_wait, max_wait):
+    """
+    Index ranges of the sorted integer clock `minutes` (an array) whose wait
+    after `arrival_min`, wrapping past midnight, is within [min_wait,
+    max_wait]. A window that crosses midnight is two ranges. Both ends come
+    from one searchsorted: on integers, the right end of `end` is the left
+    end of `end + 1`. The ends are passed in the array's dtype, which spares
+    numpy a conversion of `minutes`.
+    """
+    start, end = arrival_min + min_wait, arrival_min + max_wait
+    if start >= MINUTES_PER_DAY:
+        start, end = start - MINUTES_PER_DAY, end - MINUTES_PER_DAY
+    wraps = end >= MINUTES_PER_DAY
+    if wraps:
+        end -= MINUTES_PER_DAY
+    first, last = minutes.searchsorted(np.array((start, end + 1), dtype=minutes.dtype)).tolist()
+    if wraps:
+        return [(first, len(minutes)), (0, last)]
+    return [(first, last)]
+
+
+def _ranked(values, k):
+    """
+    Indices of the k smallest `values` in stable ascending order, plus any
+    ties with the k-th. One partition finds the k-th value, so only the
+    routes up to it are sorted.
+    """
+    if k >= len(values):
+        return np.argsort(values, kind='stable')
+    kth = np.partition(values, k - 1)[k - 1]
+    candidates = np.flatnonzero(values <= kth)
+    return candidates[np.argsort(values[candidates], kind='stable')]
+
+
+def _edge_durations(edge_dist):
+    """Ride hours of edges `edge_dist` km long: _calculate_duration over an array"""
+    return np.select(
+        [edge_dist > 1800, edge_dist > 1000, edge_dist > 500, edge_dist > 300, edge_dist > 150],
+        [edge_dist / 58, edge_dist / 60, edge_dist / 55, edge_dist / 50, edge_dist / 45],
+        edge_dist / 38
+    )
+
 
-    # Initialize router
-    router = ParetoTrainRouter(df)
+def compact_graph_from_stops(n_stations, stops, train_nos):
+    """CompactGraph of the consecutive-stop edges of a TrainStops table"""
+    lengths = np.diff(stops.train_offsets)
+    train_of_row = np.repeat(np.arange(len(lengths)), lengths)
+    # Every stop but a train's last starts an edge to the next row
+    last_stop = np.zeros(len(stops.station), dtype=bool)
+    last_stop[stops.train_offsets[1:][lengths > 0] - 1] = True
+    edge_rows = np.flatnonzero(~last_stop)
+    edge_dist = np.abs(stops.distance[edge_rows + 1] - stops.distance[edge_rows])
+    return CompactGraph(
+        n_stations,
+        from_ids=stops.station[edge_rows],
+        to_ids=stops.station[edge_rows + 1],
+        train_idx=train_of_row[edge_rows],
+        train_nos=train_nos,
+        departure_codes=stops.departure_code[edge_rows],
+        arrival_codes=stops.arrival_code[edge_rows + 1],
+        time_labels=stops.time_labels,
+        dep_min=stops.dep_min[edge_rows],
+        arr_min=stops.arr_min[edge_rows + 1],
+        distance=edge_dist,
+        duration=_edge_durations(edge_dist),
+        from_seq=stops.seq[edge_rows],
+        to_seq=stops.seq[edge_rows + 1]
+    )
+
+
+def _parse_clock(value):
+    """'HH:MM[:SS]' → minutes since midnight, -1 if malformed"""
+    match = TIME_PATTERN.match(value) if isinstance(value, str) else None
+    if not match:
+        return -1
+    hours, minutes, seconds = int(match.group(1)), int(match.group(2)), int(match.group(3) or 0)
+    if hours > 23 or minutes > 59 or seconds > 59:
+        return -1
+    return hours * 60 + minutes
+
+
+def _clock_minutes(times):
+    """Vectorized _parse_clock: each distinct time string is parsed only once"""
+    codes, labels = pd.factorize(times.to_numpy(dtype=object))
+    label_minutes = np.array([_parse_clock(label) for label in labels] + [-1], dtype=np.int64)
+    return label_minutes[codes]
+
+
+def _day_offsets(df):
+    """
+    Per-row (arrival, departure) day offsets from each train's first stop.
+    Arrival/departure events are interleaved in running order; every time
+    the clock goes backwards within a train the journey has crossed midnight.
+    Malformed (-1) times are skipped and inherit the previous offset.
+    """
+    arrival_day = np.zeros(len(df), dtype=np.int64)
+    departure_day = np.zeros(len(df), dtype=np.int64)
+    if len(df) == 0:
+        return arrival_day, departure_day
+    
+    order = np.lexsort((df['SEQ'].to_numpy(), pd.factorize(df['Train No'], sort=True)[0]))
+    train_codes = np.repeat(pd.factorize(df['Train No'].to_numpy()[order])[0], 2)
+    minutes = np.column_stack([df['Arrival Min'].to_numpy()[order], df['Departure Min'].to_numpy()[order]]).ravel()
+    positions = np.arange(len(minutes))
+    first_event = np.r_[0, np.flatnonzero(train_codes[1:] != train_codes[:-1]) + 1]
+    train_start = np.repeat(first_event, np.diff(np.r_[first_event, len(minutes)]))
+    
+    known = minutes >= 0
+    last_known = np.maximum.accumulate(np.where(known, positions, -1))
+    previous = np.r_[-1, last_known[:-1]]
+    wrapped = known & (previous >= train_start) & (minutes < minutes[np.maximum(previous, 0)])
+    crossed = np.cumsum(wrapped)
+    days = (crossed - crossed[train_start]).reshape(-1, 2)
+    
+    arrival_day[order] = days[:, 0]
+    departure_day[order] = days[:, 1]
+    return arrival_day, departure_day
+
+
+def normalize_timetable_times(df):
+    """
+    Add integer time columns to a timetable frame, once, at load time.
+
+    'Arrival Min' / 'Departure Min' are minutes since midnight (-1 when the
+    source string is malformed) and 'Arrival Day' / 'Departure Day' count how
+    many midnights the train has crossed since its first stop, so overnight
+    runs can be handled with plain integer arithmetic.
+    Returns (df, report) where report summarizes the malformed rows.
+    """
+    df = df.copy()
+    df['Arrival Min'] = _clock_minutes(df['Arrival time'])
+    df['Departure Min'] = _clock_minutes(df['Departure Time'])
+    
+    df['Arrival Day'], df['Departure Day'] = _day_offsets(df)
+    
+    bad_arrival = df['Arrival Min'] < 0
+    bad_departure = df['Departure Min'] < 0
+    bad_rows = df[bad_arrival | bad_departure]
+    report = {
+        'rows': len(df),
+        'malformed_arrival': int(bad_arrival.sum()),
+        'malformed_departure': int(bad_departure.sum()),
+        'malformed_rows': int(len(bad_rows)),
+        'trains_affected': int(bad_rows['Train No'].nunique()),
+        'examples': [
+            {
+                'train_no': str(row['Train No']),
+                'seq': int(row['SEQ']) if pd.notna(row['SEQ']) else None,
+                'arrival': None if pd.isna(row['Arrival time']) else str(row['Arrival time']),
+                'departure': None if pd.isna(row['Departure Time']) else str(row['Departure Time'])
+            }
+            for _, row in bad_rows.head(10).iterrows()
+        ]
+    }
+    return df, report
+
+
+def load_timetable(path=TIMETABLE_PATH):
+    """Read the timetable CSV and prepare it for ParetoTrainRouter"""
+    df = pd.read_csv(path)
+    df = df[df['Train No'].astype(str).str.len() == 5].copy()
+    df, report = normalize_timetable_times(df)
+    df.attrs['time_validation'] = report
+    if report['malformed_rows']:
+        warning(f"⚠ {report['malformed_rows']} of {report['rows']} timetable rows have malformed times "
+                f"({report['trains_affected']} trains); transfers at those stops are skipped")
+    return df
+
+
+def build_router(path=TIMETABLE_PATH, graph_backend='dict', transfer_windows=None, seat_provider=None,
+                 fare_engine=None, running_days=None):
+    """Load the timetable at `path` and build a router over it"""
+    with trace('build', timetable=path, graph_backend=graph_backend):
+        with stage('load'):
+            df = load_timetable(path)
+        return ParetoTrainRouter(df, graph_backend=graph_backend, transfer_windows=transfer_windows,
+                                 seat_provider=seat_provider, fare_engine=fare_engine, running_days=running_days)
+
+
+def prepare_query(source, destination, router, mode):
+    """Validate a query, loading the router if none is given; returns (error or None, router)"""
+    if mode not in SEARCH_MODES:
+        return {"error": f"Unknown search mode '{mode}'."}, router
+
+    if router is None:
+        # Load data
+        try:
+            router = build_router()
+        except FileNotFoundError:
+            return {"error": f"Could not find '{TIMETABLE_PATH}'."}, None
+        except Exception as e:
+            return {"error": str(e)}, None
 
     if source not in router.station_to_id:
         return {"error": f"Station '{source}' not found."}, router
@@ -585,28 +1526,173 @@ def get_routes_data(source, destination, max_transfers):
         return {"error": f"Station '{destination}' not found."}, router
     if source == destination:
         return {"error": "Origin and destination must be different."}, router
+    return None, router
+
+
+def _query_key(source, destination, max_transfers, mode, journey_date, quotas=None):
+    """Cache key of a query; undated queries with the default quotas keep the key they always had"""
+    key = (source, destination, max_transfers, mode)
+    if journey_date is not None:
+        key += (journey_date.isoformat(),)
+    if quotas:
+        key += (tuple(sorted(quotas.items())),)
+    return key
 
-    # PIPELINE: Generate → Optimize → Select
-    all_routes = router.generate_all_routes(source, destination, max_transfers)
 
-    if not all_routes:
-        return {"error": "No routes found!"}, router
+def _selection_quotas(quotas):
+    """
+    The overrides in `quotas` (n_fast, n_cheap and/or n_balanced, see
+    select_optimal_routes) that differ from the defaults; ValueError if invalid
+    """
+    defaults = {'n_fast': N_FAST, 'n_cheap': N_CHEAP, 'n_balanced': N_BALANCED}
+    quotas = {name: value for name, value in (quotas or {}).items() if value is not None}
+    unknown = [name for name in quotas if name not in defaults]
+    if unknown:
+        raise ValueError(f"Unknown selection quotas {unknown}, expected some of {list(defaults)}")
+    for name, value in quotas.items():
+        if isinstance(value, bool) or not isinstance(value, (int, np.integer)) or value < 0:
+            raise ValueError(f"Quota '{name}' must be a non-negative integer, got {value!r}")
+    return {name: int(value) for name, value in quotas.items() if value != defaults[name]}
 
-    # Save all routes to a CSV file
-    save_all_routes(router, all_routes, source, destination)
 
-    pareto_front = router.pareto_optimize(all_routes)
-    optimal_routes, categories = router.select_optimal_routes(pareto_front)
+def _results_prefix(source, destination, journey_date=None):
+    """Start of the result file names of a query"""
+    if journey_date is None:
+        return f"{source}_to_{destination}"
+    return f"{source}_to_{destination}_{journey_date.isoformat()}"
+
+
+def get_routes_data(source, destination, max_transfers, router=None, mode='heuristic', cache=None,
+                    export='sync', journey_date=None, quotas=None):
+    """
+    Run the full Generate → Optimize → Select pipeline for one query.
+    Pass an already built `router` to skip loading the timetable; the router
+    is only read from, so one instance can serve many queries concurrently.
+    `mode` picks the route generator (see SEARCH_MODES).
+    With a QueryCache, results are cached per router timetable version and
+    a cache hit skips the pipeline (and writing the result files).
+    `export` controls the CSV/JSON result files (see EXPORT_MODES).
+    A `journey_date` (date or 'YYYY-MM-DD') only routes over trains running
+    on the days they are boarded; see generate_all_routes.
+    `quotas` overrides the selection quotas, e.g. {'n_fast': 3, 'n_cheap': 3}
+    (see select_optimal_routes).
+    """
+    if export not in EXPORT_MODES:
+        return {"error": f"Unknown export mode '{export}'."}, router
+    try:
+        journey_date = parse_journey_date(journey_date)
+        quotas = _selection_quotas(quotas)
+    except ValueError as e:
+        return {"error": str(e)}, router
+    error, router = prepare_query(source, destination, router, mode)
+    if error:
+        return error, router
+
+    with trace('query', source=source, destination=destination, max_transfers=max_transfers, mode=mode):
+        cache_key = _query_key(source, destination, max_transfers, mode, journey_date, quotas)
+        version = getattr(router, 'timetable_version', None)
+        if cache is not None:
+            cached = cache.get(cache_key, version)
+            if cached is not None:
+                count('cache.hits')
+                return cached, router
+
+        # PIPELINE: Generate → Optimize → Select
+        # Objectives are evaluated once on the route set and reused when saving
+        all_routes = RouteSet(router.generate_all_routes(source, destination, max_transfers, mode,
+                                                         journey_date=journey_date),
+                              router.fare_engine)
+
+        if not all_routes:
+            return {"error": "No routes found!"}, router
+
+        pareto_front = router.pareto_optimize(all_routes)
+        optimal_routes, categories = router.select_optimal_routes(pareto_front, **quotas)
+
+        # Get JSON data, then save all routes and the results to CSV/JSON files
+        with stage('serialization'):
+            csv_rows, json_data = build_results(router, optimal_routes, categories,
+                                                all_routes, pareto_front, source, destination, journey_date)
+
+        def export_files():
+            prefix = _results_prefix(source, destination, journey_date)
+            save_all_routes(router, all_routes, source, destination, journey_date)
+            write_results(csv_rows, json_data, f"{prefix}_pareto_routes.csv", f"{prefix}_pareto_routes.json")
+
+        if export == 'sync':
+            with stage('export'):
+                export_files()
+        elif export == 'background':
+            get_result_writer().submit(export_files)
+
+        if cache is not None:
+            cache.put(cache_key, json_data, version)
+        return json_data, router
+
+def stream_routes_data(source, destination, max_transfers, router=None, mode='heuristic', cache=None,
+                       include_all=True, journey_date=None, quotas=None):
+    """
+    Streaming variant of get_routes_data. Returns (records, router), where
+    records is an {"error": ...} dict or an iterator of JSON-ready dicts:
+    one 'metadata' record, one 'optimal_route' record per selected route,
+    then (with include_all) one 'route' record per generated route. Each
+    generated route is only turned into JSON when it is consumed.
+
+    A cached payload is streamed if there is one. Streamed results are not
+    cached and no result files are written, since both need the full payload.
+    """
+    try:
+        journey_date = parse_journey_date(journey_date)
+        quotas = _selection_quotas(quotas)
+    except ValueError as e:
+        return {"error": str(e)}, router
+    error, router = prepare_query(source, destination, router, mode)
+    if error:
+        return error, router
+
+    with trace('query', source=source, destination=destination, max_transfers=max_transfers, mode=mode):
+        if cache is not None:
+            cached = cache.get(_query_key(source, destination, max_transfers, mode, journey_date, quotas),
+                               getattr(router, 'timetable_version', None))
+            if cached is not None:
+                count('cache.hits')
+                return _payload_records(cached, include_all), router
+
+        # PIPELINE: Generate → Optimize → Select
+        all_routes = RouteSet(router.generate_all_routes(source, destination, max_transfers, mode,
+                                                         journey_date=journey_date),
+                              router.fare_engine)
+
+        if not all_routes:
+            return {"error": "No routes found!"}, router
+
+        pareto_front = router.pareto_optimize(all_routes)
+        optimal_routes, categories = router.select_optimal_routes(pareto_front, **quotas)
+
+    def records():
+        yield {'type': 'metadata',
+               **_results_metadata(optimal_routes, all_routes, pareto_front, source, destination, journey_date)}
+        for route_json in _optimal_routes_results(router, optimal_routes, categories)[1]:
+            yield {'type': 'optimal_route', **route_json}
+        if include_all:
+            for route_json in iter_generated_routes_json(router, all_routes):
+                yield {'type': 'route', **route_json}
+
+    return records(), router
+
+
+def _payload_records(json_data, include_all=True):
+    """The records stream_routes_data yields, taken from a full get_routes_data payload"""
+    yield {'type': 'metadata', **json_data['metadata']}
+    for route_json in json_data['optimal_routes']:
+        yield {'type': 'optimal_route', **route_json}
+    if include_all:
+        for route_json in json_data['all_generated_routes']:
+            yield {'type': 'route', **route_json}
 
-    # Save and get JSON data
-    json_data = save_results(router, optimal_routes, categories,
-                             f"{source}_to_{destination}_pareto_routes.csv",
-                             f"{source}_to_{destination}_pareto_routes.json",
-                             all_routes, pareto_front, source, destination)
-    
-    return json_data, router
 
 def main():
+    add_hook(print_progress)
     print("\n" + "="*80)
     print(" PARETO-OPTIMAL TRAIN ROUTE OPTIMIZER")
     print(" Multi-Objective Optimization: Time | Cost | Transfers | Comfort | Safety")
@@ -625,11 +1711,13 @@ def main():
         except ValueError:
             print("Invalid input")
 
+    journey_date = input("Journey date (YYYY-MM-DD, blank for any day): ").strip() or None
+
     print("\n" + "="*80)
     print("STARTING PARETO OPTIMIZATION PIPELINE")
     print("="*80)
     
-    results, router = get_routes_data(source, destination, max_transfers)
+    results, router = get_routes_data(source, destination, max_transfers, journey_date=journey_date)
 
     if "error" in results:
         print(f"Error: {results['error']}")
@@ -657,10 +1745,10 @@ def main():
     print("\n💾 Results also saved to JSON and CSV files.")
 
 
-def save_all_routes(router, all_routes, source, destination):
+def save_all_routes(router, all_routes, source, destination, journey_date=None):
     """Save all generated routes to a CSV file."""
-    csv_file = f"{source}_to_{destination}_all_routes.csv"
-    print(f"\n💾 Saving all {len(all_routes)} generated routes to {csv_file}...")
+    csv_file = f"{_results_prefix(source, destination, journey_date)}_all_routes.csv"
+    progress(f"\n💾 Saving all {len(all_routes)} generated routes to {csv_file}...")
 
     # Prepare CSV data
     csv_rows = []
@@ -684,27 +1772,50 @@ def save_all_routes(router, all_routes, source, destination):
 
     # Save CSV
     df_out = pd.DataFrame(csv_rows)
-    df_out.to_csv(csv_file, index=False)
-    print(f"✓ All routes saved successfully.")
+    atomic_write(csv_file, lambda f: df_out.to_csv(f, index=False), encoding='utf-8', newline='')
+    progress(f"✓ All routes saved successfully.")
 
 
 def save_results(router, optimal_routes, categories, csv_file, json_file,
                  all_routes, pareto_front, source, destination):
     """Save optimization results to CSV and JSON, and return JSON data"""
+    csv_rows, json_data = build_results(router, optimal_routes, categories,
+                                        all_routes, pareto_front, source, destination)
+    write_results(csv_rows, json_data, csv_file, json_file)
+    return json_data
 
-    # Prepare CSV data
-    csv_rows = []
+
+def build_results(router, optimal_routes, categories, all_routes, pareto_front, source, destination,
+                  journey_date=None):
+    """CSV rows and JSON data of the optimization results, without writing anything"""
+    csv_rows, optimal_json = _optimal_routes_results(router, optimal_routes, categories)
     json_data = {
-        'metadata': {
-            'source': source,
-            'destination': destination,
-            'total_routes_generated': len(all_routes),
-            'pareto_front_size': len(pareto_front),
-            'optimal_routes_count': len(optimal_routes)
-        },
-        'optimal_routes': [], # Renamed 'routes' to 'optimal_routes' for clarity
-        'all_generated_routes': [] # New key for all routes
+        'metadata': _results_metadata(optimal_routes, all_routes, pareto_front, source, destination, journey_date),
+        'optimal_routes': optimal_json, # Renamed 'routes' to 'optimal_routes' for clarity
+        'all_generated_routes': list(iter_generated_routes_json(router, all_routes)) # New key for all routes
+    }
+    return csv_rows, json_data
+
+
+def _results_metadata(optimal_routes, all_routes, pareto_front, source, destination, journey_date=None):
+    metadata = {
+        'source': source,
+        'destination': destination,
+        'total_routes_generated': len(all_routes),
+        'pareto_front_size': len(pareto_front),
+        'optimal_routes_count': len(optimal_routes)
     }
+    if journey_date is not None:
+        metadata['journey_date'] = journey_date.isoformat()
+    return metadata
+
+
+def _optimal_routes_results(router, optimal_routes, categories):
+    """CSV rows and JSON of the selected routes"""
+
+    # Prepare CSV data
+    csv_rows = []
+    optimal_json = []
 
     for idx, (route_data, category) in enumerate(zip(optimal_routes, categories), 1):
         route = route_data['route']
@@ -740,6 +1851,8 @@ def save_results(router, optimal_routes, categories, csv_file, json_file,
                 'Seat Probability (%)': round(obj['seat_prob'], 2),
                 'Safety Score': round(obj['safety_score'], 2)
             })
+            if 'date' in segment:
+                csv_rows[-1]['Date'] = segment['date']
 
             route_json['segments'].append({
                 'train_no': segment['train_no'],
@@ -752,12 +1865,19 @@ def save_results(router, optimal_routes, categories, csv_file, json_file,
                 'duration_min': round(segment['duration'] * 60, 2),
                 'wait_min': round(segment['wait_before'] * 60, 2)
             })
+            if 'date' in segment:
+                route_json['segments'][-1]['date'] = segment['date']
 
-        json_data['optimal_routes'].append(route_json) # Append to optimal_routes
-    
+        optimal_json.append(route_json) # Append to optimal_routes
+
+    return csv_rows, optimal_json
+
+
+def iter_generated_routes_json(router, all_routes):
+    """JSON of every generated route, one at a time"""
     # Process all generated routes for JSON output
-    for idx, route in enumerate(all_routes, 1):
-        obj = router.calculate_route_objectives(route)
+    all_routes = RouteSet.of(all_routes, router.fare_engine)
+    for idx, (route, obj) in enumerate(zip(all_routes, all_routes.objectives()), 1):
         
         num_transfers = len(route) - 1
         if num_transfers == 0:
@@ -787,15 +1907,16 @@ def save_results(router, optimal_routes, categories, csv_file, json_file,
                 'duration_min': round(segment['duration'] * 60, 2),
                 'wait_min': round(segment['wait_before'] * 60, 2)
             })
-        json_data['all_generated_routes'].append(route_json)
+            if 'date' in segment:
+                route_json['segments'][-1]['date'] = segment['date']
+        yield route_json
 
 
+def write_results(csv_rows, json_data, csv_file, json_file):
+    """Write results CSV and JSON; each file is replaced atomically"""
     # Save CSV
     df_out = pd.DataFrame(csv_rows)
-    df_out.to_csv(csv_file, index=False)
+    atomic_write(csv_file, lambda f: df_out.to_csv(f, index=False), encoding='utf-8', newline='')
 
     # Save JSON file
-    with open(json_file, 'w') as f:
-        json.dump(json_data, f, indent=2)
-
-    return json_data
+    atomic_write(json_file, lambda f: json.dump(json_data, f, indent=2))
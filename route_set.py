@@ -0,0 +1,131 @@
+"""
+Candidate routes with their objectives evaluated in one vectorized pass.
+
+A RouteSet flattens every segment of every route into arrays and reduces
+them per route, giving the same values as
+ParetoTrainRouter.calculate_route_objectives. The objective dicts are cached
+on the set, so pareto_optimize and save_results share one evaluation. Fares
+for every segment come from one fares() call on the router's fare engine.
+"""
+from collections.abc import Sequence
+
+import numpy as np
+
+from fares import FlatFare
+from instrumentation import stage
+from pareto import OBJECTIVES
+
+# Trains numbered below this are the popular express trains with a safety bonus
+EXPRESS_TRAIN_LIMIT = 15000
+
+
+def _route_sums(values, starts, lengths):
+    """
+    Per-route sums of the flattened `values`, bit-for-bit equal to Python's
+    sum() over each route. Since 3.12 sum() adds floats with Neumaier
+    compensation, so routes are summed one segment position at a time.
+    """
+    total = values[starts].copy()
+    compensation = np.zeros(len(starts))
+    for k in range(1, int(lengths.max()) if len(lengths) else 0):
+        has = lengths > k
+        x = values[starts[has] + k]
+        f = total[has]
+        t = f + x
+        compensation[has] += np.where(np.abs(f) >= np.abs(x), (f - t) + x, (x - t) + f)
+        total[has] = t
+    finite = np.isfinite(compensation) & (compensation != 0)
+    total[finite] += compensation[finite]
+    return total
+
+
+class RouteSet(Sequence):
+    """A list of routes (lists of segment dicts) plus cached objective columns"""
+
+    def __init__(self, routes, fare_engine=None):
+        self.routes = list(routes)
+        self.fare_engine = fare_engine if fare_engine is not None else FlatFare()
+        self._columns = None
+        self._objectives = None
+
+    @classmethod
+    def of(cls, routes, fare_engine=None):
+        """`routes` itself if it already is a RouteSet, so its cache is kept"""
+        return routes if isinstance(routes, cls) else cls(routes, fare_engine)
+
+    def __len__(self):
+        return len(self.routes)
+
+    def __getitem__(self, index):
+        return self.routes[index]
+
+    def __iter__(self):
+        return iter(self.routes)
+
+    def columns(self):
+        """Objective name → per-route array, computed on first use"""
+        if self._columns is None:
+            with stage('objectives'):
+                self._columns = self._evaluate()
+        return self._columns
+
+    def objectives(self):
+        """Per-route objective dicts, as calculate_route_objectives returns them"""
+        if self._objectives is None:
+            columns = self.columns()
+            names = list(columns)
+            with stage('objectives'):
+                self._objectives = [
+                    dict(zip(names, values))
+                    for values in zip(*(columns[name].tolist() for name in names))
+                ]
+        return self._objectives
+
+    def matrix(self):
+        """(routes × objectives) matrix in the minimization form pareto.py uses"""
+        columns = self.columns()
+        return np.column_stack([columns[name] * float(sense) for name, sense in OBJECTIVES]).reshape(
+            len(self), len(OBJECTIVES))
+
+    def _evaluate(self):
+        lengths = np.fromiter((len(route) for route in self.routes), dtype=np.int64, count=len(self.routes))
+        if not len(lengths):
+            empty = np.zeros(0)
+            return {'time': empty, 'cost': empty, 'transfers': np.zeros(0, dtype=np.int64),
+                    'seat_prob': empty, 'safety_score': np.zeros(0, dtype=np.int64), 'distance': empty}
+
+        segments = [segment for route in self.routes for segment in route]
+        count = len(segments)
+        duration = np.fromiter((s['duration'] for s in segments), dtype=float, count=count)
+        wait = np.fromiter((s['wait_before'] for s in segments), dtype=float, count=count)
+        distance = np.fromiter((s['distance'] for s in segments), dtype=float, count=count)
+        seats = np.fromiter((s['seat_available'] for s in segments), dtype=float, count=count)
+
+        # Each train number is parsed once, however many routes use it
+        express_trains = {}
+
+        def is_express(train_no):
+            express = express_trains.get(train_no)
+            if express is None:
+                express = express_trains[train_no] = int(train_no) < EXPRESS_TRAIN_LIMIT
+            return express
+
+        express = np.fromiter((is_express(s['train_no']) for s in segments), dtype=bool, count=count)
+
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        total_distance = _route_sums(distance, starts, lengths)
+        transfers = lengths - 1
+
+        # -5 points per transfer (floor 50), +5 (capped at 100) for an express train
+        safety = np.maximum(100 - transfers * 5, 50)
+        safety = np.where(np.logical_or.reduceat(express, starts), np.minimum(safety + 5, 100), safety)
+
+        return {
+            'time': _route_sums(duration + wait, starts, lengths) * 60,
+            'cost': _route_sums(self.fare_engine.fares(distance), starts, lengths),
+            'transfers': transfers,
+            # np.mean, unlike sum(), adds without compensation
+            'seat_prob': np.add.reduceat(seats, starts) / lengths * 100,
+            'safety_score': safety,
+            'distance': total_distance
+        }
@@ -0,0 +1,187 @@
+import os
+import threading
+
+from route_optimizer import TIMETABLE_PATH, build_router
+from seat_availability import MemoizedSeatProvider, TableSeatProvider
+from snapshot import SnapshotError, build_snapshot, load_snapshot, timetable_hash
+from timetable_updates import apply_train_updates, read_timetable_diff
+
+
+class RouterService:
+    """
+    Long-lived, thread-safe holder for a built ParetoTrainRouter.
+
+    The graph is built once and shared by every request. Reloads build a new
+    router in a background thread and swap the reference in one assignment,
+    so a request that already holds a router keeps using a complete graph.
+
+    With a `snapshot_path` the router is memory-mapped from that snapshot
+    (always the CSR backend); a missing or stale snapshot is rebuilt from
+    the timetable first.
+
+    With a `seat_table` (CSV, see seat_availability.TableSeatProvider) seat
+    availability is read from that table instead of the hashed default.
+
+    Every router gets a `timetable_version` (the SHA-256 of the timetable it
+    was built from, plus that of the seat table), which keys query caches.
+
+    Train updates (see timetable_updates.py) are applied to a copy of the
+    current router, which is then swapped in the same way; readers never
+    wait for them. Every swap, by an update or a reload, happens under
+    `_update_lock`, and an update whose router was replaced while it was
+    being applied is applied again to the new one. A reload builds from
+    the timetable file again, dropping updates not written to it.
+    """
+
+    def __init__(self, path=TIMETABLE_PATH, graph_backend='dict', snapshot_path=None, seat_table=None):
+        self.path = path
+        self.graph_backend = 'csr' if snapshot_path else graph_backend
+        self.snapshot_path = snapshot_path
+        self.seat_table = seat_table
+        self._router = None
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._reload_thread = None
+        self._update_lock = threading.Lock()
+        self.updates = []
+        self.last_error = None
+
+    def warm_up(self):
+        """Start building the router in the background if nothing is loaded yet"""
+        if self._router is None:
+            self.reload()
+
+    def get(self, timeout=None):
+        """
+        Return the current router, building it on first use.
+        Raises the last build error if no router could be built.
+        """
+        if self._router is None:
+            self.reload(wait=True, timeout=timeout)
+        router = self._router
+        if router is None:
+            raise self.last_error or RuntimeError("Router is not available.")
+        return router
+
+    def reload(self, wait=False, timeout=None):
+        """
+        Rebuild the router from the timetable file in a background thread.
+        Returns False if a reload is already running (that one is reused).
+        """
+        with self._lock:
+            running = self._reload_thread is not None and self._reload_thread.is_alive()
+            if not running:
+                self._reload_thread = threading.Thread(target=self._rebuild, name="router-reload", daemon=True)
+                self._reload_thread.start()
+            thread = self._reload_thread
+
+        if wait:
+            thread.join(timeout)
+        return not running
+
+    def reload_if_changed(self, wait=False):
+        """Reload only when the timetable file changed since the last build"""
+        if self.timetable_changed():
+            return self.reload(wait=wait)
+        return False
+
+    def apply_updates(self, changes):
+        """
+        Apply (action, train_no, stops frame or None) changes to the current
+        router and swap in the result. Returns a summary of the update;
+        raises TimetableUpdateError, leaving the router as it was, if any
+        change is invalid.
+        """
+        changes = list(changes)
+        while True:
+            # Build the copy outside the lock, so a reload finishing meanwhile is not held up
+            router = self.get()
+            updated = apply_train_updates(router, changes)
+            with self._update_lock:
+                if self._router is not router:
+                    continue
+                self._router = updated
+                summary = {action: [str(train_no) for act, train_no, _ in changes if act == action]
+                           for action in ('add', 'replace', 'remove')}
+                summary['timetable_version'] = getattr(updated, 'timetable_version', None)
+                self.updates.append(summary)
+                return summary
+
+    def add_train(self, train_no, stops):
+        return self.apply_updates([('add', train_no, stops)])
+
+    def replace_train(self, train_no, stops):
+        return self.apply_updates([('replace', train_no, stops)])
+
+    def remove_train(self, train_no):
+        return self.apply_updates([('remove', train_no, None)])
+
+    def apply_diff(self, path):
+        """Apply every change of a diff file (see timetable_updates.read_timetable_diff)"""
+        return self.apply_updates(read_timetable_diff(path))
+
+    def timetable_changed(self):
+        try:
+            return os.path.getmtime(self.path) != self._mtime
+        except OSError:
+            return False
+
+    def status(self):
+        return {
+            'loaded': self._router is not None,
+            'reloading': self._reload_thread is not None and self._reload_thread.is_alive(),
+            'timetable': self.path,
+            'graph_backend': self.graph_backend,
+            'snapshot': self.snapshot_path,
+            'seat_table': self.seat_table,
+            'timetable_mtime': self._mtime,
+            'last_error': str(self.last_error) if self.last_error else None,
+            'timetable_version': getattr(self._router, 'timetable_version', None),
+            'updates_applied': len(self.updates),
+            'fares': self._router.fare_engine.describe() if self._router else None,
+            'time_validation': self._router.time_validation if self._router else None
+        }
+
+    def _rebuild(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+            if self.snapshot_path:
+                router = self._load_snapshot()
+                router.timetable_version = router.snapshot_hash
+            else:
+                # Hash before building so the version never claims a newer file
+                version = timetable_hash(self.path)
+                router = build_router(self.path, self.graph_backend)
+                router.timetable_version = version
+            if self.seat_table:
+                router.seat_provider = MemoizedSeatProvider(TableSeatProvider.from_csv(self.seat_table))
+                router.timetable_version += '+' + timetable_hash(self.seat_table)
+        except Exception as e:
+            # Keep serving the previous graph if the new one fails to build
+            self.last_error = e
+        else:
+            with self._update_lock:
+                self._router = router
+                self._mtime = mtime
+                self.updates = []
+                self.last_error = None
+
+    def _load_snapshot(self):
+        try:
+            return load_snapshot(self.snapshot_path, self.path)
+        except (FileNotFoundError, SnapshotError):
+            build_snapshot(self.path, self.snapshot_path)
+            return load_snapshot(self.snapshot_path, self.path)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_router_service(path=TIMETABLE_PATH, graph_backend='dict', snapshot_path=None, seat_table=None):
+    """Return the process-wide RouterService, creating it on first call"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = RouterService(path, graph_backend, snapshot_path, seat_table)
+        return _service
@@ -0,0 +1,128 @@
+"""
+Running days of trains, for dated queries.
+
+Each train's running days are a 7-bit mask, bit d set when the train leaves
+its first station on weekday d (Monday = 0, as date.weekday()). Routers keep
+one mask per train index, so whether a ride runs on a date is one shift and
+one AND inside the search loops.
+
+A ride boards at a stop the train reaches some days after leaving its first
+station (the stop's day offset). The train must have left on the boarding
+day minus that offset, so a ride boarded after a transfer that waited past
+midnight is checked against the next day's bit.
+
+train_info.csv is expected to hold one row per train:
+
+    "Train_No","Train_Name","Source_Station_Name","Destination_Station_Name","days"
+    "107","SWV-MAO-VLNK","SAWANTWADI ROAD","MADGOAN JN.","Saturday"
+
+`days` lists weekday names ("Monday", "Mon,Wed", ...) or "Daily"; only the
+first three letters of a name count, so stray suffixes do not matter.
+Trains the table does not list, or whose days cannot be read, run daily.
+"""
+import datetime
+import functools
+import os
+import re
+
+import pandas as pd
+
+from instrumentation import warning
+
+TRAIN_INFO_PATH = 'train_info.csv'
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+DAILY = (1 << len(WEEKDAYS)) - 1
+
+
+def day_mask(days):
+    """Weekday mask of a `days` entry, or None if it names no day"""
+    mask = 0
+    for word in re.findall(r'[a-z]+', str(days).lower()):
+        if word in ('daily', 'all'):
+            return DAILY
+        if word[:3] in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(word[:3])
+    return mask or None
+
+
+def train_key(train_no):
+    """Train number as the running-day table keys it: numbers without leading zeros"""
+    key = str(train_no).strip()
+    return str(int(key)) if key.isdigit() else key.upper()
+
+
+def parse_journey_date(journey_date):
+    """A datetime.date from a date, datetime or 'YYYY-MM-DD' string; None stays None"""
+    if journey_date is None or type(journey_date) is datetime.date:
+        return journey_date
+    if isinstance(journey_date, datetime.datetime):
+        return journey_date.date()
+    try:
+        return datetime.date.fromisoformat(str(journey_date).strip())
+    except ValueError:
+        raise ValueError(f"Journey date must be YYYY-MM-DD, got '{journey_date}'") from None
+
+
+def travel_date(journey_date, day):
+    """ISO date `day` days after `journey_date`"""
+    return (journey_date + datetime.timedelta(days=day)).isoformat()
+
+
+class RunningDays:
+    """Train number → weekday mask; trains not listed run daily"""
+
+    def __init__(self, masks, unreadable=0):
+        self.masks = {train_key(train_no): mask for train_no, mask in masks.items()}
+        self.unreadable = unreadable
+
+    @classmethod
+    def from_csv(cls, path=TRAIN_INFO_PATH):
+        table = pd.read_csv(path, dtype=str)
+        missing = [column for column in ('Train_No', 'days') if column not in table.columns]
+        if missing:
+            raise ValueError(f"Running-day table '{path}' lacks columns {missing}")
+        masks = {}
+        unreadable = 0
+        for train_no, days in zip(table['Train_No'], table['days']):
+            if pd.isna(train_no):
+                continue
+            mask = day_mask(days) if not pd.isna(days) else None
+            if mask is None:
+                unreadable += 1
+                mask = DAILY
+            # A train listed twice runs on the days of both rows
+            key = train_key(train_no)
+            masks[key] = masks.get(key, 0) | mask
+        return cls(masks, unreadable)
+
+    def mask(self, train_no):
+        return self.masks.get(train_key(train_no), DAILY)
+
+    def masks_for(self, train_nos):
+        """Masks in the order of `train_nos`, as a list for the search loops"""
+        return [self.mask(train_no) for train_no in train_nos]
+
+    def describe(self):
+        return {'trains': len(self.masks), 'unreadable': self.unreadable,
+                'daily': sum(mask == DAILY for mask in self.masks.values())}
+
+
+@functools.lru_cache(maxsize=None)
+def _load_running_days(path, mtime):
+    try:
+        return RunningDays.from_csv(path)
+    except (OSError, ValueError, pd.errors.ParserError) as e:
+        warning(f"⚠ Cannot read running days from '{path}' ({e}); every train runs daily")
+        return RunningDays({})
+
+
+def load_running_days(path=TRAIN_INFO_PATH):
+    """
+    The RunningDays of the table at `path`, with every train running daily
+    if it is missing or unusable. Loaded once per file version and shared.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return RunningDays({})
+    return _load_running_days(os.path.abspath(path), mtime)
@@ -0,0 +1,102 @@
+"""
+Seat availability for the rides in a route.
+
+The router asks its seat provider, once per ride segment, whether a seat is
+free on train `train_no` from `from_station` to `to_station` on
+`journey_date` (None for undated queries), and gets 1 or 0 back. Answers
+never depend on process state, so objective values and Pareto fronts are the
+same across requests, cache entries and worker processes.
+
+    HashedSeatProvider     deterministic default, no data needed
+    TableSeatProvider      answers from a seat table, e.g. a booking export
+    MemoizedSeatProvider   LRU memo in front of either
+"""
+import functools
+import hashlib
+
+import pandas as pd
+
+from running_days import train_key
+
+# Share of rides with a free seat under HashedSeatProvider
+DEFAULT_SEAT_PROBABILITY = 0.8
+
+
+class SeatProvider:
+    """Interface: seat_available(train_no, from_station, to_station, journey_date=None) → 1 or 0"""
+
+    def seat_available(self, train_no, from_station, to_station, journey_date=None):
+        raise NotImplementedError
+
+
+class HashedSeatProvider(SeatProvider):
+    """
+    A stable hash of (train, from, to, date) decides, so about
+    `probability` of rides have a seat and a ride always gets the same
+    answer. Change `salt` to draw a different but equally stable sample.
+    """
+
+    def __init__(self, probability=DEFAULT_SEAT_PROBABILITY, salt=''):
+        self.probability = probability
+        self.salt = salt
+
+    def seat_available(self, train_no, from_station, to_station, journey_date=None):
+        key = f"{self.salt}|{train_no}|{from_station}|{to_station}|{journey_date or ''}".encode()
+        draw = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little') / 2 ** 64
+        return 1 if draw < self.probability else 0
+
+
+class TableSeatProvider(SeatProvider):
+    """
+    Seat availability from a table with columns Train No, From, To,
+    Seat Available and an optional Date (YYYY-MM-DD). Rows without a date
+    apply to every date; rides the table does not list go to `fallback`.
+    Train numbers match as running_days.train_key keys them, so 12345,
+    '12345' and '012345' are the same train in the table and in lookups.
+    """
+
+    def __init__(self, table, fallback=None):
+        self.fallback = fallback if fallback is not None else HashedSeatProvider()
+        dates = table['Date'] if 'Date' in table.columns else pd.Series([None] * len(table), index=table.index)
+        self.seats = {
+            (train_key(train_no), from_station, to_station, None if pd.isna(date) else str(date)): int(available)
+            for train_no, from_station, to_station, date, available in zip(
+                table['Train No'], table['From'], table['To'], dates, table['Seat Available'])
+        }
+
+    @classmethod
+    def from_csv(cls, path, fallback=None):
+        return cls(pd.read_csv(path, dtype={'Train No': str, 'Date': str}), fallback)
+
+    def seat_available(self, train_no, from_station, to_station, journey_date=None):
+        date = str(journey_date) if journey_date is not None else None
+        key = train_key(train_no)
+        found = self.seats.get((key, from_station, to_station, date))
+        if found is None and date is not None:
+            found = self.seats.get((key, from_station, to_station, None))
+        if found is None:
+            return self.fallback.seat_available(train_no, from_station, to_station, journey_date)
+        return found
+
+
+class MemoizedSeatProvider(SeatProvider):
+    """Thread-safe LRU memo of another provider's answers"""
+
+    def __init__(self, provider, max_entries=65536):
+        self.provider = provider
+        self._lookup = functools.lru_cache(maxsize=max_entries)(provider.seat_available)
+
+    def seat_available(self, train_no, from_station, to_station, journey_date=None):
+        return self._lookup(train_no, from_station, to_station, journey_date)
+
+    def stats(self):
+        info = self._lookup.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'entries': info.currsize, 'max_entries': info.maxsize}
+
+    def clear(self):
+        self._lookup.cache_clear()
+
+
+def default_seat_provider():
+    """The provider routers use unless given one: memoized HashedSeatProvider"""
+    return MemoizedSeatProvider(HashedSeatProvider())
@@ -0,0 +1,196 @@
+"""
+Versioned binary snapshots of a built ParetoTrainRouter.
+
+A snapshot holds the CSR graph, the stop table, the station and departure
+indexes and the string tables of a router, together with a SHA-256 of the timetable CSV it was
+built from. Arrays are stored uncompressed at aligned offsets and loaded
+with mmap, so every worker process on a host maps the same physical pages
+instead of parsing the CSV and building its own copy.
+
+    python snapshot.py build --csv Train_details.csv --out Train_details.snapshot
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from compact_graph import CompactGraph, CompactTrainInfo, DepartureIndex, StationIndex, TrainStops
+from route_optimizer import TIMETABLE_PATH, ParetoTrainRouter, build_router
+
+SNAPSHOT_MAGIC = b'RMSNAP\0\0'
+SNAPSHOT_VERSION = 5
+SNAPSHOT_PATH = 'Train_details.snapshot'
+
+# magic, format version, header length
+_PREAMBLE = struct.Struct('<8sIQ')
+_ALIGN = 64
+
+
+class SnapshotError(Exception):
+    """The file is not a snapshot this code can read"""
+
+
+class StaleSnapshotError(SnapshotError):
+    """The snapshot was built from a different timetable than the current one"""
+
+
+def timetable_hash(path=TIMETABLE_PATH):
+    """SHA-256 of the timetable file contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _json_default(value):
+    # NumPy scalars (e.g. integer train numbers) are not JSON serializable
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def write_snapshot(router, path=SNAPSHOT_PATH, source_hash=None):
+    """
+    Write a CSR router to `path`. The file is written next to the target and
+    renamed into place, so readers never map a half-written snapshot.
+    """
+    if router.graph_backend != 'csr':
+        raise ValueError("Only routers built with graph_backend='csr' can be snapshotted.")
+
+    sections = {
+        'graph': router.graph.state(),
+        'stops': router.stops.state(),
+        'train_info': router.train_info.state(),
+        'station_index': router.station_index.state(),
+        'departure_index': router.departure_index.state()
+    }
+    table = []
+    arrays = []
+    offset = 0
+    for section, (section_arrays, _) in sections.items():
+        for name, array in section_arrays.items():
+            array = np.ascontiguousarray(array)
+            offset = _aligned(offset)
+            table.append({'section': section, 'name': name, 'dtype': array.dtype.str,
+                          'shape': list(array.shape), 'offset': offset})
+            arrays.append((offset, array))
+            offset += array.nbytes
+
+    header = json.dumps({
+        'source_hash': source_hash,
+        'time_validation': router.time_validation,
+        'meta': {section: meta for section, (_, meta) in sections.items()},
+        'arrays': table
+    }, default=_json_default).encode('utf-8')
+    data_start = _aligned(_PREAMBLE.size + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)))
+            f.write(header)
+            for array_offset, array in arrays:
+                f.seek(data_start + array_offset)
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot_header(path=SNAPSHOT_PATH):
+    with open(path, 'rb') as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size:
+            raise SnapshotError(f"'{path}' is too short to be a router snapshot.")
+        magic, version, header_len = _PREAMBLE.unpack(preamble)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError(f"'{path}' is not a router snapshot.")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"'{path}' has snapshot format {version}, expected {SNAPSHOT_VERSION}.")
+        header = json.loads(f.read(header_len).decode('utf-8'))
+    header['data_start'] = _aligned(_PREAMBLE.size + header_len)
+    return header
+
+
+def load_snapshot(path=SNAPSHOT_PATH, timetable_path=TIMETABLE_PATH, source_hash=None):
+    """
+    Memory-map a snapshot and return a router over it.
+    The snapshot is refused with StaleSnapshotError unless it was built from
+    the timetable at `timetable_path` (or from content hashing to `source_hash`).
+    Pass timetable_path=None and no hash to skip the check.
+    """
+    header = read_snapshot_header(path)
+    if source_hash is None and timetable_path is not None:
+        source_hash = timetable_hash(timetable_path)
+    if source_hash is not None and header['source_hash'] != source_hash:
+        raise StaleSnapshotError(f"'{path}' was built from a different timetable; rebuild it.")
+
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    arrays = {section: {} for section in ('graph', 'stops', 'train_info', 'station_index', 'departure_index')}
+    for entry in header['arrays']:
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape']))
+        array = np.frombuffer(mapped, dtype=dtype, count=count, offset=header['data_start'] + entry['offset'])
+        arrays[entry['section']][entry['name']] = array.reshape(entry['shape'])
+
+    meta = header['meta']
+    stops = TrainStops.from_state(arrays['stops'], meta['stops'])
+    router = ParetoTrainRouter.from_compact(
+        CompactGraph.from_state(arrays['graph'], meta['graph']),
+        CompactTrainInfo.from_state(meta['train_info'], stops),
+        StationIndex.from_state(arrays['station_index'], meta['station_index']),
+        header['time_validation'],
+        departure_index=DepartureIndex.from_state(arrays['departure_index'], meta['departure_index'])
+    )
+    # The arrays are views into the mapping; keep it open as long as the router lives
+    router.snapshot_mmap = mapped
+    router.snapshot_hash = header['source_hash']
+    return router
+
+
+def build_snapshot(timetable_path=TIMETABLE_PATH, path=SNAPSHOT_PATH):
+    """Build a CSR router from the timetable CSV and write its snapshot"""
+    source_hash = timetable_hash(timetable_path)
+    router = build_router(timetable_path, graph_backend='csr')
+    write_snapshot(router, path, source_hash)
+    return router
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect router snapshots.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="build a snapshot from the timetable CSV")
+    build.add_argument('--csv', default=TIMETABLE_PATH)
+    build.add_argument('--out', default=SNAPSHOT_PATH)
+    info = commands.add_parser('info', help="print a snapshot's header and check it against the CSV")
+    info.add_argument('snapshot', nargs='?', default=SNAPSHOT_PATH)
+    info.add_argument('--csv', default=TIMETABLE_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        router = build_snapshot(args.csv, args.out)
+        print(f"✓ Snapshot written to {args.out}: {len(router.station_to_id)} stations, "
+              f"{router.graph.edge_count} edges, {os.path.getsize(args.out) / (1024 * 1024):.1f} MiB")
+    else:
+        header = read_snapshot_header(args.snapshot)
+        fresh = os.path.exists(args.csv) and header['source_hash'] == timetable_hash(args.csv)
+        print(f"Snapshot format {SNAPSHOT_VERSION}, source hash {header['source_hash']}")
+        print(f"  {len(header['arrays'])} arrays, up to date with {args.csv}: {fresh}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, as for the scripts in benchmarks/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.synthetic_timetable import synthetic_timetable  # noqa: E402
+from fares import FlatFare  # noqa: E402
+from route_optimizer import ParetoTrainRouter, normalize_timetable_times  # noqa: E402
+from running_days import RunningDays  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def timetable():
+    """A small synthetic timetable (40 stations, 120 trains), times already parsed"""
+    df, _ = normalize_timetable_times(synthetic_timetable(40, 120, 8, seed=3))
+    return df
+
+
+@pytest.fixture(scope='session')
+def router(timetable):
+    """Router over `timetable` with ₹1/km fares and every train running daily"""
+    return ParetoTrainRouter(timetable, fare_engine=FlatFare(), running_days=RunningDays({}))
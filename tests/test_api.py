@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('flask_cors')
+
+import api  # noqa: E402
+from instrumentation import add_hook, remove_hook  # noqa: E402
+from query_cache import QueryCache  # noqa: E402
+
+# Importing api registers its metrics hook for the whole process; only the API tests get it
+remove_hook(api.metrics)
+
+
+class StaticService:
+    """Stands in for the RouterService, serving the test router"""
+
+    def __init__(self, router):
+        self.router = router
+
+    def get(self):
+        return self.router
+
+
+@pytest.fixture
+def client(router, monkeypatch):
+    monkeypatch.setattr(api, 'router_service', StaticService(router))
+    monkeypatch.setattr(api, 'query_cache', QueryCache())
+    monkeypatch.setattr(api, 'route_export', 'none')
+    add_hook(api.metrics)
+    api.metrics.reset()
+    yield api.app.test_client()
+    remove_hook(api.metrics)
+
+
+@pytest.fixture
+def pair(router):
+    codes = sorted(router.station_to_id)
+    return codes[0], codes[5]
+
+
+def test_stream_sends_the_payload_as_ndjson(client, pair):
+    query = {'origin': pair[0], 'destination': pair[1], 'max_transfers': 2}
+    payload = client.get('/api/routes', query_string=query).get_json()
+    response = client.get('/api/routes', query_string={**query, 'stream': 1})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert records[0]['type'] == 'metadata'
+    assert records[0]['total_routes_generated'] == payload['metadata']['total_routes_generated']
+    optimal = [record for record in records if record['type'] == 'optimal_route']
+    generated = [record for record in records if record['type'] == 'route']
+    assert len(optimal) == payload['metadata']['optimal_routes_count']
+    assert len(generated) == payload['metadata']['total_routes_generated']
+
+    response = client.get('/api/routes', query_string={**query, 'stream': 1, 'include_all': 0})
+    types = [json.loads(line)['type'] for line in response.get_data(as_text=True).splitlines()]
+    assert 'route' not in types and types.count('optimal_route') == len(optimal)
+
+
+@pytest.mark.parametrize('params', [{'stream': 'x'}, {'stream': -1}, {'stream': 1, 'include_all': 'no'},
+                                    {'max_transfers': 'two'}, {'n_fast': '-2'}, {'mode': 'raptor'}])
+def test_invalid_parameters_are_rejected(client, pair, params):
+    response = client.get('/api/routes', query_string={'origin': pair[0], 'destination': pair[1], **params})
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_metrics_endpoint(client, pair):
+    client.get('/api/routes', query_string={'origin': pair[0], 'destination': pair[1], 'max_transfers': 2})
+    snapshot = client.get('/api/metrics').get_json()
+    assert snapshot['enabled'] == api.metrics_enabled
+    assert snapshot['traces']['query']['count'] == 1
+    assert {'generate.direct', 'generate.single_transfer', 'generate.multi_transfer', 'pareto',
+            'selection'} <= set(snapshot['stages'])
+    assert snapshot['counters']['routes.selected'] > 0
+    assert snapshot['recent'][-1]['source'] == pair[0]
+
+    # reset=1 answers with the snapshot, then starts over
+    assert client.get('/api/metrics', query_string={'reset': 1}).get_json()['traces'] == snapshot['traces']
+    assert client.get('/api/metrics').get_json()['traces'] == {}
+    assert client.get('/api/metrics', query_string={'reset': 'yes'}).status_code == 400
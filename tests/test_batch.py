@@ -0,0 +1,57 @@
+import pytest
+
+from batch import read_batch, route_batch, write_batch
+from test_route_search import check_route
+
+
+def trains(routes):
+    return sorted(tuple(segment['train_no'] for segment in route) for route in routes)
+
+
+@pytest.mark.parametrize('mode', ['heuristic', 'directed'])
+@pytest.mark.parametrize('journey_date', [None, '2026-10-17'])
+def test_origin_search_equals_single_queries(router, mode, journey_date):
+    codes = sorted(router.station_to_id)
+    source, destinations = codes[0], codes[1:]
+    routes = router.generate_routes_from(source, destinations, 3, mode, journey_date)
+    assert list(routes) == destinations
+    for destination in destinations:
+        assert routes[destination] == router.generate_all_routes(source, destination, 3, mode,
+                                                                 journey_date=journey_date)
+
+
+def test_shared_bfs_differs_only_in_multi_transfer_routes(router):
+    codes = sorted(router.station_to_id)
+    source, destinations = codes[0], codes[1:]
+    exact = router.generate_routes_from(source, destinations, 3)
+    shared = router.generate_routes_from(source, destinations, 3, shared_bfs=True)
+    # The shared BFS visits stations once for all destinations, so some of
+    # them get other multi-transfer routes than a single query finds
+    assert [d for d in destinations if trains(shared[d]) != trains(exact[d])]
+    for destination in destinations:
+        assert trains(r for r in shared[destination] if len(r) <= 2) == \
+            trains(r for r in exact[destination] if len(r) <= 2)
+        for route in shared[destination]:
+            check_route(route, source, destination, 3)
+            # A route never passes through its own destination
+            assert destination not in [segment['to'] for segment in route[:-1]]
+
+
+def test_raptor_mode_reads_one_search(router):
+    codes = sorted(router.station_to_id)
+    routes = router.generate_routes_from(codes[0], codes[5:8], 2, 'raptor')
+    for destination in codes[5:8]:
+        assert routes[destination] == router.generate_all_routes(codes[0], destination, 2, 'raptor')
+
+
+def test_route_batch_reports_bad_pairs(router, tmp_path):
+    codes = sorted(router.station_to_id)
+    pairs = [(codes[0], codes[3]), (codes[0], 'NOPE'), (codes[1], codes[1]), (codes[2].lower(), codes[9])]
+    results = route_batch(pairs, 2, router, workers=1)
+    assert list(results) == [(codes[0], codes[3]), (codes[0], 'NOPE'), (codes[1], codes[1]), (codes[2], codes[9])]
+    assert results[(codes[0], 'NOPE')][0] == "Station 'NOPE' not found."
+    assert results[(codes[1], codes[1])][0] == "Origin and destination must be different."
+
+    columns = read_batch(write_batch(results, str(tmp_path / 'board.npz')))
+    assert columns['pair_source'].tolist() == [origin for origin, _ in results]
+    assert len(columns['route_pair']) == sum(len(selected) for _, _, _, selected in results.values())
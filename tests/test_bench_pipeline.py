@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+
+# bench_pipeline imports its neighbours as a script run from benchmarks/ would
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+import bench_pipeline  # noqa: E402
+
+
+def result(build_s, query_ms, digest='abc', timetable=None):
+    return {
+        'timetable': timetable or {**bench_pipeline.GOLDEN_TIMETABLE, 'rows': 10, 'graph_stations': 5},
+        'max_transfers': 3,
+        'stages': {stage: {'total_s': build_s, 'peak_bytes': 0} for stage in bench_pipeline.STAGES},
+        'queries': {'A-B/heuristic': {'digest': digest, 'ms': query_ms}}
+    }
+
+
+def test_compare_flags_slower_stages(capsys):
+    baseline = result(1.0, {'generate': 100.0, 'pareto': 10.0, 'select': 1.0, 'save': 5.0})
+    current = result(1.05, {'generate': 150.0, 'pareto': 5.0, 'select': 1.0, 'save': 5.0})
+    assert bench_pipeline.compare(current, baseline, 0.10) == ['generate']
+    output = capsys.readouterr().out
+    assert '✗ slower' in output and '✓ faster' in output
+
+
+def test_check_golden():
+    golden = {'timetable': dict(bench_pipeline.GOLDEN_TIMETABLE), 'max_transfers': 3,
+              'queries': {'A-B/heuristic': 'abc'}}
+    assert bench_pipeline.check_golden(result(1.0, {}), golden) == []
+    assert bench_pipeline.check_golden(result(1.0, {}, digest='other'), golden) == ['A-B/heuristic']
+    # Golden digests only hold for the golden timetable
+    other = result(1.0, {}, timetable={**bench_pipeline.GOLDEN_TIMETABLE, 'seed': 9})
+    assert bench_pipeline.check_golden(other, golden) is None
+
+
+def test_benchmark_run(tmp_path):
+    args = argparse.Namespace(stations=30, trains=60, stops=6, seed=1, max_transfers=2,
+                              modes=['heuristic', 'directed'], repeat=1)
+    run = bench_pipeline.benchmark(args, [('ADI', 'KOTA'), ('CBE', 'HWH')], str(tmp_path))
+    assert set(run['queries']) == {'ADI-KOTA/heuristic', 'ADI-KOTA/directed', 'CBE-HWH/heuristic',
+                                   'CBE-HWH/directed'}
+    assert set(run['stages']) <= set(bench_pipeline.STAGES) and 'build' in run['stages']
+    for query in run['queries'].values():
+        assert query['digest'] is None or len(query['digest']) == 64
+    # The same timetable and queries give the same digests
+    again = bench_pipeline.benchmark(args, [('ADI', 'KOTA'), ('CBE', 'HWH')], str(tmp_path))
+    assert {name: q['digest'] for name, q in again['queries'].items()} == \
+        {name: q['digest'] for name, q in run['queries'].items()}
@@ -0,0 +1,60 @@
+from collections import deque
+
+import pytest
+
+from route_optimizer import MINUTES_PER_DAY
+from running_days import parse_journey_date
+
+
+def fifo_bfs(router, source_id, dest_id, max_transfers, max_routes=100, journey_date=None):
+    """
+    The multi-transfer BFS as it was before parent pointers: one state
+    popped at a time, each carrying a copy of its segment list
+    """
+    routes = []
+    queue = deque([(source_id, [], 0, 0, -1, -1)])
+    visited = set()
+    queued = set()
+    stop_cache = {}
+    while queue and len(routes) < max_routes:
+        station, path, transfers, dist, arrival_min, last_train = queue.popleft()
+        if station == dest_id and path:
+            routes.append(path)
+            continue
+        [rides] = router._expand_ride_states(dest_id, max_transfers,
+                                             [(station, bool(path), transfers, dist, arrival_min, last_train)],
+                                             queued, stop_cache, journey_date=journey_date)
+        if rides is None or (station, transfers) in visited:
+            continue
+        visited.add((station, transfers))
+        for next_id, train, board, k, new_dist, new_transfers, wait_minutes, arrival in rides:
+            if next_id != dest_id:
+                if (next_id, new_transfers) in queued:
+                    continue
+                queued.add((next_id, new_transfers))
+            day = (arrival_min + wait_minutes) // MINUTES_PER_DAY if journey_date is not None and path else 0
+            segment = router._ride_segment(train, board, k, wait_minutes / 60, journey_date, day)
+            queue.append((next_id, path + [segment], new_transfers, new_dist, arrival, train))
+    return routes
+
+
+@pytest.mark.parametrize('journey_date', [None, '2026-10-17'])
+@pytest.mark.parametrize('max_routes', [5, 100])
+def test_parent_pointers_give_the_fifo_routes(router, journey_date, max_routes):
+    journey_date = parse_journey_date(journey_date)
+    codes = sorted(router.station_to_id)
+    source_id = router.station_to_id[codes[1]]
+    for destination in codes[2:12]:
+        dest_id = router.station_to_id[destination]
+        assert router._find_multi_transfer_routes(source_id, dest_id, 3, max_routes, journey_date=journey_date) == \
+            fifo_bfs(router, source_id, dest_id, 3, max_routes, journey_date)
+
+
+def test_path_from_node_follows_parents(router):
+    # Two routes sharing their first ride: nodes 1 and 2 both hang off node 0
+    nodes = [(-1, 0, 0, 1, 0, 0), (0, 1, 0, 2, 45, 0), (0, 2, 0, 1, 90, 1)]
+    first, second = router._path_from_node(nodes, 1), router._path_from_node(nodes, 2)
+    assert first[0] == second[0] == router._ride_segment(0, 0, 1)
+    assert first[1] == router._ride_segment(1, 0, 2, 45 / 60)
+    assert second[1] == router._ride_segment(2, 0, 1, 90 / 60, None, 1)
+    assert router._path_from_node(nodes, -1) == []
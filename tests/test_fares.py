@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from fares import FareEngine, FareTableError, FlatFare, load_fare_engine
+from instrumentation import add_hook, remove_hook
+
+TABLE = """Class,Distance From,Distance To,Fare
+SL,1,50,80
+SL,51,100,110
+SL,101,500,300
+3A,1,100,400
+3A,101,500,900
+"""
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = tmp_path / 'price_data.csv'
+    path.write_text(TABLE)
+    return str(path)
+
+
+def test_slab_lookup(table):
+    engine = FareEngine.from_csv(table)
+    assert engine.default_class == 'SL' and engine.classes == ('3A', 'SL')
+    distances = [0, 1, 50, 50.5, 51, 100, 101, 499, 5000]
+    assert [engine.fare(d) for d in distances] == [80, 80, 80, 80, 110, 110, 300, 300, 300]
+    assert [engine.fare(d, '3A') for d in (10, 101)] == [400, 900]
+    # The array lookup gives the scalar one's values
+    assert engine.fares(distances).tolist() == [engine.fare(d) for d in distances]
+    with pytest.raises(ValueError):
+        engine.fare(10, '1A')
+
+
+def test_flat_fare():
+    assert FlatFare(2.0).fare(12.5) == 25.0
+    assert FlatFare().fares([1, 2.5]).tolist() == [1.0, 2.5]
+
+
+@pytest.mark.parametrize('content', ['version https://git-lfs.github.com/spec/v1\noid sha256:abc\n',
+                                     'Class,Fare\nSL,80\n'])
+def test_unusable_tables_fall_back_to_flat_fares(tmp_path, content):
+    path = tmp_path / 'price_data.csv'
+    path.write_text(content)
+    with pytest.raises(FareTableError):
+        FareEngine.from_csv(str(path))
+    events = []
+    add_hook(events.append)
+    try:
+        engine = load_fare_engine(str(path))
+    finally:
+        remove_hook(events.append)
+    assert isinstance(engine, FlatFare)
+    assert [event['type'] for event in events] == ['warning']
+
+
+def test_fare_engine_is_loaded_once_per_file_version(table, tmp_path):
+    assert load_fare_engine(table) is load_fare_engine(table)
+    assert isinstance(load_fare_engine(str(tmp_path / 'missing.csv')), FlatFare)
+
+
+def test_route_cost_is_one_fare_per_ride(router, table, monkeypatch):
+    engine = FareEngine.from_csv(table)
+    monkeypatch.setattr(router, 'fare_engine', engine)
+    codes = sorted(router.station_to_id)
+    for route in router.generate_all_routes(codes[0], codes[6], 2):
+        cost = router.calculate_route_objectives(route)['cost']
+        assert cost == sum(engine.fare(segment['distance']) for segment in route)
+        assert cost == np.sum(engine.fares([segment['distance'] for segment in route]))
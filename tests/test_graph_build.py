@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from fares import FlatFare
+from route_optimizer import ParetoTrainRouter
+from running_days import RunningDays
+
+
+def build(timetable, **options):
+    return ParetoTrainRouter(timetable, fare_engine=FlatFare(), running_days=RunningDays({}), **options)
+
+
+def test_vectorized_build_matches_rowwise(timetable, router):
+    rowwise = build(timetable, vectorized_build=False)
+    assert rowwise.station_to_id == router.station_to_id
+    assert rowwise.train_info == router.train_info
+    assert set(rowwise.graph) == set(router.graph)
+    for station_id, edges in router.graph.items():
+        assert rowwise.graph[station_id] == edges
+    for name in ('train_offsets', 'station', 'seq', 'arr_min', 'dep_min', 'distance'):
+        assert np.array_equal(getattr(rowwise.stops, name), getattr(router.stops, name))
+
+
+@pytest.fixture(scope='module')
+def csr_router(timetable):
+    return build(timetable, graph_backend='csr')
+
+
+def test_csr_graph_matches_dict_graph(router, csr_router):
+    assert csr_router.station_to_id == router.station_to_id
+    assert dict(csr_router.train_info) == router.train_info
+    assert csr_router.graph.edge_count == sum(len(edges) for edges in router.graph.values())
+    for station_id in range(len(router.station_to_id)):
+        assert list(csr_router.graph.get(station_id, [])) == router.graph.get(station_id, [])
+
+
+@pytest.mark.parametrize('mode', ['heuristic', 'directed', 'raptor'])
+def test_csr_router_finds_the_same_routes(router, csr_router, mode):
+    codes = sorted(router.station_to_id)
+    for destination in codes[1:6]:
+        assert csr_router.generate_all_routes(codes[0], destination, 2, mode) == \
+            router.generate_all_routes(codes[0], destination, 2, mode)
@@ -0,0 +1,55 @@
+import pytest
+
+from instrumentation import Metrics, add_hook, count, enabled, peak, remove_hook, stage, trace, tracing, warning
+
+
+@pytest.fixture
+def events():
+    collected = []
+    add_hook(collected.append)
+    yield collected
+    remove_hook(collected.append)
+
+
+def test_nested_traces_emit_one_event(events):
+    with trace('query', source='PGT'):
+        with stage('generate'):
+            count('routes', 2)
+        with trace('query', source='other', destination='KOTA'):
+            with stage('generate'):
+                count('routes', 3)
+            peak('queue_peak', 4)
+            peak('queue_peak', 2)
+    assert len(events) == 1
+    event = events[0]
+    assert event['type'] == 'query' and event['source'] == 'PGT' and event['destination'] == 'KOTA'
+    assert event['counters'] == {'routes': 5, 'queue_peak': 4}
+    assert set(event['stages']) == {'generate'} and event['seconds'] >= event['stages']['generate']
+
+
+def test_nothing_is_recorded_without_hooks():
+    assert not enabled()
+    with trace('query'):
+        assert not tracing()
+        count('routes')
+
+
+def test_metrics_aggregates_events(events):
+    metrics = Metrics(recent=2)
+    add_hook(metrics)
+    try:
+        for routes in (1, 2, 3):
+            with trace('query', n=routes), stage('pareto'):
+                count('routes', routes)
+                peak('bfs.queue_peak', routes * 10)
+        warning('⚠ something off')
+    finally:
+        remove_hook(metrics)
+    snapshot = metrics.snapshot()
+    assert snapshot['traces']['query']['count'] == 3
+    assert snapshot['stages']['pareto']['count'] == 3
+    assert snapshot['counters'] == {'routes': 6, 'bfs.queue_peak': 30}
+    assert [event['n'] for event in snapshot['recent']] == [2, 3]
+    assert snapshot['warnings'] == ['⚠ something off']
+    metrics.reset()
+    assert metrics.snapshot()['traces'] == {} and metrics.snapshot()['warnings'] == []
@@ -0,0 +1,64 @@
+import math
+
+import pytest
+
+from instrumentation import Metrics, add_hook, remove_hook, trace
+from lower_bounds import RideDistanceBounds
+from route_optimizer import MAX_ROUTE_DISTANCE
+from running_days import parse_journey_date
+
+
+def brute_force_bounds(router, dest_id, max_rides):
+    """The bounds by a dynamic program over every (board, alight) pair of every train"""
+    n = len(router.station_to_id)
+    rides = []
+    stops = router.stops
+    for train in range(len(router.train_nos)):
+        start, end = stops.train_offsets[train], stops.train_offsets[train + 1]
+        stations, distances = stops.station[start:end].tolist(), stops.distance[start:end].tolist()
+        rides += [(stations[i], stations[j], abs(distances[j] - distances[i]))
+                  for i in range(len(stations)) for j in range(i + 1, len(stations))]
+    bounds = [[math.inf] * n, [0 if any(a == s and b == dest_id for a, b, _ in rides) else math.inf
+                               for s in range(n)]]
+    for _ in range(2, max_rides + 1):
+        row = list(bounds[-1])
+        for a, b, km in rides:
+            if b != dest_id:
+                row[a] = min(row[a], km + bounds[-1][b])
+        bounds.append(row)
+    return bounds
+
+
+def test_bounds_match_brute_force(router):
+    ride_bounds = RideDistanceBounds(router.stops, len(router.station_to_id))
+    for dest_id in range(0, len(router.station_to_id), 7):
+        assert ride_bounds.bounds(dest_id, 3).tolist() == brute_force_bounds(router, dest_id, 3)
+
+
+def route_keys(routes):
+    return {tuple((segment['train_no'], segment['from'], segment['to']) for segment in route) for route in routes}
+
+
+@pytest.mark.parametrize('max_distance', [800, 1500, MAX_ROUTE_DISTANCE])
+@pytest.mark.parametrize('journey_date', [None, '2026-10-17'])
+def test_pruning_keeps_every_route(router, max_distance, journey_date):
+    journey_date = parse_journey_date(journey_date)
+    codes = sorted(router.station_to_id)
+    source_id = router.station_to_id[codes[0]]
+    metrics = Metrics()
+    add_hook(metrics)
+    try:
+        for destination in codes[1:10]:
+            dest_id = router.station_to_id[destination]
+            # Without a route cap the pruned BFS finds every route the plain one does
+            plain = router._find_multi_transfer_routes(source_id, dest_id, 3, max_routes=10 ** 6,
+                                                       max_distance=max_distance, journey_date=journey_date)
+            with trace('query'):
+                directed = router._find_multi_transfer_routes(source_id, dest_id, 3, max_routes=10 ** 6,
+                                                              max_distance=max_distance,
+                                                              bounds=router.goal_bounds(dest_id, 3),
+                                                              journey_date=journey_date)
+            assert route_keys(plain) <= route_keys(directed)
+    finally:
+        remove_hook(metrics)
+    assert metrics.snapshot()['counters']['bfs.goal_pruned'] > 0
@@ -0,0 +1,35 @@
+import multiprocessing
+
+import pytest
+
+from fares import FlatFare
+from parallel_search import ParallelExecutor
+from route_optimizer import ParetoTrainRouter
+
+pytestmark = pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+                                reason="ParallelExecutor needs the 'fork' start method")
+
+
+@pytest.fixture(scope='module')
+def executor(router):
+    # min_chunk=1 sends even small BFS levels to the workers
+    with ParallelExecutor(router, workers=3, min_chunk=1) as executor:
+        yield executor
+
+
+@pytest.mark.parametrize('mode', ['heuristic', 'directed'])
+@pytest.mark.parametrize('journey_date', [None, '2026-10-17'])
+def test_parallel_routes_equal_serial(router, executor, mode, journey_date):
+    codes = sorted(router.station_to_id)
+    for destination in codes[1:12]:
+        serial = router.generate_all_routes(codes[0], destination, 3, mode, journey_date=journey_date)
+        parallel = router.generate_all_routes(codes[0], destination, 3, mode, executor=executor,
+                                              journey_date=journey_date)
+        assert parallel == serial
+
+
+def test_executor_of_another_router_is_refused(timetable, executor):
+    other = ParetoTrainRouter(timetable, fare_engine=FlatFare())
+    codes = sorted(other.station_to_id)
+    with pytest.raises(ValueError):
+        other.generate_all_routes(codes[0], codes[1], 3, executor=executor)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from pareto import BLOCK_SIZE, non_dominated_mask, non_dominated_ranks, objective_matrix
+
+
+def brute_force_mask(matrix):
+    return np.array([
+        not any((other <= row).all() and (other < row).any() for other in matrix)
+        for row in matrix
+    ], dtype=bool)
+
+
+@pytest.mark.parametrize('n, levels, seed', [
+    (1, 10, 0), (40, 3, 1), (300, 5, 2), (BLOCK_SIZE * 2 + 7, 4, 3), (600, 1000, 4)
+])
+def test_mask_matches_brute_force(n, levels, seed):
+    # Few distinct levels give many ties and duplicate rows
+    matrix = np.random.default_rng(seed).integers(0, levels, (n, 5)).astype(float)
+    assert (non_dominated_mask(matrix) == brute_force_mask(matrix)).all()
+
+
+def test_duplicates_are_all_kept():
+    matrix = np.array([[1, 2, 3, 4, 5]] * 3 + [[2, 2, 3, 4, 5]], dtype=float)
+    assert non_dominated_mask(matrix).tolist() == [True, True, True, False]
+
+
+def test_empty():
+    assert non_dominated_mask(np.zeros((0, 5))).tolist() == []
+
+
+def test_ranks_peel_fronts():
+    matrix = np.random.default_rng(5).integers(0, 6, (200, 5)).astype(float)
+    ranks = non_dominated_ranks(matrix)
+    remaining = np.arange(len(matrix))
+    rank = 0
+    while len(remaining):
+        front = remaining[brute_force_mask(matrix[remaining])]
+        assert (ranks[front] == rank).all()
+        remaining = np.setdiff1d(remaining, front)
+        rank += 1
+
+
+def test_objective_matrix_negates_maximized_columns():
+    matrix = objective_matrix([{'time': 60, 'cost': 100, 'transfers': 1, 'seat_prob': 80, 'safety_score': 90}])
+    assert matrix.tolist() == [[60, 100, 1, -80, -90]]
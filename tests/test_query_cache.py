@@ -0,0 +1,70 @@
+from query_cache import QueryCache, SQLiteCacheStore
+
+
+def test_new_version_drops_old_entries():
+    cache = QueryCache()
+    cache.put(('PGT', 'KOTA'), {'routes': 1}, version='v1')
+    assert cache.get(('PGT', 'KOTA'), version='v1') == {'routes': 1}
+    assert cache.get(('PGT', 'KOTA'), version='v2') is None
+    assert cache.stats()['version'] == 'v2'
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_older_version_does_not_become_current_again():
+    cache = QueryCache()
+    cache.put('key', 'old', version='v1')
+    cache.put('key', 'new', version='v2')
+    # A request still running on the v1 router finishes late
+    cache.put('key', 'late', version='v1')
+    assert cache.stats()['version'] == 'v2'
+    assert cache.get('key', version='v2') == 'new'
+    assert cache.get('key', version='v1') is None
+
+
+def test_lru_and_ttl():
+    cache = QueryCache(max_entries=2, ttl=None)
+    for key in 'abc':
+        cache.put(key, key, version='v1')
+    assert cache.get('a', version='v1') is None
+    assert cache.get('c', version='v1') == 'c'
+    assert cache.stats()['evictions'] == 1
+
+    expired = QueryCache(ttl=-1)
+    expired.put('a', 'a', version='v1')
+    assert expired.get('a', version='v1') is None
+    assert expired.stats()['expirations'] == 1
+
+
+def test_store_keeps_every_version(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    # Two workers sharing one file, each on another timetable version
+    first = QueryCache(store=SQLiteCacheStore(path))
+    second = QueryCache(store=SQLiteCacheStore(path))
+    first.put('key', 'v1 routes', version='v1')
+    second.put('key', 'v2 routes', version='v2')
+    assert first.get('key', version='v1') == 'v1 routes'
+
+    restarted = QueryCache(store=SQLiteCacheStore(path))
+    assert restarted.get('key', version='v1') == 'v1 routes'
+    assert restarted.get('key', version='v2') == 'v2 routes'
+    assert restarted.stats()['store_hits'] == 2
+
+
+def test_store_expires_rows_by_age(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / 'cache.db'), max_age=0, prune_interval=0)
+    store.put('v1', 'a', 'old')
+    store.put('v2', 'b', 'new')
+    assert store.get('v1', 'a') is None
+    assert SQLiteCacheStore(str(tmp_path / 'cache.db'), max_age=None).get('v2', 'b') == 'new'
+
+
+def test_only_recent_versions_stay_retired():
+    cache = QueryCache(max_retired=2)
+    for version in ('v1', 'v2', 'v3', 'v4'):
+        cache.put('key', version, version=version)
+    assert list(cache._retired) == ['v2', 'v3']
+    # v1 is forgotten, so a request that old switches the memory tier like a new version
+    cache.put('key', 'late', version='v1')
+    assert cache.stats()['version'] == 'v1'
+    cache.put('key', 'late', version='v3')
+    assert cache.stats()['version'] == 'v1'
@@ -0,0 +1,98 @@
+import itertools
+
+import pytest
+
+MIN_WAIT, MAX_WAIT = 30, 480
+
+
+def brute_force_front(router, source_id, dest_id, max_transfers):
+    """(minutes, cost, rides) Pareto set of every journey, by depth-first enumeration"""
+    stops = router.stops
+    journeys = []
+
+    def train(t):
+        start, end = stops.train_offsets[t], stops.train_offsets[t + 1]
+        absolute = lambda days, minutes: [d * 1440 + m if m >= 0 else None for d, m in zip(days, minutes)]
+        return (stops.station[start:end].tolist(), absolute(stops.arr_day[start:end], stops.arr_min[start:end]),
+                absolute(stops.dep_day[start:end], stops.dep_min[start:end]),
+                stops.arr_min[start:end].tolist(), stops.dep_min[start:end].tolist(),
+                stops.distance[start:end].tolist())
+
+    def ride(station, minutes, cost, clock, rides, last):
+        if rides > max_transfers:
+            return
+        trains, positions = router.station_index.postings(station)
+        for t, i in zip(trains.tolist(), positions.tolist()):
+            if t == last:
+                continue
+            stations, arr_abs, dep_abs, arr_clock, dep_clock, distance = train(t)
+            if dep_abs[i] is None:
+                continue
+            wait = 0 if clock is None else (dep_clock[i] - clock) % 1440
+            if clock is not None and not MIN_WAIT <= wait <= MAX_WAIT:
+                continue
+            for j in range(i + 1, len(stations)):
+                if arr_abs[j] is None or stations[j] == source_id:
+                    continue
+                total = minutes + wait + arr_abs[j] - dep_abs[i]
+                paid = cost + router.fare_engine.fare(abs(distance[j] - distance[i]))
+                if stations[j] == dest_id:
+                    journeys.append((total, round(paid, 6), rides))
+                ride(stations[j], total, paid, arr_clock[j], rides + 1, t)
+
+    ride(source_id, 0, 0.0, None, 0, -1)
+    return {a for a in journeys if not any(b != a and all(x <= y for x, y in zip(b, a)) for b in journeys)}
+
+
+def pairs(router, n, seed=0):
+    codes = sorted(router.station_to_id)
+    return list(itertools.islice(itertools.combinations(codes[::3], 2), seed, seed + n))
+
+
+def test_fronts_match_brute_force(router):
+    for source, destination in pairs(router, 10):
+        source_id, dest_id = router.station_to_id[source], router.station_to_id[destination]
+        search = router.pareto_search(source, 1, destination)
+        found = {(search.minutes[label], round(search.cost[label], 6), search.rides[label] - 1)
+                 for label in search.labels_at(dest_id)}
+        assert found == brute_force_front(router, source_id, dest_id, 1), (source, destination)
+
+
+def journey(router, route):
+    """(timetable minutes, cost, rides) of a route, as the round-based search counts them"""
+    stops = router.stops
+    minutes = cost = 0
+    for segment in route:
+        t = router.train_nos.index(segment['train_no'])
+        start, end = stops.train_offsets[t], stops.train_offsets[t + 1]
+        stations = [router.id_to_station[s] for s in stops.station[start:end].tolist()]
+        board = stations.index(segment['from'])
+        alight = stations.index(segment['to'], board + 1)
+        departure = stops.dep_day[start + board] * 1440 + stops.dep_min[start + board]
+        arrival = stops.arr_day[start + alight] * 1440 + stops.arr_min[start + alight]
+        minutes += round(segment['wait_before'] * 60) + int(arrival - departure)
+        cost += router.fare_engine.fare(segment['distance'])
+    return minutes, round(cost, 6), len(route)
+
+
+@pytest.mark.parametrize('max_transfers', [2, 3])
+def test_fronts_dominate_heuristic_routes(router, max_transfers):
+    # The heuristic finds some journeys; the exact front has one at least as good for each
+    for source, destination in pairs(router, 6, seed=20):
+        front = [journey(router, route)
+                 for route in router.generate_all_routes(source, destination, max_transfers, 'raptor')]
+        assert front and all(rides <= max_transfers + 1 for _, _, rides in front)
+        for found in map(lambda route: journey(router, route),
+                         router.generate_all_routes(source, destination, max_transfers)):
+            assert any(all(x <= y for x, y in zip(best, found)) for best in front), (source, destination, found)
+
+
+def test_untargeted_search_matches_targeted(router):
+    source = sorted(router.station_to_id)[0]
+    everywhere = router.pareto_search(source, 2)
+    for destination in sorted(router.station_to_id)[1::7]:
+        dest_id = router.station_to_id[destination]
+        targeted = router.pareto_search(source, 2, destination)
+        labels = lambda search: sorted((search.rides[label], search.minutes[label], round(search.cost[label], 6))
+                                       for label in search.labels_at(dest_id))
+        assert labels(everywhere) == labels(targeted), destination
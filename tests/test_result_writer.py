@@ -0,0 +1,79 @@
+import json
+import os
+import threading
+
+import pytest
+
+from result_writer import ResultWriter, atomic_write, get_result_writer
+from route_optimizer import get_routes_data
+
+
+def test_atomic_write_replaces_the_whole_file(tmp_path):
+    path = tmp_path / 'routes.json'
+    path.write_text('old')
+    os.chmod(path, 0o640)
+    atomic_write(str(path), lambda f: f.write('new'))
+    assert path.read_text() == 'new'
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ['routes.json']
+
+
+def test_failed_atomic_write_keeps_the_old_file(tmp_path):
+    path = tmp_path / 'routes.json'
+    path.write_text('old')
+
+    def write(f):
+        f.write('partial')
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        atomic_write(str(path), write)
+    assert path.read_text() == 'old'
+    assert os.listdir(tmp_path) == ['routes.json']
+
+
+def test_writer_runs_jobs_in_order_and_counts_failures():
+    writer = ResultWriter()
+    done = []
+    writer.submit(done.append, 1)
+    writer.submit(lambda: 1 / 0)
+    writer.submit(done.append, 2)
+    writer.flush()
+    assert done == [1, 2]
+    assert writer.stats() == {'pending': 0, 'written': 2, 'dropped': 0, 'failed': 1,
+                              'last_error': 'division by zero'}
+
+
+def test_full_queue_drops_jobs_without_blocking():
+    writer = ResultWriter(max_pending=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait()
+
+    writer.submit(blocked)
+    started.wait()
+    assert writer.submit(lambda: None)
+    assert not writer.submit(lambda: None)
+    release.set()
+    writer.flush()
+    assert writer.stats()['dropped'] == 1 and writer.stats()['written'] == 2
+
+
+@pytest.mark.parametrize('export', ['none', 'sync', 'background'])
+def test_export_modes(router, tmp_path, monkeypatch, export):
+    monkeypatch.chdir(tmp_path)
+    codes = sorted(router.station_to_id)
+    results, _ = get_routes_data(codes[0], codes[5], 2, router=router, export=export)
+    assert 'error' not in results
+    get_result_writer().flush()
+    prefix = f"{codes[0]}_to_{codes[5]}"
+    if export == 'none':
+        assert os.listdir(tmp_path) == []
+        return
+    assert sorted(os.listdir(tmp_path)) == [f"{prefix}_all_routes.csv", f"{prefix}_pareto_routes.csv",
+                                            f"{prefix}_pareto_routes.json"]
+    with open(tmp_path / f"{prefix}_pareto_routes.json") as f:
+        assert json.load(f) == json.loads(json.dumps(results))
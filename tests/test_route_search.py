@@ -0,0 +1,46 @@
+import itertools
+
+import pytest
+
+from route_optimizer import MAX_TRANSFER_MINUTES, MIN_TRANSFER_MINUTES
+
+
+def check_route(route, source, destination, max_transfers):
+    assert route[0]['from'] == source and route[-1]['to'] == destination
+    assert len(route) <= max_transfers + 1
+    assert all(a['to'] == b['from'] for a, b in zip(route, route[1:]))
+    assert route[0]['wait_before'] == 0
+    for segment in route[1:]:
+        assert MIN_TRANSFER_MINUTES <= round(segment['wait_before'] * 60) <= MAX_TRANSFER_MINUTES
+
+
+def trains(route):
+    return tuple(segment['train_no'] for segment in route)
+
+
+def pairs(router, n):
+    codes = sorted(router.station_to_id)
+    return list(itertools.islice(itertools.combinations(codes[::2], 2), 0, 40, 40 // n))
+
+
+@pytest.mark.parametrize('mode', ['heuristic', 'directed'])
+def test_routes_are_connected_journeys(router, mode):
+    for source, destination in pairs(router, 10):
+        routes = router.generate_all_routes(source, destination, 3, mode)
+        for route in routes:
+            check_route(route, source, destination, 3)
+        # Routes riding the same trains are one route
+        assert len({trains(route) for route in routes}) == len(routes)
+
+
+def test_direct_routes_are_the_direct_trains(router):
+    for source, destination in pairs(router, 10):
+        direct = [route[0]['train_no'] for route in router.generate_all_routes(source, destination, 0)]
+        assert sorted(direct) == sorted(router.find_direct_trains(source, destination))
+
+
+def test_more_transfers_find_more_routes(router):
+    for source, destination in pairs(router, 5):
+        fewer = {trains(route) for route in router.generate_all_routes(source, destination, 1)}
+        more = {trains(route) for route in router.generate_all_routes(source, destination, 2)}
+        assert fewer <= more
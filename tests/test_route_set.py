@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from fares import FareEngine, FlatFare
+from route_set import RouteSet
+
+
+def random_routes(n, seed):
+    """Routes with awkward float values, so summation order shows"""
+    rng = np.random.default_rng(seed)
+    return [[{'train_no': str(rng.integers(10000, 20000)),
+              'duration': float(rng.random() * 10.0 ** rng.integers(-3, 4)), 'wait_before': float(rng.random()),
+              'distance': float(rng.random() * 10.0 ** rng.integers(0, 4)), 'seat_available': bool(rng.integers(2))}
+             for _ in range(rng.integers(1, 6))]
+            for _ in range(n)]
+
+
+@pytest.mark.parametrize('fare_engine', [FlatFare(), FlatFare(1.37),
+                                         FareEngine({'SL': [(0, 30.0), (100, 75.5), (500, 210.25)]})])
+def test_objectives_match_route_by_route(router, monkeypatch, fare_engine):
+    monkeypatch.setattr(router, 'fare_engine', fare_engine)
+    codes = sorted(router.station_to_id)
+    routes = router.generate_all_routes(codes[0], codes[7], 3) + random_routes(300, seed=1)
+    route_set = RouteSet(routes, fare_engine)
+    # Bit-for-bit, as the Pareto front and the saved results depend on them
+    assert route_set.objectives() == [router.calculate_route_objectives(route) for route in routes]
+
+
+def test_pareto_front_of_a_route_set_matches_a_list(router):
+    codes = sorted(router.station_to_id)
+    routes = router.generate_all_routes(codes[0], codes[7], 3)
+    from_list = router.pareto_optimize(routes)
+    from_set = router.pareto_optimize(RouteSet(routes, router.fare_engine))
+    assert [(r['route'], r['objectives']) for r in from_set] == [(r['route'], r['objectives']) for r in from_list]
+
+
+def test_empty_route_set():
+    route_set = RouteSet([])
+    assert route_set.objectives() == []
+    assert route_set.matrix().shape == (0, 5)
+    assert RouteSet.of(route_set) is route_set
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from benchmarks.synthetic_timetable import synthetic_timetable
+from router_service import RouterService, get_router_service
+
+
+@pytest.fixture
+def timetable_csv(tmp_path):
+    path = tmp_path / 'timetable.csv'
+    synthetic_timetable(30, 60, 6, seed=1).to_csv(path, index=False)
+    return str(path)
+
+
+def test_router_is_built_once_and_shared(timetable_csv):
+    service = RouterService(timetable_csv)
+    assert service.status()['loaded'] is False
+    router = service.get()
+    assert service.get() is router
+    assert service.timetable_changed() is False
+    assert service.reload_if_changed(wait=True) is False
+    assert service.get() is router
+    assert service.status()['timetable_version'] == router.timetable_version
+
+
+def test_reload_swaps_in_a_new_router(timetable_csv):
+    service = RouterService(timetable_csv)
+    router = service.get()
+    synthetic_timetable(30, 80, 6, seed=2).to_csv(timetable_csv, index=False)
+    os.utime(timetable_csv, (0, 0))
+    assert service.timetable_changed()
+    assert service.reload_if_changed(wait=True)
+    assert service.get() is not router
+    assert service.get().timetable_version != router.timetable_version
+
+
+def test_failed_build_keeps_the_previous_router(timetable_csv):
+    service = RouterService(timetable_csv)
+    router = service.get()
+    with open(timetable_csv, 'w') as f:
+        f.write('not,a,timetable\n')
+    service.reload(wait=True)
+    assert service.get() is router
+    assert service.status()['last_error']
+
+
+def test_missing_timetable_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        RouterService(str(tmp_path / 'missing.csv')).get()
+
+
+def test_one_service_per_process():
+    assert get_router_service() is get_router_service()
@@ -0,0 +1,87 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from fares import FlatFare
+from route_optimizer import ParetoTrainRouter
+from running_days import DAILY, RunningDays, day_mask, parse_journey_date, train_key
+
+SATURDAY = datetime.date(2026, 10, 17)
+FRIDAY = SATURDAY - datetime.timedelta(days=1)
+
+
+def _train(train_no, calls):
+    """Train_details.csv rows for (station, arrival, departure, km) calls"""
+    return [
+        {'Train No': train_no, 'Train Name': f'TEST {train_no}', 'SEQ': seq, 'Station Code': station,
+         'Station Name': station, 'Arrival time': arrival, 'Departure Time': departure, 'Distance': km,
+         'Source Station': calls[0][0], 'Source Station Name': calls[0][0],
+         'Destination Station': calls[-1][0], 'Destination Station Name': calls[-1][0]}
+        for seq, (station, arrival, departure, km) in enumerate(calls, 1)
+    ]
+
+
+def overnight_router(masks):
+    """
+    11111 reaches BBB at 23:30; 22222 leaves BBB at 00:30, so riding both
+    means boarding 22222 a day after the journey date. 33333 leaves XXX at
+    20:00 and calls at BBB at 01:00 the next day.
+    """
+    rows = (_train(11111, [('AAA', '22:00:00', '22:00:00', 0), ('BBB', '23:30:00', '23:30:00', 100)])
+            + _train(22222, [('BBB', '00:30:00', '00:30:00', 0), ('CCC', '02:00:00', '02:00:00', 90)])
+            + _train(33333, [('XXX', '20:00:00', '20:00:00', 0), ('BBB', '01:00:00', '01:10:00', 300),
+                             ('CCC', '03:00:00', '03:00:00', 400)]))
+    return ParetoTrainRouter(pd.DataFrame(rows), fare_engine=FlatFare(), running_days=RunningDays(masks))
+
+
+def rides(router, source, destination, journey_date, mode='heuristic'):
+    return sorted(tuple((str(segment['train_no']), segment['date']) for segment in route)
+                  for route in router.generate_all_routes(source, destination, 2, mode, journey_date=journey_date))
+
+
+def test_day_mask_and_train_key():
+    assert day_mask('Daily') == DAILY
+    assert day_mask('Mon, Wednesday') == 0b0000101
+    assert day_mask('Sunday') == 1 << 6
+    assert day_mask('n/a') is None
+    assert train_key(12345) == train_key('012345') == train_key(' 12345 ') == '12345'
+    assert train_key('ab1') == 'AB1'
+    assert RunningDays({'012345': 1}).mask(12345) == 1
+    assert RunningDays({}).mask(99999) == DAILY
+
+
+def test_parse_journey_date():
+    assert parse_journey_date('2026-10-17') == SATURDAY
+    assert parse_journey_date(datetime.datetime(2026, 10, 17, 8, 30)) == SATURDAY
+    assert parse_journey_date(None) is None
+    with pytest.raises(ValueError):
+        parse_journey_date('17/10/2026')
+
+
+@pytest.mark.parametrize('mode', ['heuristic', 'raptor'])
+def test_transfer_after_midnight_checks_the_next_day(mode):
+    sunday_only = overnight_router({22222: day_mask('Sun'), 33333: day_mask('Fri')})
+    assert ((('11111', '2026-10-17'), ('22222', '2026-10-18'))
+            in rides(sunday_only, 'AAA', 'CCC', SATURDAY, mode))
+    # Boarded on Sunday, so running on Saturday is not enough
+    saturday_only = overnight_router({22222: day_mask('Sat'), 33333: day_mask('Fri')})
+    assert all(train != '22222' for route in rides(saturday_only, 'AAA', 'CCC', SATURDAY, mode)
+               for train, _ in route)
+
+
+@pytest.mark.parametrize('mode', ['heuristic', 'raptor'])
+def test_day_offset_of_the_boarding_stop(mode):
+    # 33333 calls at BBB the day after it leaves XXX on a Friday
+    router = overnight_router({22222: 0, 33333: day_mask('Fri')})
+    assert rides(router, 'BBB', 'CCC', SATURDAY, mode) == [(('33333', '2026-10-17'),)]
+    assert rides(router, 'BBB', 'CCC', FRIDAY, mode) == []
+    assert rides(router, 'XXX', 'CCC', FRIDAY, mode) == [(('33333', '2026-10-16'),)]
+    # From AAA on Friday night the transfer boards 33333 on Saturday morning
+    assert rides(router, 'AAA', 'CCC', FRIDAY, mode) == [(('11111', '2026-10-16'), ('33333', '2026-10-17'))]
+    assert rides(router, 'AAA', 'CCC', SATURDAY, mode) == []
+
+
+def test_undated_queries_ignore_running_days():
+    router = overnight_router({22222: 0, 33333: 0})
+    assert len(router.generate_all_routes('AAA', 'CCC', 2)) == 2
@@ -0,0 +1,60 @@
+import pandas as pd
+
+from seat_availability import HashedSeatProvider, MemoizedSeatProvider, TableSeatProvider
+
+
+class NoSeats:
+    def seat_available(self, train_no, from_station, to_station, journey_date=None):
+        return 0
+
+
+def _table(**columns):
+    rows = {'Train No': ['12345', '2201'], 'From': ['PGT', 'NDLS'], 'To': ['KOTA', 'HWH'],
+            'Seat Available': [1, 1]}
+    rows.update(columns)
+    return TableSeatProvider(pd.DataFrame(rows), fallback=NoSeats())
+
+
+def test_int_and_str_train_numbers_find_the_same_row():
+    provider = _table()
+    assert provider.seat_available(12345, 'PGT', 'KOTA') == 1
+    assert provider.seat_available('12345', 'PGT', 'KOTA') == 1
+    assert provider.seat_available('02201', 'NDLS', 'HWH') == 1
+
+
+def test_table_read_with_int_train_numbers():
+    provider = TableSeatProvider(pd.DataFrame({'Train No': [12345], 'From': ['PGT'], 'To': ['KOTA'],
+                                               'Seat Available': [1]}), fallback=NoSeats())
+    assert provider.seat_available('12345', 'PGT', 'KOTA') == 1
+    assert provider.seat_available(12345, 'PGT', 'KOTA') == 1
+
+
+def test_dated_rows_override_undated_ones():
+    provider = _table(**{'Train No': ['12345', '12345'], 'From': ['PGT', 'PGT'], 'To': ['KOTA', 'KOTA'],
+                         'Seat Available': [1, 0], 'Date': [None, '2026-10-17']})
+    assert provider.seat_available(12345, 'PGT', 'KOTA', '2026-10-17') == 0
+    assert provider.seat_available(12345, 'PGT', 'KOTA', '2026-10-18') == 1
+    assert provider.seat_available(12345, 'PGT', 'KOTA') == 1
+
+
+def test_unlisted_rides_go_to_the_fallback():
+    provider = _table()
+    assert provider.seat_available(12345, 'KOTA', 'PGT') == 0
+    assert provider.seat_available(99999, 'PGT', 'KOTA') == 0
+
+
+def test_from_csv(tmp_path):
+    path = tmp_path / 'seats.csv'
+    path.write_text('Train No,From,To,Seat Available\n12345,PGT,KOTA,1\n')
+    assert TableSeatProvider.from_csv(path, fallback=NoSeats()).seat_available(12345, 'PGT', 'KOTA') == 1
+
+
+def test_hashed_answers_are_stable_and_memoized():
+    hashed = HashedSeatProvider()
+    answers = [hashed.seat_available(train, 'PGT', 'KOTA') for train in range(1000)]
+    assert answers == [hashed.seat_available(train, 'PGT', 'KOTA') for train in range(1000)]
+    assert 700 < sum(answers) < 900
+    memo = MemoizedSeatProvider(hashed)
+    assert [memo.seat_available(train, 'PGT', 'KOTA') for train in range(1000)] == answers
+    memo.seat_available(0, 'PGT', 'KOTA')
+    assert memo.stats()['hits'] == 1
@@ -0,0 +1,176 @@
+import numpy as np
+import pytest
+
+from route_optimizer import _ranked, _selection_quotas
+
+
+def synthetic_front(n, seed):
+    """Routes with random objectives; some share trains, so fingerprints repeat"""
+    rng = np.random.default_rng(seed)
+    return [{'route': [{'train_no': str(rng.integers(n // 2 + 1))}],
+             'objectives': {'time': float(rng.integers(20)), 'cost': float(rng.integers(20)),
+                            'transfers': int(rng.integers(3)), 'seat_prob': float(rng.integers(0, 101)),
+                            'safety_score': float(rng.integers(50, 60))}}
+            for _ in range(n)]
+
+
+def old_selection(router, pareto_front, n_fast=10, n_cheap=5, n_balanced=7):
+    """The sort-based selection select_optimal_routes replaced, with its quotas as arguments"""
+    if len(pareto_front) == 0:
+        return [], []
+    fingerprint_of = router._get_route_fingerprint
+    final_selections = {}
+    sorted_by_time = sorted(pareto_front, key=lambda x: x['objectives']['time'])
+    sorted_by_cost = sorted(pareto_front, key=lambda x: x['objectives']['cost'])
+    sorted_by_transfers = sorted(pareto_front, key=lambda x: x['objectives']['transfers'])
+    sorted_by_seats = sorted(pareto_front, key=lambda x: x['objectives']['seat_prob'], reverse=True)
+    sorted_by_safety = sorted(pareto_front, key=lambda x: x['objectives']['safety_score'], reverse=True)
+
+    def add_or_update_route(route_data, category, priority):
+        fingerprint = fingerprint_of(route_data['route'])
+        if fingerprint not in final_selections:
+            final_selections[fingerprint] = {'route_data': route_data, 'category': category, 'priority': priority}
+        elif final_selections[fingerprint]['priority'] < priority:
+            final_selections[fingerprint]['category'] = category
+            final_selections[fingerprint]['priority'] = priority
+
+    priority = 100
+    for ranking, category in ((sorted_by_time, 'FASTEST ⚡'), (sorted_by_cost, 'CHEAPEST 💰'),
+                              (sorted_by_transfers, 'MOST DIRECT 🚂'), (sorted_by_seats, 'BEST SEATS 💺'),
+                              (sorted_by_safety, 'SAFEST 🛡️')):
+        add_or_update_route(ranking[0], category, priority)
+        priority -= 1
+
+    def fill(ranking, label, quota, also=()):
+        nonlocal priority
+        filled = 0
+        for route_data in ranking:
+            fingerprint = fingerprint_of(route_data['route'])
+            if fingerprint not in final_selections or \
+                    final_selections[fingerprint]['category'].startswith(('OPTIMAL ALTERNATIVE',) + also):
+                add_or_update_route(route_data, label.format(filled + 1), priority)
+                priority -= 1
+                filled += 1
+            if filled >= quota:
+                break
+
+    fill(sorted_by_time, 'FAST #{} ⚡', n_fast)
+    fill(sorted_by_cost, 'CHEAP #{} 💰', n_cheap, ('FAST #',))
+
+    columns = {name: [r['objectives'][name] for r in pareto_front]
+               for name in ('time', 'cost', 'transfers', 'seat_prob', 'safety_score')}
+    low = {name: min(values) for name, values in columns.items()}
+    high = {name: max(values) for name, values in columns.items()}
+    span = {name: high[name] - low[name] + 0.001 for name in columns}
+    for route_data in pareto_front:
+        obj = route_data['objectives']
+        route_data['balanced_score'] = (
+            ((high['time'] - obj['time']) / span['time']) * 0.25 +
+            ((high['cost'] - obj['cost']) / span['cost']) * 0.25 +
+            ((high['transfers'] - obj['transfers']) / span['transfers']) * 0.20 +
+            ((obj['seat_prob'] - low['seat_prob']) / span['seat_prob']) * 0.15 +
+            ((obj['safety_score'] - low['safety_score']) / span['safety_score']) * 0.15
+        )
+    fill(sorted(pareto_front, key=lambda x: x['balanced_score'], reverse=True), 'BALANCED #{} ⚖️', n_balanced)
+
+    for route_data in pareto_front:
+        fingerprint = fingerprint_of(route_data['route'])
+        if fingerprint not in final_selections:
+            final_selections[fingerprint] = {'route_data': route_data, 'category': 'OPTIMAL ALTERNATIVE 🎯',
+                                             'priority': 0}
+    routes, categories = [], []
+    for route_data in pareto_front:
+        selection = final_selections.pop(fingerprint_of(route_data['route']), None)
+        if selection is not None:
+            routes.append(selection['route_data'])
+            categories.append(selection['category'])
+    return routes, categories
+
+
+def quota_counts(categories):
+    return {prefix: sum(label.startswith(prefix) for label in categories)
+            for prefix in ('FAST #', 'CHEAP #', 'BALANCED #')}
+
+
+@pytest.mark.parametrize('k', [1, 3, 10, 50])
+def test_ranked_is_stable_top_k_with_ties(k):
+    values = np.random.default_rng(k).integers(0, 8, 30).astype(float)
+    order = np.argsort(values, kind='stable')
+    if k >= len(values):
+        expected = order
+    else:
+        expected = order[values[order] <= values[order[k - 1]]]
+    assert _ranked(values, k).tolist() == expected.tolist()
+
+
+def assert_same_selection(router, front, *quotas):
+    old_front = [dict(route) for route in front]
+    new_front = [dict(route) for route in front]
+    old_routes, old_categories = old_selection(router, old_front, *quotas)
+    new_routes, new_categories = router.select_optimal_routes(new_front, *quotas)
+    assert [next(i for i, r in enumerate(old_front) if r is route) for route in old_routes] == \
+        [next(i for i, r in enumerate(new_front) if r is route) for route in new_routes]
+    assert new_categories == old_categories
+    assert [r['balanced_score'] for r in new_front] == [r['balanced_score'] for r in old_front]
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_selection_matches_old_sort_based_one(router, seed):
+    # Few objective levels and train numbers: many ties and duplicate fingerprints
+    rng = np.random.default_rng(seed)
+    n = int(rng.choice([1, 2, 5, 30, 200]))
+    front = synthetic_front(n, seed)
+    quotas = () if seed % 2 else tuple(int(q) for q in rng.integers(0, 12, 3))
+    assert_same_selection(router, front, *quotas)
+
+
+def test_selection_matches_old_one_on_searched_fronts(router):
+    codes = sorted(router.station_to_id)
+    for destination in codes[1:8]:
+        for mode in ('heuristic', 'raptor'):
+            front = router.pareto_optimize(router.generate_all_routes(codes[0], destination, 2, mode))
+            assert_same_selection(router, front)
+
+
+@pytest.mark.parametrize('quotas', [(10, 5, 7), (0, 0, 0), (1, 0, 3), (2, 4, 0)])
+def test_quotas_bound_categories(router, quotas):
+    front = synthetic_front(80, seed=sum(quotas))
+    n_fast, n_cheap, n_balanced = quotas
+    routes, categories = router.select_optimal_routes(front, n_fast, n_cheap, n_balanced)
+    counts = quota_counts(categories)
+    assert counts['FAST #'] <= n_fast
+    assert counts['CHEAP #'] <= n_cheap
+    assert counts['BALANCED #'] <= n_balanced
+    # Every fingerprint is listed once, whatever the quotas
+    fingerprints = [router._get_route_fingerprint(route['route']) for route in routes]
+    assert len(fingerprints) == len(set(fingerprints))
+    assert set(fingerprints) == {router._get_route_fingerprint(route['route']) for route in front}
+
+
+def test_quotas_on_searched_front(router):
+    source, *destinations = sorted(router.station_to_id)[:5]
+    front = []
+    for destination in destinations:
+        front += router.pareto_optimize(router.generate_all_routes(source, destination, 2))
+    assert front
+    default = quota_counts(router.select_optimal_routes(front)[1])
+    none = quota_counts(router.select_optimal_routes(front, 0, 0, 0)[1])
+    assert none == {'FAST #': 0, 'CHEAP #': 0, 'BALANCED #': 0}
+    assert default['FAST #'] <= 10 and default['CHEAP #'] <= 5 and default['BALANCED #'] <= 7
+
+
+def test_negative_quota_is_rejected(router):
+    with pytest.raises(ValueError):
+        router.select_optimal_routes(synthetic_front(5, seed=0), n_fast=-1)
+
+
+@pytest.mark.parametrize('quotas', [{'n_fast': -1}, {'n_cheap': True}, {'n_balanced': 'x'},
+                                    {'n_balanced': 2.0}, {'n_slow': 1}])
+def test_invalid_quotas(quotas):
+    with pytest.raises(ValueError):
+        _selection_quotas(quotas)
+
+
+def test_default_quotas_are_dropped():
+    assert _selection_quotas(None) == {}
+    assert _selection_quotas({'n_fast': 10, 'n_cheap': None, 'n_balanced': np.int64(3)}) == {'n_balanced': 3}
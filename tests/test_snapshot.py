@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from fares import FlatFare
+from route_optimizer import ParetoTrainRouter
+from running_days import RunningDays
+from snapshot import SnapshotError, StaleSnapshotError, load_snapshot, write_snapshot
+
+
+@pytest.fixture(scope='module')
+def snapshot_path(timetable, tmp_path_factory):
+    router = ParetoTrainRouter(timetable, graph_backend='csr', fare_engine=FlatFare(), running_days=RunningDays({}))
+    path = str(tmp_path_factory.mktemp('snapshot') / 'router.snapshot')
+    write_snapshot(router, path, source_hash='abc')
+    return path
+
+
+def test_snapshot_round_trip(router, snapshot_path):
+    loaded = load_snapshot(snapshot_path, None, source_hash='abc')
+    assert loaded.snapshot_hash == 'abc'
+    assert loaded.station_to_id == router.station_to_id
+    assert dict(loaded.train_info) == router.train_info
+    for station_id in range(len(router.station_to_id)):
+        assert list(loaded.graph.get(station_id, [])) == router.graph.get(station_id, [])
+        for mine, theirs in zip(loaded.departure_index.departures(station_id),
+                                router.departure_index.departures(station_id)):
+            assert np.array_equal(mine, theirs)
+    # The departure index is read from the mapping, not rebuilt
+    assert not loaded.departure_index.minute.flags.owndata
+
+    codes = sorted(router.station_to_id)
+    for mode in ('heuristic', 'raptor'):
+        assert loaded.generate_all_routes(codes[0], codes[4], 2, mode) == \
+            router.generate_all_routes(codes[0], codes[4], 2, mode)
+
+
+def test_stale_or_foreign_snapshots_are_refused(snapshot_path, tmp_path):
+    with pytest.raises(StaleSnapshotError):
+        load_snapshot(snapshot_path, None, source_hash='other')
+    garbage = tmp_path / 'garbage.snapshot'
+    garbage.write_bytes(b'not a snapshot at all' * 10)
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(garbage), None)
@@ -0,0 +1,40 @@
+def stop_lists(router):
+    """Station ids of every train's stops, in running order"""
+    stops = router.stops
+    return [stops.station[stops.train_offsets[t]:stops.train_offsets[t + 1]].tolist()
+            for t in range(len(router.train_nos))]
+
+
+def test_postings_list_every_stop(router):
+    trains = stop_lists(router)
+    for station_id in range(len(router.station_to_id)):
+        train_idx, stop_pos = router.station_index.postings(station_id)
+        assert list(zip(train_idx.tolist(), stop_pos.tolist())) == [
+            (t, pos) for t, stations in enumerate(trains) for pos, station in enumerate(stations)
+            if station == station_id
+        ]
+    assert len(router.station_index.postings(-1)[0]) == 0
+    assert len(router.station_index.postings(len(router.station_to_id))[0]) == 0
+
+
+def test_trains_between_matches_scan(router):
+    trains = stop_lists(router)
+    n = len(router.station_to_id)
+    for from_id in range(0, n, 3):
+        for to_id in range(n):
+            expected = [(t, stations.index(from_id), stations.index(to_id)) for t, stations in enumerate(trains)
+                        if from_id in stations and to_id in stations
+                        and stations.index(to_id) > stations.index(from_id)]
+            found = router.station_index.trains_between(from_id, to_id)
+            assert list(zip(*(array.tolist() for array in found))) == expected
+
+
+def test_find_direct_trains(router):
+    codes = sorted(router.station_to_id)
+    trains = stop_lists(router)
+    source, destination = router.station_to_id[codes[0]], router.station_to_id[codes[3]]
+    assert router.find_direct_trains(codes[0], codes[3]) == [
+        router.train_nos[t] for t, stations in enumerate(trains)
+        if source in stations and destination in stations and stations.index(destination) > stations.index(source)
+    ]
+    assert router.find_direct_trains(codes[0], 'NOPE') == []
@@ -0,0 +1,73 @@
+import logging
+
+import pandas as pd
+
+from instrumentation import add_hook, remove_hook
+from route_optimizer import _parse_clock, load_timetable, normalize_timetable_times
+
+
+def stops(train_no, times):
+    """One train calling at S1, S2, ... with (arrival, departure) `times`"""
+    return pd.DataFrame({
+        'Train No': train_no, 'Train Name': f'TRAIN {train_no}', 'SEQ': range(1, len(times) + 1),
+        'Station Code': [f'S{i}' for i in range(1, len(times) + 1)],
+        'Station Name': [f'S{i}' for i in range(1, len(times) + 1)],
+        'Arrival time': [arrival for arrival, _ in times], 'Departure Time': [departure for _, departure in times],
+        'Distance': [100 * i for i in range(len(times))],
+        'Source Station': 'S1', 'Source Station Name': 'S1',
+        'Destination Station': f'S{len(times)}', 'Destination Station Name': f'S{len(times)}'
+    })
+
+
+def test_parse_clock():
+    assert _parse_clock('00:00:00') == 0
+    assert _parse_clock('23:59') == 23 * 60 + 59
+    assert _parse_clock('7:05:30') == 7 * 60 + 5
+    for value in ('24:00:00', '12:60:00', '12:00:61', 'noon', '', None, 1200):
+        assert _parse_clock(value) == -1
+
+
+def test_minutes_and_day_offsets():
+    df, report = normalize_timetable_times(stops(11111, [('22:00:00', '22:10:00'), ('23:50:00', '00:05:00'),
+                                                         ('06:00:00', '06:10:00'), ('23:00:00', '23:00:00')]))
+    assert df['Arrival Min'].tolist() == [1320, 1430, 360, 1380]
+    assert df['Departure Min'].tolist() == [1330, 5, 370, 1380]
+    assert df['Arrival Day'].tolist() == [0, 0, 1, 1]
+    assert df['Departure Day'].tolist() == [0, 1, 1, 1]
+    assert report['malformed_rows'] == 0 and report['examples'] == []
+
+
+def test_malformed_times_are_summarized():
+    df = pd.concat([stops(11111, [('10:00:00', '10:05:00'), ('25:00:00', '12:00:00'), ('14:00:00', 'x')]),
+                    stops(22222, [('10:00:00', '10:05:00'), (None, '12:00:00')]),
+                    stops(33333, [('10:00:00', '10:05:00'), ('11:00:00', '11:05:00')])], ignore_index=True)
+    df, report = normalize_timetable_times(df)
+    assert report['rows'] == 7
+    assert report['malformed_arrival'] == 2
+    assert report['malformed_departure'] == 1
+    assert report['malformed_rows'] == 3
+    assert report['trains_affected'] == 2
+    assert report['examples'][0] == {'train_no': '11111', 'seq': 2, 'arrival': '25:00:00', 'departure': '12:00:00'}
+    assert report['examples'][2]['arrival'] is None
+    # Malformed times are -1 and do not shift the day offsets of later stops
+    assert df['Arrival Min'].tolist()[:3] == [600, -1, 840]
+    assert df['Arrival Day'].tolist()[:3] == [0, 0, 0]
+
+
+def test_load_reports_malformed_rows(tmp_path, caplog):
+    path = tmp_path / 'timetable.csv'
+    stops(11111, [('10:00:00', '10:05:00'), ('bad', '12:00:00')]).to_csv(path, index=False)
+    events = []
+    add_hook(events.append)
+    try:
+        df = load_timetable(str(path))
+    finally:
+        remove_hook(events.append)
+    assert df.attrs['time_validation']['malformed_rows'] == 1
+    assert [event['type'] for event in events] == ['warning']
+    assert '1 of 2 timetable rows' in events[0]['message']
+
+    # Without hooks the warning goes to the route_optimizer logger
+    with caplog.at_level(logging.WARNING, logger='route_optimizer'):
+        load_timetable(str(path))
+    assert '1 of 2 timetable rows' in caplog.text
@@ -0,0 +1,91 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from fares import FlatFare
+from route_optimizer import ParetoTrainRouter, get_routes_data
+from running_days import RunningDays
+from timetable_updates import TimetableUpdateError, apply_train_updates, read_timetable_diff
+
+
+def new_stops(train_no, template, codes):
+    """`template`'s stops (times and distances) renumbered and moved to `codes`"""
+    stops = template.copy()
+    stops['Train No'] = train_no
+    stops['Train Name'] = f'UPDATED {train_no}'
+    stops['Station Code'] = stops['Station Name'] = codes
+    stops['Source Station'], stops['Destination Station'] = codes[0], codes[-1]
+    return stops.reset_index(drop=True)
+
+
+def build(df, backend):
+    return ParetoTrainRouter(df, graph_backend=backend, fare_engine=FlatFare(), running_days=RunningDays({}))
+
+
+def stop_table(router):
+    stops = router.stops
+    return (router.train_nos, [router.id_to_station[i] for i in stops.station.tolist()],
+            stops.arr_min.tolist(), stops.dep_min.tolist(), stops.arr_day.tolist(), stops.dep_day.tolist(),
+            stops.distance.tolist(), stops.train_offsets.tolist())
+
+
+def departures(router):
+    return {code: [(router.train_nos[t], pos, minute)
+                   for t, pos, minute in zip(*router.station_index.postings(i), router.departure_index.departures(i)[0])]
+            for code, i in router.station_to_id.items()}
+
+
+@pytest.mark.parametrize('backend', ['dict', 'csr'])
+def test_incremental_updates_match_a_full_rebuild(timetable, backend):
+    trains = list(dict.fromkeys(timetable['Train No']))
+    by_train = {train_no: rows for train_no, rows in timetable.groupby('Train No', sort=False)}
+    codes = sorted(timetable['Station Code'].unique())
+    removed, replaced = trains[3:6], trains[10:13]
+    replacements = {t: new_stops(t, by_train[t], list(reversed(by_train[t]['Station Code'].tolist())))
+                    for t in replaced}
+    added = {str(90000 + k): new_stops(str(90000 + k), by_train[trains[20 + k]],
+                                       codes[k:k + len(by_train[trains[20 + k]]) - 1] + [f'NEW{k}'])
+             for k in range(3)}
+    changes = ([('remove', t, None) for t in removed] + [('replace', t, f) for t, f in replacements.items()]
+               + [('add', t, f) for t, f in added.items()])
+
+    base = build(timetable, backend)
+    base.timetable_version = 'v0'
+    updated = apply_train_updates(base, changes)
+    rebuilt = build(pd.concat([timetable[~timetable['Train No'].isin(removed + replaced)],
+                               *replacements.values(), *added.values()], ignore_index=True), backend)
+
+    assert stop_table(updated) == stop_table(rebuilt)
+    assert departures(updated) == departures(rebuilt)
+    assert updated.timetable_version != 'v0'
+    # Copy-on-write: the router the update started from is untouched
+    assert stop_table(base) == stop_table(build(timetable, backend))
+
+    for source, destination in [(codes[0], codes[9]), (codes[4], 'NEW1'), ('NEW2', codes[7]), (codes[2], codes[30])]:
+        for mode in ('heuristic', 'raptor'):
+            ours, _ = get_routes_data(source, destination, 3, router=updated, mode=mode, export='none')
+            theirs, _ = get_routes_data(source, destination, 3, router=rebuilt, mode=mode, export='none')
+            assert json.dumps(ours, default=str) == json.dumps(theirs, default=str), (source, destination, mode)
+
+
+def test_invalid_updates_leave_the_router_alone(router):
+    train_no = router.train_nos[0]
+    with pytest.raises(TimetableUpdateError):
+        apply_train_updates(router, [('remove', 'NOT A TRAIN', None)])
+    with pytest.raises(TimetableUpdateError):
+        apply_train_updates(router, [('add', train_no, None)])
+    assert router.train_nos[0] == train_no
+
+
+def test_read_timetable_diff():
+    diff = io.StringIO(
+        "Action,Train No,Train Name,SEQ,Station Code,Station Name,Arrival time,Departure Time,Distance,"
+        "Source Station,Destination Station\n"
+        "add,12345,NEW,1,AAA,A,10:00:00,10:00:00,0,AAA,BBB\n"
+        "add,12345,NEW,2,BBB,B,11:00:00,11:00:00,60,AAA,BBB\n"
+        "remove,22222,,,,,,,,,\n")
+    changes = read_timetable_diff(diff)
+    assert [(action, train_no) for action, train_no, _ in changes] == [('add', '12345'), ('remove', '22222')]
+    assert len(changes[0][2]) == 2 and changes[1][2] is None
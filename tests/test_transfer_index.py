@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from route_optimizer import MINUTES_PER_DAY, _window_ranges
+
+
+@pytest.mark.parametrize('dtype', [np.int16, np.int64])
+def test_window_ranges_match_wait_check(dtype):
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        minutes = np.sort(rng.integers(0, MINUTES_PER_DAY, rng.integers(0, 60))).astype(dtype)
+        arrival = int(rng.integers(0, MINUTES_PER_DAY))
+        min_wait = int(rng.integers(0, 600))
+        max_wait = min_wait + int(rng.integers(0, MINUTES_PER_DAY - min_wait))
+        found = sorted(i for start, end in _window_ranges(minutes, arrival, min_wait, max_wait)
+                       for i in range(start, end))
+        waits = (minutes.astype(int) - arrival) % MINUTES_PER_DAY
+        assert found == np.flatnonzero((waits >= min_wait) & (waits <= max_wait)).tolist()
+
+
+def test_departures_within_match_wait_check(router):
+    for station_id in range(len(router.station_to_id)):
+        trains, positions = router.station_index.postings(station_id)
+        min_wait, max_wait = router.transfer_window(station_id)
+        for arrival in (0, 300, 1200, 1439):
+            expected = [rank for rank, (train, pos) in enumerate(zip(trains.tolist(), positions.tolist()))
+                        if min_wait <= router._wait_minutes(arrival, router._train_stop_lists(train, {})[2][pos])
+                        <= max_wait]
+            assert router._departures_within(station_id, arrival).tolist() == expected
@@ -0,0 +1,307 @@
+"""
+Incremental timetable updates: add, replace or remove single trains in a
+built ParetoTrainRouter without rebuilding it from the whole CSV.
+
+Updates are copy-on-write. apply_train_updates() returns a new router and
+never modifies the one it is given, so a request still holding the old
+router keeps a complete, consistent graph; RouterService swaps the new one
+in with one assignment, as it does for reloads.
+
+Only the changed trains are parsed and built, into a small router of their
+own, whose edges, stop rows and train entries are merged into copies of
+the structures they touch:
+
+    dict graph, train_info     copies sharing the untouched stations' edge lists
+    stop table, station and    re-gathered with array operations from the old
+    departure indexes          rows and the new trains' rows
+    csr graph                  re-derived from the merged stop table
+
+New stations get the next free ids, so existing station ids never change.
+Ride distance bounds are rebuilt lazily, and the router's timetable_version
+changes, so query caches drop results computed before the update.
+
+A diff file has the Train_details.csv columns plus an Action column; a
+removal needs only its Train No:
+
+    Action,Train No,Train Name,SEQ,Station Code,Station Name,Arrival time,...
+    add,12345,NEW EXPRESS,1,PGT,PALAKKAD JN,00:00:00,...
+    add,12345,NEW EXPRESS,2,CBE,COIMBATORE JN,02:05:00,...
+    remove,12622,,,,,,...
+"""
+import copy
+import hashlib
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from compact_graph import CompactTrainInfo, DepartureIndex, StationIndex, TrainStops
+from instrumentation import count, trace
+from route_optimizer import ParetoTrainRouter, compact_graph_from_stops
+
+UPDATE_ACTIONS = ('add', 'replace', 'remove')
+STOP_COLUMNS = ('Train No', 'Train Name', 'SEQ', 'Station Code', 'Arrival time', 'Departure Time',
+                'Distance', 'Source Station', 'Destination Station')
+
+
+class TimetableUpdateError(ValueError):
+    """An update that cannot be applied: malformed stops or a train that does (not) exist"""
+
+
+def read_timetable_diff(path):
+    """(action, train_no, stops frame or None) per train of the diff CSV at `path` (or file object), in file order"""
+    diff = pd.read_csv(path, dtype={'Train No': str})
+    if 'Action' not in diff.columns or 'Train No' not in diff.columns:
+        raise TimetableUpdateError(f"Diff file '{path}' needs 'Action' and 'Train No' columns")
+    diff = diff.dropna(subset=['Train No'])
+    diff['Action'] = diff['Action'].str.strip().str.lower()
+
+    changes = []
+    for train_no, rows in diff.groupby('Train No', sort=False):
+        actions = rows['Action'].unique()
+        if len(actions) != 1 or actions[0] not in UPDATE_ACTIONS:
+            raise TimetableUpdateError(f"Train {train_no}: expected one action of {UPDATE_ACTIONS}, "
+                                       f"got {list(actions)}")
+        action = actions[0]
+        stops = None if action == 'remove' else rows.drop(columns='Action').reset_index(drop=True)
+        changes.append((action, train_no, stops))
+    return changes
+
+
+def add_train(router, stops):
+    """New router with the train whose stop rows are `stops` added"""
+    return apply_train_updates(router, [('add', _frame_train_no(stops), stops)])
+
+
+def replace_train(router, stops):
+    """New router with the train whose stop rows are `stops` running those stops instead"""
+    return apply_train_updates(router, [('replace', _frame_train_no(stops), stops)])
+
+
+def remove_train(router, train_no):
+    """New router without train `train_no`"""
+    return apply_train_updates(router, [('remove', train_no, None)])
+
+
+def apply_train_updates(router, changes):
+    """
+    New router with `changes`, (action, train_no, stops frame or None)
+    triples, applied; `router` itself is left as it was. Raises
+    TimetableUpdateError, before anything is built, if any change is
+    invalid. Returns `router` when there is nothing to change.
+    """
+    changes = _validated_changes(router, changes)
+    if not changes:
+        return router
+
+    with trace('update', trains=len(changes), graph_backend=router.graph_backend):
+        frames = [stops for stops in changes.values() if stops is not None]
+        built = None
+        if frames:
+            # The changed trains' own router: their edges, stop rows and train entries
+            built = ParetoTrainRouter(pd.concat(frames, ignore_index=True), graph_backend='dict',
+                                      seat_provider=router.seat_provider, fare_engine=router.fare_engine,
+                                      running_days=router.running_days)
+
+        updated = copy.copy(router)
+        remap = _merge_stations(updated, router, built)
+        order = _merge_stop_tables(updated, router, built, remap, changes)
+        if router.graph_backend == 'csr':
+            _merge_compact_graph(updated, router, built, order)
+        else:
+            _merge_dict_graph(updated, router, built, remap, changes)
+
+        updated.station_index = StationIndex(len(updated.station_to_id), updated.stops.station,
+                                             updated.stops.train_offsets)
+        updated.departure_index = DepartureIndex(updated.station_index, updated.stops)
+        updated.ride_bounds = None
+        updated.run_masks = router.running_days.masks_for(updated.train_nos)
+        if router.df is not None:
+            kept = router.df[~router.df['Train No'].isin(list(changes))]
+            updated.df = pd.concat([kept, built.df], ignore_index=True) if built is not None else kept
+        if getattr(router, 'timetable_version', None) is not None:
+            updated.timetable_version = hashlib.sha256(
+                (router.timetable_version + _changes_digest(changes)).encode()).hexdigest()
+
+        count('update.trains_removed', sum(stops is None for stops in changes.values()))
+        count('update.trains_built', len(frames))
+        return updated
+
+
+def _frame_train_no(stops):
+    train_nos = stops['Train No'].dropna().unique() if 'Train No' in stops.columns else []
+    if len(train_nos) != 1:
+        raise TimetableUpdateError("Stops must belong to exactly one train")
+    return train_nos[0]
+
+
+def _train_key(router, train_no):
+    """`train_no` as the router keys its trains: int if the timetable's train numbers are"""
+    if router.train_nos and isinstance(router.train_nos[0], (int, np.integer)):
+        try:
+            return int(train_no)
+        except (TypeError, ValueError):
+            raise TimetableUpdateError(f"Train number '{train_no}' is not numeric like the timetable's") from None
+    return str(train_no)
+
+
+def _validated_changes(router, changes):
+    """train_no → stops frame (None to remove), checked against the router's trains"""
+    validated = {}
+    for action, train_no, stops in changes:
+        key = _train_key(router, train_no)
+        if action not in UPDATE_ACTIONS:
+            raise TimetableUpdateError(f"Unknown action '{action}', expected one of {UPDATE_ACTIONS}")
+        if key in validated:
+            raise TimetableUpdateError(f"Train {key} is changed more than once")
+        exists = key in router.train_info
+        if action == 'add' and exists:
+            raise TimetableUpdateError(f"Train {key} already exists; replace it instead")
+        if action != 'add' and not exists:
+            raise TimetableUpdateError(f"Train {key} does not exist")
+        # load_timetable only keeps five-character train numbers
+        if len(str(key)) != 5:
+            raise TimetableUpdateError(f"Train number '{key}' must have five characters")
+
+        if action != 'remove':
+            missing = [column for column in STOP_COLUMNS if column not in stops.columns]
+            if missing:
+                raise TimetableUpdateError(f"Stops of train {key} lack columns {missing}")
+            stops = stops.dropna(subset=['Station Code', 'SEQ'])
+            if len(stops) < 2:
+                raise TimetableUpdateError(f"Train {key} needs at least two stops")
+            if stops['SEQ'].duplicated().any():
+                raise TimetableUpdateError(f"Train {key} has duplicate SEQ values")
+            stops = stops.assign(**{'Train No': key})
+            if isinstance(key, int):
+                stops['Train No'] = stops['Train No'].astype(np.int64)
+        validated[key] = stops if action != 'remove' else None
+    return validated
+
+
+def _changes_digest(changes):
+    digest = hashlib.sha256()
+    for train_no in sorted(changes, key=str):
+        stops = changes[train_no]
+        digest.update(f"{train_no}:".encode())
+        digest.update(b'-' if stops is None else stops.to_csv(index=False).encode())
+    return digest.hexdigest()
+
+
+def _merge_stations(updated, router, built):
+    """Give the built trains' new stations the next ids; returns built station id → router station id"""
+    if built is None:
+        return np.zeros(0, dtype=np.int64)
+    codes = [built.id_to_station[i] for i in range(len(built.id_to_station))]
+    new_codes = [code for code in codes if code not in router.station_to_id]
+    if new_codes:
+        updated.station_to_id = dict(router.station_to_id)
+        updated.id_to_station = dict(router.id_to_station)
+        for code in new_codes:
+            station_id = len(updated.station_to_id)
+            updated.station_to_id[code] = station_id
+            updated.id_to_station[station_id] = code
+    return np.array([updated.station_to_id[code] for code in codes], dtype=np.int64)
+
+
+def _merge_stop_tables(updated, router, built, remap, changes):
+    """
+    Build the merged TrainStops and train_nos, trains in train number order
+    as a full build has them. Returns, per merged train, (built?, index in
+    the router or in the built trains).
+    """
+    old, new = router.stops, built.stops if built is not None else TrainStops.empty()
+    new_train_nos = built.train_nos if built is not None else []
+    order = sorted([(train_no, False, t) for t, train_no in enumerate(router.train_nos) if train_no not in changes] +
+                   [(train_no, True, t) for t, train_no in enumerate(new_train_nos)])
+
+    # Built trains' time labels join the router's, existing labels keep their codes
+    time_labels = list(old.time_labels)
+    label_codes = {label: code for code, label in enumerate(time_labels)}
+    for label in new.time_labels:
+        if label not in label_codes:
+            label_codes[label] = len(time_labels)
+            time_labels.append(label)
+    # Unknown times (code -1) index the trailing -1
+    code_map = np.array([label_codes[label] for label in new.time_labels] + [-1], dtype=np.int64)
+
+    # Gather each merged train's rows from the old rows followed by the built ones
+    n_old = old.n_trains
+    starts = np.concatenate([old.train_offsets[:-1], len(old.station) + new.train_offsets[:-1]])
+    lengths = np.concatenate([np.diff(old.train_offsets), np.diff(new.train_offsets)])
+    pick = np.array([n_old + t if is_built else t for _, is_built, t in order], dtype=np.int64)
+    starts, lengths = starts[pick], lengths[pick]
+    offsets = np.zeros(len(order) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    rows = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+
+    def merged(old_column, new_column):
+        return np.concatenate([old_column, new_column])[rows]
+
+    updated.stops = TrainStops(
+        offsets,
+        station=merged(old.station, remap[new.station]),
+        seq=merged(old.seq, new.seq),
+        arrival_code=merged(old.arrival_code, code_map[new.arrival_code]),
+        departure_code=merged(old.departure_code, code_map[new.departure_code]),
+        time_labels=time_labels,
+        arr_min=merged(old.arr_min, new.arr_min),
+        dep_min=merged(old.dep_min, new.dep_min),
+        arr_day=merged(old.arr_day, new.arr_day),
+        dep_day=merged(old.dep_day, new.dep_day),
+        distance=merged(old.distance, new.distance)
+    )
+    updated.train_nos = [train_no for train_no, _, _ in order]
+    return [(is_built, t) for _, is_built, t in order]
+
+
+def _merge_dict_graph(updated, router, built, remap, changes):
+    """Copies of the edge lists and train_info entries the changed trains touch; the rest is shared"""
+    graph = defaultdict(list, router.graph)
+    train_info = dict(router.train_info)
+
+    touched = set()
+    for train_no in changes:
+        if train_no in router.train_info:
+            touched.update(router.station_to_id[stop['station']] for stop in router.train_info[train_no]['stations'])
+            del train_info[train_no]
+    new_edges = defaultdict(list)
+    if built is not None:
+        for built_id, edges in built.graph.items():
+            station_id = int(remap[built_id])
+            new_edges[station_id] = [{**edge, 'to_id': int(remap[edge['to_id']])} for edge in edges]
+            touched.add(station_id)
+        train_info.update(built.train_info)
+
+    for station_id in touched:
+        edges = [edge for edge in router.graph.get(station_id, []) if edge['train_no'] not in changes]
+        edges.extend(new_edges.get(station_id, []))
+        # A full build lists a station's edges in train number order
+        edges.sort(key=lambda edge: edge['train_no'])
+        if edges:
+            graph[station_id] = edges
+        else:
+            graph.pop(station_id, None)
+
+    updated.graph = graph
+    updated.train_info = train_info
+
+
+def _merge_compact_graph(updated, router, built, order):
+    """CompactGraph and CompactTrainInfo over the merged stop table"""
+    old = router.train_info
+    station_codes = [updated.id_to_station[i] for i in range(len(updated.id_to_station))]
+    names, sources, destinations = [], [], []
+    for (is_built, t), train_no in zip(order, updated.train_nos):
+        if is_built:
+            info = built.train_info[train_no]
+            names.append(info['name'])
+            sources.append(info['source'])
+            destinations.append(info['destination'])
+        else:
+            names.append(old.names[t])
+            sources.append(old.sources[t])
+            destinations.append(old.destinations[t])
+    updated.graph = compact_graph_from_stops(len(station_codes), updated.stops, updated.train_nos)
+    updated.train_info = CompactTrainInfo(updated.train_nos, names, sources, destinations, updated.stops,
+                                          station_codes)